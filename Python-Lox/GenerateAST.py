@@ -2,7 +2,7 @@ import sys
 
 base_description = {
     "Expression": {
-        "Chain": [["Expression", "left"], ["Expression, right"]],
+        "Chain": [["Expression", "left"], ["Expression", "right"]],
         "Unary": [["Token", "operator"], ["Expression", "right"]],
         "Binary": [["Expression", "left"], ["Token", "operator"], ["Expression", "right"]],
         "Grouping": [["Expression", "expression"]],
@@ -17,29 +17,55 @@ base_description = {
     }
 }
 
-def defineAST(output_file, base_name: str, types: dict):
+# Fields filled in by later passes rather than the parser, initialized to None
+# Statements record the line of their first token for diagnostics and profiling
+# Binary nodes carry an inline cache of their quickened handler, see interpreter.specialize
+# Entries are names initialized to None, or [name, initial value source]
+annotations = {
+    "VariableExpr": ["depth", "slot"],
+    "Assign": ["depth", "slot"],
+    "Binary": ["handler", ["deopts", "0"]],
+    "Expression": ["line"],
+    "Print": ["line"],
+    "VariableStmt": ["slot", "line"]
+}
+
+# Fields every node carries for tiering.TieredInterpreter
+# hits counts visitor executions and compiled holds the closure the node was promoted to
+tier_annotations = [["hits", "0"], "compiled"]
+
+def defineAST(output_file, base_name: str, types: dict, slots: bool = True):
     """
     Creates classes for Abstract Syntax Tree
+    With slots, every class declares __slots__ so nodes carry no per-instance __dict__
     """
     output_file.write("import scanner\n\n")
     output_file.writelines(["class " + base_name + ":\n",
-                            "\tpass\n"])
+                            "\t__slots__ = ()\n" if slots else "\tpass\n"])
     for expr_type, expr in types.items():
-        defineType(output_file, base_name, expr_type, expr)
+        defineType(output_file, base_name, expr_type, expr, slots)
 
-def defineType(output_file, base_name, class_name, fields):
+def defineType(output_file, base_name, class_name, fields, slots: bool = True):
     """
     Creates classes for AST sub-trees
     """
     names = [field[-1] for field in fields]
+    extras = [[extra, "None"] if isinstance(extra, str) else extra
+              for extra in annotations.get(class_name, []) + tier_annotations]
+    extra_names = [extra[0] for extra in extras]
 
     field_str = ", ".join(names)
 
     var_defs = ["\t\tself." + name + " = " + name + "\n" for name in names]
+    var_defs += ["\t\tself." + name + " = " + value + "\n" for name, value in extras]
 
     output_file.write("\n")
-    output_file.writelines(["class " + class_name + "(" + base_name + "):\n"
-                            "\tdef __init__(self, " + field_str + "):\n"])
+    output_file.write("class " + class_name + "(" + base_name + "):\n")
+    if slots:
+        slot_names = ['"' + name + '"' for name in names + extra_names]
+        slot_str = ", ".join(slot_names) + ("," if len(slot_names) == 1 else "")
+        output_file.write("\t__slots__ = (" + slot_str + ")\n\n")
+    output_file.write("\tdef __init__(self, " + field_str + "):\n")
     output_file.writelines(var_defs)
     output_file.write("\n")
     output_file.writelines(["\tdef accept(self, visitor):\n", 
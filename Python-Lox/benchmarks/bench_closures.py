@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import closures
+import lox
+import lox_parser
+import scanner
+
+def generateProgram(statements: int) -> str:
+    lines = ["var x = 0;", "var y = 2;"]
+    for i in range(statements):
+        lines.append("x = x + (y * " + str(i % 7 + 1) + " - 3) / 4;")
+    lines.append("x;")
+    return "\n".join(lines)
+
+def parseProgram(runner: lox.Lox, source: str) -> list:
+    tokens = scanner.Scanner(runner, source).scanTokens()
+    statements = lox_parser.Parser(runner, tokens).parse()
+    runner.resolver.resolve(statements)
+    return statements
+
+def timeVisitor(source: str, runs: int) -> float:
+    """
+    Returns the time to interpret the parsed program runs times through accept()
+    """
+    runner = lox.Lox()
+    statements = parseProgram(runner, source)
+    start = time.perf_counter()
+    for _ in range(runs):
+        runner.interpreter.interpret(statements, "visitor")
+    return time.perf_counter() - start
+
+def timeClosure(source: str, runs: int) -> tuple:
+    """
+    Returns (compile time, time to run the compiled closures runs times)
+    """
+    runner = lox.Lox()
+    statements = parseProgram(runner, source)
+    environment = runner.interpreter.environment
+
+    start = time.perf_counter()
+    compiled = closures.ClosureCompiler().compile(statements)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        for run in compiled:
+            run(environment)
+    return compile_time, time.perf_counter() - start
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare visitor and closure interpreter modes")
+    arg_parser.add_argument("--statements", type=int, default=1000)
+    arg_parser.add_argument("--runs", type=int, default=200)
+    options = arg_parser.parse_args()
+
+    source = generateProgram(options.statements)
+    visitor = timeVisitor(source, options.runs)
+    compile_time, closure = timeClosure(source, options.runs)
+    print("%d statements x %d runs" % (options.statements, options.runs))
+    print("visitor:         %.4fs" % visitor)
+    print("closure compile: %.4fs" % compile_time)
+    print("closure execute: %.4fs" % closure)
+    print("execute speedup: %.2fx" % (visitor / closure))
+    print("total speedup:   %.2fx" % (visitor / (compile_time + closure)))
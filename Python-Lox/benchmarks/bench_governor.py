@@ -0,0 +1,40 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus
+import governor
+import lox
+import sinks
+
+def timeExecution(source: str, limits: governor.Limits, repeat: int) -> float:
+    """
+    Returns the best execution time of source on the tree backend, excluding scan and parse
+    """
+    best = None
+    for _ in range(repeat):
+        runner = lox.Lox(output=sinks.CaptureSink(), limits=limits)
+        statements = runner.parse(source)
+        start = time.perf_counter()
+        runner._execute(statements)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Measure what enforcing governor.Limits costs on the tree backend")
+    arg_parser.add_argument("--size", type=int, default=20000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    options = arg_parser.parse_args()
+
+    # Limits far above what the programs use, so every check runs and none fires
+    generous = governor.Limits(max_instructions=10 ** 12, timeout=3600.0, max_bytes=10 ** 12)
+    print("%-22s %10s %10s %9s" % ("program", "plain s", "limits s", "overhead"))
+    for name in ("arithmeticChains", "variableReassignment", "stringConcatenation"):
+        source = getattr(corpus, name)(options.size)
+        plain = timeExecution(source, None, options.repeat)
+        limited = timeExecution(source, generous, options.repeat)
+        print("%-22s %10.4f %10.4f %8.1f%%" % (name, plain, limited, (limited / plain - 1) * 100))
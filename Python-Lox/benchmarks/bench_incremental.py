@@ -0,0 +1,52 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus
+import lox
+
+def timeEdits(source: str, edits: int, seed: int) -> tuple:
+    """
+    Returns (full parse seconds per edit, incremental seconds per edit) for the same keystrokes
+    Each keystroke inserts or deletes a digit inside a random number literal, like typing in an editor
+    """
+    runner = lox.Lox()
+    document = runner.openDocument(source)
+    generator = random.Random(seed)
+
+    full = 0.0
+    incremental = 0.0
+    for _ in range(edits):
+        # Edit near either end so both the kept prefix and the reused suffix are long
+        index = generator.choice([generator.randrange(200), len(document.tokens) - 1 - generator.randrange(1, 200)])
+        token = document.tokens[index]
+        offset = document.offsets[index]
+        if token.lexeme.isdigit() and len(token.lexeme) > 1 and generator.random() < 0.5:
+            removed, inserted = 1, ""
+        else:
+            removed, inserted = 0, "7" if token.lexeme.isdigit() else ""
+
+        start = time.perf_counter()
+        document.edit(offset, removed, inserted)
+        incremental += time.perf_counter() - start
+
+        start = time.perf_counter()
+        runner._scanAndParse(document.source)
+        full += time.perf_counter() - start
+    return full / edits, incremental / edits
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare full and incremental reparsing after small edits")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    arg_parser.add_argument("--edits", type=int, default=10)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    options = arg_parser.parse_args()
+
+    print("%10s %14s %14s %10s" % ("statements", "full ms/edit", "incr ms/edit", "speedup"))
+    for size in options.sizes:
+        full, incremental = timeEdits(corpus.largeProgram(size), options.edits, options.seed)
+        print("%10d %14.3f %14.3f %9.1fx" % (size, full * 1e3, incremental * 1e3, full / incremental))
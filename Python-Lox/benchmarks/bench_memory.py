@@ -0,0 +1,112 @@
+import argparse
+import io
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import GenerateAST
+import grammar
+import lox
+import lox_parser
+import scanner
+import statement
+
+def generateProgram(statements: int) -> str:
+    lines = ["var total = 0;", "var label = \"row\";"]
+    for i in range(statements):
+        lines.append("total = total + (" + str(i % 97) + " * 2 - 1) / 3;")
+        lines.append("print label + \"" + str(i % 13) + "\";")
+    return "\n".join(lines)
+
+def buildClasses(slots: bool) -> dict:
+    """
+    Generates the AST classes with or without __slots__ the same way GenerateAST writes grammar.py and statement.py
+    Returns a mapping of class name to class for both files
+    """
+    classes = {}
+    for base_name, description in (("Expression", "Expression"), ("Stmt", "Statement")):
+        source = io.StringIO()
+        GenerateAST.defineAST(source, base_name, GenerateAST.base_description[description], slots)
+        namespace = {}
+        exec(source.getvalue(), namespace)
+        prefix = "stmt." if base_name == "Stmt" else ""
+        for name, value in namespace.items():
+            if isinstance(value, type):
+                classes[prefix + name] = value
+    return classes
+
+class DictToken:
+    """
+    scanner.Token as it was before __slots__
+    """
+    def __init__(self, type, lexeme, literal, line) -> None:
+        self.type = type
+        self.lexeme = lexeme
+        self.literal = literal
+        self.line = line
+
+def copyNode(node, classes: dict):
+    """
+    Rebuilds node and its children with the classes from buildClasses
+    Tokens and literal values are shared with the original so only node overhead is measured
+    """
+    if node is None or not isinstance(node, (grammar.Expression, statement.Stmt)):
+        return node
+    name = type(node).__name__
+    if isinstance(node, statement.Stmt):
+        name = "stmt." + name
+    # Only the constructor's fields, later passes fill in the rest
+    code = type(node).__init__.__code__
+    fields = [copyNode(getattr(node, field), classes) for field in code.co_varnames[1:code.co_argcount]]
+    return classes[name](*fields)
+
+def measure(build) -> tuple:
+    """
+    Returns (result of build(), bytes it allocated that are still live)
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+def countNodes(nodes) -> int:
+    count = 0
+    pending = list(nodes)
+    while pending:
+        node = pending.pop()
+        if not isinstance(node, (grammar.Expression, statement.Stmt)):
+            continue
+        count += 1
+        pending.extend(getattr(node, field) for field in node.__slots__)
+    return count
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Report bytes per token and per AST node with and without __slots__")
+    arg_parser.add_argument("--statements", type=int, default=50000)
+    options = arg_parser.parse_args()
+
+    source = generateProgram(options.statements)
+    runner = lox.Lox()
+    tokens, token_bytes = measure(lambda: scanner.Scanner(runner, source).scanTokens())
+    statements, node_bytes = measure(lambda: lox_parser.Parser(runner, tokens).parse())
+    nodes = countNodes(statements)
+
+    # Object overhead alone, with lexemes, literals and tokens shared between both layouts
+    _, slotted_token_bytes = measure(lambda: [scanner.Token(t.type, t.lexeme, t.literal, t.line) for t in tokens])
+    _, dict_token_bytes = measure(lambda: [DictToken(t.type, t.lexeme, t.literal, t.line) for t in tokens])
+    slotted_classes = buildClasses(True)
+    dict_classes = buildClasses(False)
+    _, slotted_node_bytes = measure(lambda: [copyNode(stmt, slotted_classes) for stmt in statements])
+    _, dict_node_bytes = measure(lambda: [copyNode(stmt, dict_classes) for stmt in statements])
+
+    print("%d tokens, %d nodes" % (len(tokens), nodes))
+    print("scan + parse, including lexemes and literals:")
+    print("  bytes/token: %.1f" % (token_bytes / len(tokens)))
+    print("  bytes/node:  %.1f" % (node_bytes / nodes))
+    print("object overhead only:        __dict__   __slots__")
+    print("  bytes/token:             %9.1f %11.1f" % (dict_token_bytes / len(tokens), slotted_token_bytes / len(tokens)))
+    print("  bytes/node:              %9.1f %11.1f" % (dict_node_bytes / nodes, slotted_node_bytes / nodes))
@@ -0,0 +1,70 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lox
+import mmap_scanner
+import scanner
+from bench_memory import generateProgram
+
+def measure(build) -> tuple:
+    """
+    Returns (result of build(), seconds it takes, bytes the result keeps allocated)
+    Pages of an mmap are not Python allocations, so only the token storage itself is counted for it
+    The two are measured on separate runs since tracemalloc slows allocation down
+    """
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, seconds, after - before
+
+def scanText(path: str) -> list:
+    with open(path, "r") as file:
+        return scanner.Scanner(runner, file.read()).scanTokens()
+
+def scanMapped(path: str) -> mmap_scanner.TokenTable:
+    return mmap_scanner.MmapScanner(runner, mmap_scanner.mapFile(path)).scanTokens()
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare token memory of scanner.Scanner and mmap_scanner.MmapScanner on a large file")
+    arg_parser.add_argument("--statements", type=int, default=200000)
+    options = arg_parser.parse_args()
+
+    runner = lox.Lox()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "large.lox")
+        with open(path, "w") as file:
+            file.write(generateProgram(options.statements))
+        size = os.path.getsize(path)
+
+        tokens, text_seconds, text_bytes = measure(lambda: scanText(path))
+        count = len(tokens)
+        del tokens
+        table, mapped_seconds, mapped_bytes = measure(lambda: scanMapped(path))
+        assert len(table) == count
+
+        # Touching every token the way a parser would, without keeping the LazyTokens
+        start = time.perf_counter()
+        for index in range(len(table)):
+            token = table[index]
+            token.type, token.lexeme, token.line
+        touch_seconds = time.perf_counter() - start
+        del table
+
+    print("%.1f MB source, %d tokens" % (size / 1e6, count))
+    print("scanner        seconds   bytes/token")
+    print("char         %9.3f %13.1f" % (text_seconds, text_bytes / count))
+    print("mmap         %9.3f %13.1f" % (mapped_seconds, mapped_bytes / count))
+    print("reading every mmap token's type, lexeme and line: %.3fs" % touch_seconds)
@@ -0,0 +1,92 @@
+import argparse
+import multiprocessing
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus
+import lox
+import node_table
+import sinks
+
+def resolvedProgram(source: str) -> list:
+    runner = lox.Lox(output=sinks.CaptureSink())
+    statements = runner.parse(source)
+    runner.resolver.resolve(statements)
+    return statements
+
+def tracedBytes(build) -> tuple:
+    """
+    Returns (result of build(), bytes it still holds allocated)
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+def timeCall(function, *args) -> tuple:
+    """
+    Returns (result of function(*args), seconds it took)
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def loadPickled(data: bytes) -> tuple:
+    start = time.perf_counter()
+    statements = pickle.loads(data)
+    return time.perf_counter() - start, len(statements)
+
+def loadShared(name: str) -> tuple:
+    start = time.perf_counter()
+    table = node_table.attach(name)
+    seconds = time.perf_counter() - start
+    count = len(table.roots)
+    table.close()
+    return seconds, count
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare object trees with flat node tables for memory, transfer and execution")
+    arg_parser.add_argument("--size", type=int, default=100000)
+    arg_parser.add_argument("--workers", type=int, default=4)
+    options = arg_parser.parse_args()
+
+    source = corpus.largeProgram(options.size)
+    statements, tree_bytes = tracedBytes(lambda: resolvedProgram(source))
+    # Pickled before running, since quickened Binary handlers cannot be pickled
+    pickled = pickle.dumps(statements, pickle.HIGHEST_PROTOCOL)
+    _, table_bytes = tracedBytes(lambda: node_table.encode(statements))
+    table, encode_seconds = timeCall(node_table.encode, statements)
+    _, decode_seconds = timeCall(table.toTree)
+
+    runner = lox.Lox(output=sinks.CaptureSink())
+    runner.resolver.resolve(statements)
+    _, tree_seconds = timeCall(runner.interpreter.interpret, statements)
+    _, table_seconds = timeCall(runner.table.interpret, table)
+
+    print("%d statements, %d nodes, %d pool entries" % (len(statements), len(table), len(table.pool)))
+    print("object tree:        %10d bytes" % tree_bytes)
+    print("node table:         %10d bytes, %d in columns" % (table_bytes, table.nbytes()))
+    print("encode %.3f s, decode %.3f s" % (encode_seconds, decode_seconds))
+    print("execute tree %.3f s, table %.3f s" % (tree_seconds, table_seconds))
+
+    shared = table.toSharedMemory()
+    try:
+        with multiprocessing.Pool(options.workers) as pool:
+            # Each worker loads the program once, the same way a worker would before running it
+            pickled_loads = pool.map(loadPickled, [pickled] * options.workers)
+            shared_loads = pool.map(loadShared, [shared.name] * options.workers)
+        print("slowest of %d workers to load the program:" % options.workers)
+        print("pickled tree:       %10d bytes sent per worker, %.4f s to unpickle" %
+              (len(pickled), max(seconds for seconds, _ in pickled_loads)))
+        print("shared table:       %10d bytes shared once,    %.4f s to attach" %
+              (shared.size, max(seconds for seconds, _ in shared_loads)))
+    finally:
+        shared.close()
+        shared.unlink()
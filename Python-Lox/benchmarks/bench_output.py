@@ -0,0 +1,64 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lox
+import sinks
+
+class PrintSink(sinks.Sink):
+    """
+    One built-in print() per line, the way every backend wrote output before sinks
+    """
+    def writeLine(self, text: str) -> None:
+        print(text)
+
+def printProgram(lines: int) -> str:
+    return "\n".join("print \"row " + str(index) + "\";" for index in range(lines))
+
+def timeOutput(source: str, backend: str, make_sink, path: str) -> float:
+    """
+    Returns the execution time of source with stdout and file descriptor 1 sent to path, excluding scan and parse
+    """
+    with open(path, "w") as file:
+        saved_fd = os.dup(1)
+        saved_stdout = sys.stdout
+        sys.stdout.flush()
+        os.dup2(file.fileno(), 1)
+        sys.stdout = file
+        try:
+            runner = lox.Lox(backend, output=make_sink())
+            statements = runner.parse(source)
+            start = time.perf_counter()
+            runner._execute(statements)
+            runner.output.flush()
+            return time.perf_counter() - start
+        finally:
+            sys.stdout = saved_stdout
+            os.dup2(saved_fd, 1)
+            os.close(saved_fd)
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare per-line print() with buffered output sinks")
+    arg_parser.add_argument("--lines", type=int, default=200000)
+    arg_parser.add_argument("--backend", choices=lox.BACKENDS, default="tree")
+    options = arg_parser.parse_args()
+
+    source = printProgram(options.lines)
+    variants = [
+        ("print()", PrintSink),
+        ("stream line", lambda: sinks.StreamSink(policy=sinks.LINE)),
+        ("stream size", lambda: sinks.StreamSink()),
+        ("fd size", lambda: sinks.FdSink()),
+        ("capture", sinks.CaptureSink),
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "output.txt")
+        print("%d lines on the %s backend" % (options.lines, options.backend))
+        print("%-12s %9s %10s" % ("sink", "seconds", "us/line"))
+        for name, make_sink in variants:
+            seconds = timeOutput(source, options.backend, make_sink, path)
+            print("%-12s %9.3f %10.2f" % (name, seconds, seconds / options.lines * 1e6))
@@ -0,0 +1,56 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus
+import lox
+import lox_parser
+import optimizer
+import scanner
+
+def timeParse(parser_type, tokens: list, repeat: int) -> tuple:
+    """
+    Returns (best seconds, statements), or (None, None) if parser_type overflowed the recursion limit
+    """
+    best = None
+    for _ in range(repeat):
+        runner = lox.Lox()
+        start = time.perf_counter()
+        try:
+            statements = parser_type(runner, tokens).parse()
+        except RecursionError:
+            return None, None
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, statements
+
+def deepNesting(depth: int) -> str:
+    """
+    One expression nested depth levels deep in parentheses and unary minus, past the recursion limit
+    """
+    return "(-" * depth + "1" + ")" * depth + ";"
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare parse throughput of Parser and PrattParser")
+    arg_parser.add_argument("--scale", type=float, default=0.5, help="multiplies every corpus program's default size")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--depth", type=int, default=100000, help="nesting depth of the deep_nesting program")
+    options = arg_parser.parse_args()
+
+    programs = {name: generator(max(1, int(size * options.scale))) for name, (generator, size) in corpus.PROGRAMS.items()}
+    programs["deep_nesting"] = deepNesting(options.depth)
+
+    print("%-22s %12s %12s %12s %12s %8s" % ("program", "descent s", "pratt s", "descent n/s", "pratt n/s", "speedup"))
+    for name, source in programs.items():
+        tokens = scanner.Scanner(lox.Lox(), source).scanTokens()
+        descent, statements = timeParse(lox_parser.Parser, tokens, options.repeat)
+        pratt, _ = timeParse(lox_parser.PrattParser, tokens, options.repeat)
+        if descent is None:
+            # The nested tree is too deep for the recursive node counter as well
+            print("%-22s %12s %12.4f %12s %12s %8s" % (name, "overflow", pratt, "-", "-", "-"))
+            continue
+        nodes = optimizer.countNodes(statements)
+        print("%-22s %12.4f %12.4f %12.0f %12.0f %7.2fx" % (name, descent, pratt, nodes / descent, nodes / pratt, descent / pratt))
@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cooperative
+import lox
+import sinks
+
+def sessionScript(statements: int) -> str:
+    lines = ["var total = 0;"]
+    for index in range(statements):
+        lines.append("total = total + " + str(index) + " * 2;")
+        lines.append("print total;")
+    return "\n".join(lines)
+
+def createSessions(count: int, budget: int) -> tuple:
+    """
+    Returns (sessions, seconds to create them, bytes they keep allocated)
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    sessions = [cooperative.Session(budget=budget) for _ in range(count)]
+    seconds = time.perf_counter() - start
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return sessions, seconds, after - before
+
+async def runConcurrently(sessions: list, source: str) -> float:
+    start = time.perf_counter()
+    results = await asyncio.gather(*(session.runAsync(source) for session in sessions))
+    seconds = time.perf_counter() - start
+    assert all(results)
+    return seconds
+
+def runSequentially(count: int, source: str) -> float:
+    """
+    The same work on plain Lox instances, one after another, with no event loop
+    """
+    runners = [lox.Lox(output=sinks.CaptureSink()) for _ in range(count)]
+    start = time.perf_counter()
+    for runner in runners:
+        runner.run(source)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Measure per-session cost of many cooperative sessions on one event loop")
+    arg_parser.add_argument("--sessions", type=int, default=10000)
+    arg_parser.add_argument("--statements", type=int, default=20)
+    arg_parser.add_argument("--budget", type=int, default=cooperative.DEFAULT_BUDGET)
+    arg_parser.add_argument("--gc-off", action="store_true",
+                            help="pause the cyclic collector during the concurrent run, which otherwise rescans every live session")
+    options = arg_parser.parse_args()
+
+    source = sessionScript(options.statements)
+    sessions, create_seconds, session_bytes = createSessions(options.sessions, options.budget)
+    if options.gc_off:
+        gc.disable()
+    concurrent_seconds = asyncio.run(runConcurrently(sessions, source))
+    gc.enable()
+    sequential_seconds = runSequentially(options.sessions, source)
+
+    count = options.sessions
+    print("%d sessions, %d statements each, budget %d" % (count, options.statements * 2 + 1, options.budget))
+    print("idle session:       %8.1f KB, created in %.1f us" % (session_bytes / count / 1024, create_seconds / count * 1e6))
+    print("concurrent run:     %8.1f us/session" % (concurrent_seconds / count * 1e6))
+    print("sequential run:     %8.1f us/session" % (sequential_seconds / count * 1e6))
+    print("event loop overhead %8.1f us/session" % ((concurrent_seconds - sequential_seconds) / count * 1e6))
@@ -0,0 +1,42 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus
+import lox
+import rope
+import sinks
+
+def timeConcatenation(source: str, backend: str) -> float:
+    """
+    Returns the execution time of source, excluding scan and parse
+    """
+    with open(os.devnull, "w") as devnull:
+        runner = lox.Lox(backend, output=sinks.StreamSink(devnull))
+        statements = runner.parse(source)
+        start = time.perf_counter()
+        runner._execute(statements)
+        runner.output.checkpoint()
+        return time.perf_counter() - start
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Show how repeated s = s + piece; and s = piece + s; scale with and without ropes")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 20000, 40000, 80000])
+    arg_parser.add_argument("--backend", choices=lox.BACKENDS, default="tree")
+    options = arg_parser.parse_args()
+
+    threshold = rope.THRESHOLD
+    print("%10s %-10s %12s %12s %12s %12s" % ("statements", "case", "str s", "str us/op", "rope s", "rope us/op"))
+    for size in options.sizes:
+        for case, build in (("append", corpus.stringConcatenation), ("prepend", corpus.stringPrepending)):
+            source = build(size)
+            # An unreachable threshold makes concatOrAdd fall back to plain str concatenation
+            rope.THRESHOLD = float("inf")
+            plain = timeConcatenation(source, options.backend)
+            rope.THRESHOLD = threshold
+            roped = timeConcatenation(source, options.backend)
+            print("%10d %-10s %12.4f %12.2f %12.4f %12.2f" %
+                  (size, case, plain, plain / size * 1e6, roped, roped / size * 1e6))
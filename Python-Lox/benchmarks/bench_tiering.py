@@ -0,0 +1,47 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus
+import lox
+import sinks
+import tiering
+
+def timeRuns(source: str, backend: str, runs: int, threshold: int) -> tuple:
+    """
+    Returns (seconds for the first run, seconds for all runs) of the same parsed program on backend
+    Scan and parse are excluded, and closure mode compiles on the first run and reuses the closures after
+    """
+    runner = lox.Lox(backend, output=sinks.CaptureSink())
+    if backend == "tiered":
+        runner.interpreter.threshold = threshold
+    statements = runner.parse(source)
+    start = time.perf_counter()
+    runner._execute(statements)
+    first = time.perf_counter() - start
+    for _ in range(runs - 1):
+        runner._execute(statements)
+    return first, time.perf_counter() - start
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare startup and repeated-run cost of the tree, closure and tiered backends")
+    arg_parser.add_argument("--size", type=int, default=2000)
+    arg_parser.add_argument("--threshold", type=int, default=tiering.DEFAULT_THRESHOLD)
+    arg_parser.add_argument("--runs", type=int, nargs="+", default=[1, 4, 16, 64])
+    options = arg_parser.parse_args()
+
+    backends = ("tree", "closure", "tiered")
+    print("threshold %d" % options.threshold)
+    print("%-22s %5s %s" % ("program", "runs", " ".join("%18s" % name for name in backends)))
+    for name in ("arithmeticChains", "variableReassignment", "stringConcatenation"):
+        source = getattr(corpus, name)(options.size)
+        for runs in options.runs:
+            cells = []
+            for backend in backends:
+                first, total = timeRuns(source, backend, runs, options.threshold)
+                cells.append("%8.4f/%9.4f" % (first, total))
+            print("%-22s %5d %s" % (name, runs, " ".join("%18s" % cell for cell in cells)))
+    print("cells are first run / all runs, in seconds")
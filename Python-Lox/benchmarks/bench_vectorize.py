@@ -0,0 +1,60 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+
+import lox
+import lox_parser
+import scanner
+import vectorize
+
+EXPRESSIONS = {
+    "arithmetic": "(price * quantity - discount) / quantity",
+    "filter": "price * quantity > 100 == !returned",
+    "strings": "region + \"-\" + tier == \"eu-gold\"",
+}
+
+def makeColumns(rows: int, seed: int) -> dict:
+    generator = numpy.random.default_rng(seed)
+    return {
+        "price": generator.uniform(1, 50, rows),
+        "quantity": generator.integers(1, 10, rows).astype(float),
+        "discount": generator.uniform(0, 5, rows),
+        "returned": generator.random(rows) < 0.1,
+        "region": numpy.array(random.Random(seed).choices(["eu", "us", "apac"], k=rows), dtype=object),
+        "tier": numpy.array(random.Random(seed + 1).choices(["gold", "silver"], k=rows), dtype=object),
+    }
+
+def parseExpression(source: str):
+    runner = lox.Lox()
+    return lox_parser.Parser(runner, scanner.Scanner(runner, source).scanTokens()).parseExpression()
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare vectorized and row-at-a-time expression evaluation")
+    arg_parser.add_argument("--rows", type=int, default=1000000)
+    arg_parser.add_argument("--scalar-rows", type=int, default=100000, help="rows evaluated one at a time, scaled up to --rows")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    options = arg_parser.parse_args()
+
+    columns = makeColumns(options.rows, options.seed)
+    scalar_columns = {name: column[:options.scalar_rows] for name, column in columns.items()}
+    evaluator = vectorize.VectorEvaluator()
+
+    print("%-12s %12s %14s %10s" % ("expression", "vector s", "scalar s est", "speedup"))
+    for name, source in EXPRESSIONS.items():
+        expr = parseExpression(source)
+
+        start = time.perf_counter()
+        evaluator.evaluate(expr, columns)
+        vector = time.perf_counter() - start
+
+        start = time.perf_counter()
+        evaluator.evaluateRows(expr, scalar_columns, options.scalar_rows)
+        scalar = (time.perf_counter() - start) * options.rows / options.scalar_rows
+
+        print("%-12s %12.4f %14.4f %9.1fx" % (name, vector, scalar, scalar / vector))
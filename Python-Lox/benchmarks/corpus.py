@@ -0,0 +1,80 @@
+# Generated Lox programs for the benchmark harness
+# Every generator takes a size and returns source text, so the corpus scales without checked-in files
+
+def arithmeticChains(size: int) -> str:
+    """
+    size statements, each a long chain of mixed arithmetic on number literals
+    """
+    lines = []
+    for i in range(size):
+        terms = [str((i + j) % 9 + 1) for j in range(16)]
+        operators = ["+", "-", "*", "/"]
+        expression = terms[0]
+        for j, term in enumerate(terms[1:]):
+            expression += " " + operators[j % 4] + " " + term
+        lines.append(expression + ";")
+    return "\n".join(lines)
+
+def variableReassignment(size: int) -> str:
+    """
+    A handful of globals reassigned from each other size times
+    """
+    lines = ["var a = 1;", "var b = 2;", "var c = 3;", "var d = 4;"]
+    names = ["a", "b", "c", "d"]
+    for i in range(size):
+        target = names[i % 4]
+        lines.append(target + " = " + names[(i + 1) % 4] + " + " + names[(i + 2) % 4] + " - " + target + ";")
+    lines.append("print a + b + c + d;")
+    return "\n".join(lines)
+
+def stringConcatenation(size: int) -> str:
+    """
+    Builds one report string with size repeated s = s + piece; statements
+    """
+    lines = ["var s = \"\";", "var piece = \"line of report text\";"]
+    lines += ["s = s + piece;"] * size
+    lines.append("print s == \"\";")
+    return "\n".join(lines)
+
+def stringPrepending(size: int) -> str:
+    """
+    Builds one report string with size repeated s = piece + s; statements
+    """
+    lines = ["var s = \"\";", "var piece = \"line of report text\";"]
+    lines += ["s = piece + s;"] * size
+    lines.append("print s == \"\";")
+    return "\n".join(lines)
+
+def nestedGroupings(size: int, depth: int = 100) -> str:
+    """
+    size statements, each depth levels of parentheses around a small sum
+    depth is kept below what the recursive descent parser can handle within Python's recursion limit
+    """
+    line = "(" * depth + "1 + 2" + ")" * depth + ";"
+    return "\n".join([line] * size)
+
+def largeProgram(size: int) -> str:
+    """
+    size statements of the shapes a code generator emits: declarations, updates and prints
+    """
+    lines = []
+    for i in range(size):
+        match i % 4:
+            case 0:
+                lines.append("var v" + str(i % 1000) + " = " + str(i) + " * 2;")
+            case 1:
+                lines.append("v" + str((i - 1) % 1000) + " = v" + str((i - 1) % 1000) + " + 1;")
+            case 2:
+                lines.append("print v" + str((i - 2) % 1000) + " > " + str(i) + ";")
+            case 3:
+                lines.append("\"label\" + \"" + str(i) + "\";")
+    return "\n".join(lines)
+
+# name -> (generator, default size)
+PROGRAMS = {
+    "arithmetic_chains": (arithmeticChains, 20000),
+    "variable_reassignment": (variableReassignment, 100000),
+    "string_concatenation": (stringConcatenation, 10000),
+    "nested_groupings": (nestedGroupings, 500),
+    "large_program": (largeProgram, 100000),
+}
@@ -0,0 +1,150 @@
+# Benchmark harness for the Lox front end and backends
+# Run from Python-Lox with: python3 benchmarks/harness.py --output results.json
+# --scale 10 grows large_program and variable_reassignment to 10^6 statements
+# --compare results.json exits non-zero if any phase regressed past --threshold
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus
+import lox
+import lox_parser
+import optimizer
+import sinks
+
+PHASES = ("scan", "parse", "interpret")
+
+def runPhases(source: str, lexer: str, backend: str, parser: str = "pratt") -> dict:
+    """
+    Times Scanner.scanTokens, Parser.parse and execution separately on a fresh Lox instance
+    Execution includes resolution and any backend compile step, with output sent to os.devnull
+    """
+    with open(os.devnull, "w") as devnull:
+        return _runPhases(source, lexer, backend, parser, devnull)
+
+def _runPhases(source: str, lexer: str, backend: str, parser: str, devnull) -> dict:
+    runner = lox.Lox(backend, lexer=lexer, parser=parser, output=sinks.StreamSink(devnull))
+
+    start = time.perf_counter()
+    tokens = lox.SCANNERS[lexer](runner, source).scanTokens()
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    statements = lox_parser.PARSERS[parser](runner, tokens).parse()
+    parse_time = time.perf_counter() - start
+
+    if runner.had_error:
+        raise RuntimeError("benchmark program has syntax errors")
+    nodes = optimizer.countNodes(statements)
+
+    # Printed lines count toward execution, so the sink is checkpointed inside the timed region
+    start = time.perf_counter()
+    runner._execute(statements)
+    runner.output.checkpoint()
+    interpret_time = time.perf_counter() - start
+
+    return {
+        "tokens": len(tokens),
+        "nodes": nodes,
+        "statements": len(statements),
+        "scan": scan_time,
+        "parse": parse_time,
+        "interpret": interpret_time,
+    }
+
+def benchmark(name: str, scale: float, repeat: int, lexer: str, backend: str, parser: str = "pratt") -> dict:
+    """
+    Runs one corpus program repeat times and keeps the best time of each phase
+    """
+    generator, size = corpus.PROGRAMS[name]
+    source = generator(max(1, int(size * scale)))
+
+    best = None
+    for _ in range(repeat):
+        result = runPhases(source, lexer, backend, parser)
+        if best is None:
+            best = result
+        else:
+            for phase in PHASES:
+                best[phase] = min(best[phase], result[phase])
+
+    best["bytes"] = len(source)
+    best["tokens_per_sec"] = best["tokens"] / best["scan"]
+    best["nodes_per_sec"] = best["nodes"] / best["parse"]
+    best["statements_per_sec"] = best["statements"] / best["interpret"]
+    return best
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Returns a line for every phase that got slower than baseline by more than threshold
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        for phase in PHASES:
+            ratio = result[phase] / previous[phase]
+            if ratio > 1 + threshold:
+                regressions.append("%s %s: %.4fs -> %.4fs (%.0f%% slower)" % (name, phase, previous[phase], result[phase], (ratio - 1) * 100))
+    return regressions
+
+def report(results: dict) -> None:
+    print("%-22s %9s %9s %9s %12s %12s %12s" % ("program", "scan s", "parse s", "exec s", "tokens/s", "nodes/s", "stmts/s"))
+    for name, result in results.items():
+        print("%-22s %9.4f %9.4f %9.4f %12.0f %12.0f %12.0f" % (
+            name, result["scan"], result["parse"], result["interpret"],
+            result["tokens_per_sec"], result["nodes_per_sec"], result["statements_per_sec"]))
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Time the scan, parse and interpret phases over the benchmark corpus")
+    arg_parser.add_argument("programs", nargs="*", help="corpus programs to run, all by default: " + ", ".join(corpus.PROGRAMS))
+    arg_parser.add_argument("--scale", type=float, default=1.0, help="multiplies every program's default size")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--lexer", choices=lox.SCANNERS, default="char")
+    arg_parser.add_argument("--backend", choices=lox.BACKENDS, default="tree")
+    arg_parser.add_argument("--parser", choices=lox_parser.PARSERS, default="pratt")
+    arg_parser.add_argument("--output", help="write results as JSON to this file")
+    arg_parser.add_argument("--compare", help="JSON results from an earlier run to check for regressions")
+    arg_parser.add_argument("--threshold", type=float, default=0.10, help="slowdown fraction counted as a regression")
+    options = arg_parser.parse_args()
+
+    names = options.programs or list(corpus.PROGRAMS)
+    unknown = [name for name in names if name not in corpus.PROGRAMS]
+    if unknown:
+        arg_parser.error("unknown programs: " + ", ".join(unknown))
+    results = {}
+    for name in names:
+        results[name] = benchmark(name, options.scale, options.repeat, options.lexer, options.backend, options.parser)
+    report(results)
+
+    document = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": options.scale,
+            "repeat": options.repeat,
+            "lexer": options.lexer,
+            "backend": options.backend,
+            "parser": options.parser,
+        },
+        "results": results,
+    }
+    if options.output:
+        with open(options.output, "w") as file:
+            json.dump(document, file, indent=2)
+
+    if options.compare:
+        with open(options.compare, "r") as file:
+            regressions = compare(results, json.load(file), options.threshold)
+        for line in regressions:
+            print("REGRESSION " + line)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,148 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import lox
+import lox_parser
+
+class Diagnostic:
+    """
+    One error Lox.report would have written to stderr, kept as a record instead
+    line is None when the file could not be read at all
+    """
+    __slots__ = ("path", "line", "where", "message")
+
+    def __init__(self, path: str, line, where: str, message: str) -> None:
+        self.path = path
+        self.line = line
+        self.where = where
+        self.message = message
+
+    def __str__(self) -> str:
+        if self.line is None:
+            return self.path + ": " + self.message
+        return self.path + ":" + str(self.line) + ": Error" + self.where + ": " + self.message
+
+    def asDict(self) -> dict:
+        return {"path": self.path, "line": self.line, "where": self.where, "message": self.message}
+
+class FileResult:
+    """
+    Diagnostics and scan plus parse time for one checked file
+    """
+    __slots__ = ("path", "diagnostics", "seconds")
+
+    def __init__(self, path: str, diagnostics: list, seconds: float) -> None:
+        self.path = path
+        self.diagnostics = diagnostics
+        self.seconds = seconds
+
+    def asDict(self) -> dict:
+        return {"path": self.path, "seconds": self.seconds, "diagnostics": [diagnostic.asDict() for diagnostic in self.diagnostics]}
+
+class CheckingLox(lox.Lox):
+    """
+    Lox that records diagnostics for the current file instead of writing them to stderr
+    parse_error and scan_error are inherited, so the where text matches a normal run
+    """
+    def __init__(self, lexer: str = "char", parser: str = "pratt") -> None:
+        super().__init__(lexer=lexer, parser=parser)
+        self.path = None
+        self.diagnostics = []
+
+    def report(self, line, where, message):
+        self.had_error = True
+        self.diagnostics.append(Diagnostic(self.path, line, where, message))
+
+    def check(self, path: str) -> FileResult:
+        """
+        Scans and parses one file without resolving or executing it
+        """
+        self.path = path
+        self.diagnostics = []
+        self.had_error = False
+        start = time.perf_counter()
+        try:
+            with open(path, "r") as file:
+                source = file.read()
+        except (OSError, UnicodeDecodeError) as error:
+            self.diagnostics.append(Diagnostic(path, None, "", str(error)))
+        else:
+            tokens = lox.SCANNERS[self.lexer](self, source).scanTokens()
+            lox_parser.PARSERS[self.parser](self, tokens).parse()
+        return FileResult(path, self.diagnostics, time.perf_counter() - start)
+
+# Each pool worker builds one CheckingLox and reuses it for every file it is sent
+_worker = None
+
+def _initWorker(lexer: str, parser: str) -> None:
+    global _worker
+    _worker = CheckingLox(lexer, parser)
+
+def _checkInWorker(path: str) -> FileResult:
+    return _worker.check(path)
+
+def expandTargets(targets: list) -> list:
+    """
+    Turns files, directories and glob patterns into a sorted list of unique paths
+    Directories contribute every .lox file below them
+    """
+    paths = set()
+    for target in targets:
+        if os.path.isdir(target):
+            paths.update(glob.glob(os.path.join(glob.escape(target), "**", "*.lox"), recursive=True))
+        elif glob.has_magic(target):
+            paths.update(path for path in glob.glob(target, recursive=True) if os.path.isfile(path))
+        else:
+            paths.add(target)
+    return sorted(paths)
+
+def checkFiles(paths: list, jobs: int = None, lexer: str = "char", chunksize: int = None, parser: str = "pratt") -> list:
+    """
+    Checks paths across jobs worker processes and returns one FileResult per path, in the order given
+    Paths go to workers in chunks to amortize the round trips, by default about four chunks per worker
+    jobs=1 checks everything in this process
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(paths) <= 1:
+        checker = CheckingLox(lexer, parser)
+        return [checker.check(path) for path in paths]
+
+    if chunksize is None:
+        chunksize = max(1, len(paths) // (jobs * 4))
+    with multiprocessing.Pool(jobs, _initWorker, (lexer, parser)) as pool:
+        return list(pool.imap(_checkInWorker, paths, chunksize))
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Scan and parse many Lox files in parallel and report syntax errors")
+    arg_parser.add_argument("targets", nargs="+", help="files, directories or glob patterns")
+    arg_parser.add_argument("--jobs", "-j", type=int, help="worker processes, defaults to the CPU count")
+    arg_parser.add_argument("--chunksize", type=int, help="files sent to a worker at a time")
+    arg_parser.add_argument("--lexer", choices=lox.SCANNERS, default="char")
+    arg_parser.add_argument("--parser", choices=lox_parser.PARSERS, default="pratt")
+    arg_parser.add_argument("--json", action="store_true", help="print every file's diagnostics and timing as JSON")
+    arg_parser.add_argument("--timing", action="store_true", help="print each file's check time")
+    options = arg_parser.parse_args()
+
+    paths = expandTargets(options.targets)
+    start = time.perf_counter()
+    results = checkFiles(paths, options.jobs, options.lexer, options.chunksize, options.parser)
+    elapsed = time.perf_counter() - start
+
+    failed = [result for result in results if result.diagnostics]
+    if options.json:
+        json.dump([result.asDict() for result in results], sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        for result in results:
+            if options.timing:
+                print("%9.4fs %s" % (result.seconds, result.path))
+            for diagnostic in result.diagnostics:
+                print(diagnostic)
+
+    sys.stderr.write("%d files, %d with errors, %.2fs\n" % (len(results), len(failed), elapsed))
+    sys.exit(65 if failed else 0)
@@ -0,0 +1,185 @@
+import numbers
+
+import grammar
+import rope
+import scanner
+import statement
+from environment import LoxRuntimeError, UNDEFINED
+from gcpause import pausedGC
+from interpreter import stringify, concatOrAdd, isEqual, isTrue, STRING_TYPES
+
+Number = numbers.Number
+
+# Binary operators that only accept numbers, applied after both operands are converted to float
+NUMBER_OPERATORS = {
+    scanner.TokenType.MINUS: lambda left, right: left - right,
+    scanner.TokenType.STAR: lambda left, right: left * right,
+    scanner.TokenType.SLASH: lambda left, right: left / right,
+    scanner.TokenType.GREATER: lambda left, right: left > right,
+    scanner.TokenType.GREATER_EQUAL: lambda left, right: left >= right,
+    scanner.TokenType.LESS: lambda left, right: left < right,
+    scanner.TokenType.LESS_EQUAL: lambda left, right: left <= right,
+}
+
+def _numberOperands(operator: scanner.Token, function, left, right):
+    """
+    Builds a closure applying a float binary function with Lox number operand checks
+    """
+    def run(environment):
+        left_value = left(environment)
+        right_value = right(environment)
+        # Lox numbers are floats, so the exact type check covers almost every call before the ABC check
+        if type(left_value) is float and type(right_value) is float:
+            return function(left_value, right_value)
+        if isinstance(left_value, Number) and isinstance(right_value, Number):
+            return function(float(left_value), float(right_value))
+        raise LoxRuntimeError(operator, "Operands must both be numbers")
+    return run
+
+def _plus(operator: scanner.Token, left, right):
+    """
+    Builds a closure for + with the same float and string fast paths as interpreter.specialize
+    Other operand types go through concatOrAdd
+    """
+    def run(environment):
+        left_value = left(environment)
+        right_value = right(environment)
+        left_type = type(left_value)
+        right_type = type(right_value)
+        if left_type is float and right_type is float:
+            return left_value + right_value
+        if left_type in STRING_TYPES and right_type in STRING_TYPES:
+            return rope.concat(left_value, right_value)
+        return concatOrAdd(left_value, operator, right_value)
+    return run
+
+class ClosureCompiler:
+    """
+    One-time pass that turns statements and expressions into nested Python closures
+    Each expression becomes fn(environment) -> value, each statement fn(environment) -> None
+    Running the closures skips accept() double dispatch and the per-node operator match
+    Expects the tree to have been annotated by resolver.Resolver
+    """
+    def __init__(self, emit=None) -> None:
+        """
+        emit(text) receives the text of every Print, writing to stdout by default
+        """
+        self._emit = emit or print
+
+    def compile(self, stmts: list[statement.Stmt]) -> list:
+        """
+        Returns one closure per statement
+        """
+        with pausedGC():
+            return [stmt.accept(self) for stmt in stmts]
+
+    def visitExpression(self, stmt: statement.Expression):
+        expression = stmt.expression.accept(self)
+        def run(environment):
+            expression(environment)
+        return run
+
+    def visitPrint(self, stmt: statement.Print):
+        expression = stmt.expression.accept(self)
+        emit = self._emit
+        def run(environment):
+            emit(stringify(expression(environment)))
+        return run
+
+    def visitVariableStmt(self, stmt: statement.VariableStmt):
+        slot = stmt.slot
+        if stmt.initializer is None:
+            def run(environment):
+                environment.defineAt(slot, None)
+            return run
+
+        initializer = stmt.initializer.accept(self)
+        def run(environment):
+            environment.defineAt(slot, initializer(environment))
+        return run
+
+    def visitLiteral(self, expr: grammar.Literal):
+        value = expr.value
+        return lambda environment: value
+
+    def visitGrouping(self, expr: grammar.Grouping):
+        # Groupings only affect parsing, so the inner closure is reused as is
+        return expr.expression.accept(self)
+
+    def visitUnary(self, expr: grammar.Unary):
+        right = expr.right.accept(self)
+        operator = expr.operator
+
+        match operator.type:
+            case scanner.TokenType.MINUS:
+                def negate(environment):
+                    value = right(environment)
+                    if isinstance(value, Number):
+                        return -float(value)
+                    raise LoxRuntimeError(operator, "Operand must be a number")
+                return negate
+            case scanner.TokenType.BANG:
+                return lambda environment: not isTrue(right(environment))
+
+        return lambda environment: None
+
+    def visitBinary(self, expr: grammar.Binary):
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        operator = expr.operator
+
+        function = NUMBER_OPERATORS.get(operator.type)
+        if function is not None:
+            return _numberOperands(operator, function, left, right)
+
+        match operator.type:
+            case scanner.TokenType.PLUS:
+                if self._isNumberLiteral(expr.left) and self._isNumberLiteral(expr.right):
+                    total = float(expr.left.value) + float(expr.right.value)
+                    return lambda environment: total
+                return _plus(operator, left, right)
+            case scanner.TokenType.EQUAL_EQUAL:
+                return lambda environment: isEqual(left(environment), right(environment))
+            case scanner.TokenType.BANG_EQUAL:
+                return lambda environment: left(environment) != right(environment)
+
+        return lambda environment: None
+
+    def visitVariableExpr(self, expr: grammar.VariableExpr):
+        name = expr.name
+        if expr.slot is None:
+            return lambda environment: environment.get(name)
+
+        depth = expr.depth
+        slot = expr.slot
+        if depth == 0:
+            def load(environment):
+                slots = environment.slots
+                if slot < len(slots):
+                    value = slots[slot]
+                    if value is not UNDEFINED:
+                        return value
+                return environment.getAt(0, slot, name)
+            return load
+        return lambda environment: environment.getAt(depth, slot, name)
+
+    def visitAssign(self, expr: grammar.Assign):
+        value = expr.value.accept(self)
+        name = expr.name
+        if expr.slot is None:
+            def store(environment):
+                result = value(environment)
+                environment.assign(name, result)
+                return result
+            return store
+
+        depth = expr.depth
+        slot = expr.slot
+        def store(environment):
+            result = value(environment)
+            environment.assignAt(depth, slot, name, result)
+            return result
+        return store
+
+    def _isNumberLiteral(self, expr: grammar.Expression) -> bool:
+        return isinstance(expr, grammar.Literal) and isinstance(expr.value, Number) and not isinstance(expr.value, bool)
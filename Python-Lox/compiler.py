@@ -0,0 +1,154 @@
+from array import array
+from enum import IntEnum, auto
+
+import grammar
+import scanner
+import statement
+
+# Sum type for every instruction understood by vm.VM
+class OpCode(IntEnum):
+    CONSTANT = auto()
+    POP = auto()
+    DEFINE_GLOBAL = auto()
+    GET_GLOBAL = auto()
+    SET_GLOBAL = auto()
+    ADD = auto()
+    SUBTRACT = auto()
+    MULTIPLY = auto()
+    DIVIDE = auto()
+    GREATER = auto()
+    GREATER_EQUAL = auto()
+    LESS = auto()
+    LESS_EQUAL = auto()
+    EQUAL = auto()
+    NOT_EQUAL = auto()
+    NEGATE = auto()
+    NOT = auto()
+    PRINT = auto()
+    RETURN = auto()
+
+# Instructions followed by a single operand slot in Chunk.code
+OPERAND_OPS = frozenset((OpCode.CONSTANT, OpCode.DEFINE_GLOBAL, OpCode.GET_GLOBAL, OpCode.SET_GLOBAL))
+
+BINARY_OPS = {
+    scanner.TokenType.PLUS: OpCode.ADD,
+    scanner.TokenType.MINUS: OpCode.SUBTRACT,
+    scanner.TokenType.STAR: OpCode.MULTIPLY,
+    scanner.TokenType.SLASH: OpCode.DIVIDE,
+    scanner.TokenType.GREATER: OpCode.GREATER,
+    scanner.TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    scanner.TokenType.LESS: OpCode.LESS,
+    scanner.TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+    scanner.TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+    scanner.TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+}
+
+UNARY_OPS = {
+    scanner.TokenType.MINUS: OpCode.NEGATE,
+    scanner.TokenType.BANG: OpCode.NOT,
+}
+
+class Chunk:
+    """
+    Compiled program
+    code holds opcodes and their operands, constants holds literal values and global names
+    tokens maps the offset of any instruction that can fail to its source token
+    """
+    def __init__(self) -> None:
+        self.code = array('i')
+        self.constants = []
+        self.tokens = {}
+        self._constant_index = {}
+
+    def write(self, op: int, token: scanner.Token = None) -> None:
+        if token is not None:
+            self.tokens[len(self.code)] = token
+        self.code.append(op)
+
+    def addConstant(self, value) -> int:
+        """
+        Returns index of value in self.constants, appending it if not already present
+        Keys include the type so 1, 1.0 and True do not share a slot
+        Floats are keyed by repr as well so 0.0 and -0.0 stay distinct
+        """
+        key = (type(value), repr(value) if type(value) is float else value)
+        index = self._constant_index.get(key)
+        if index is None:
+            index = len(self.constants)
+            self.constants.append(value)
+            self._constant_index[key] = index
+        return index
+
+    def disassemble(self) -> str:
+        lines = []
+        offset = 0
+        while offset < len(self.code):
+            op = OpCode(self.code[offset])
+            if op in OPERAND_OPS:
+                operand = self.code[offset + 1]
+                lines.append("%04d %-16s %4d '%s'" % (offset, op.name, operand, self.constants[operand]))
+                offset += 2
+            else:
+                lines.append("%04d %s" % (offset, op.name))
+                offset += 1
+        return "\n".join(lines)
+
+class Compiler:
+    """
+    Lowers parsed statements into a Chunk for vm.VM
+    Follows the same visitor protocol as interpreter.Interpreter
+    """
+    def __init__(self) -> None:
+        self.chunk = None
+
+    def compile(self, stmts: list[statement.Stmt]) -> Chunk:
+        self.chunk = Chunk()
+        for stmt in stmts:
+            stmt.accept(self)
+        self.chunk.write(OpCode.RETURN)
+        return self.chunk
+
+    def _emitConstant(self, value) -> None:
+        self.chunk.write(OpCode.CONSTANT)
+        self.chunk.write(self.chunk.addConstant(value))
+
+    def _emitName(self, op: OpCode, name: scanner.Token) -> None:
+        self.chunk.write(op, name)
+        self.chunk.write(self.chunk.addConstant(name.lexeme))
+
+    def visitExpression(self, stmt: statement.Expression) -> None:
+        stmt.expression.accept(self)
+        self.chunk.write(OpCode.POP)
+
+    def visitPrint(self, stmt: statement.Print) -> None:
+        stmt.expression.accept(self)
+        self.chunk.write(OpCode.PRINT)
+
+    def visitVariableStmt(self, stmt: statement.VariableStmt) -> None:
+        if stmt.initializer is not None:
+            stmt.initializer.accept(self)
+        else:
+            self._emitConstant(None)
+        self._emitName(OpCode.DEFINE_GLOBAL, stmt.name)
+
+    def visitLiteral(self, expr: grammar.Literal) -> None:
+        self._emitConstant(expr.value)
+
+    def visitGrouping(self, expr: grammar.Grouping) -> None:
+        expr.expression.accept(self)
+
+    def visitUnary(self, expr: grammar.Unary) -> None:
+        expr.right.accept(self)
+        self.chunk.write(UNARY_OPS[expr.operator.type], expr.operator)
+
+    def visitBinary(self, expr: grammar.Binary) -> None:
+        expr.left.accept(self)
+        expr.right.accept(self)
+        self.chunk.write(BINARY_OPS[expr.operator.type], expr.operator)
+
+    def visitVariableExpr(self, expr: grammar.VariableExpr) -> None:
+        self._emitName(OpCode.GET_GLOBAL, expr.name)
+
+    def visitAssign(self, expr: grammar.Assign) -> None:
+        expr.value.accept(self)
+        self._emitName(OpCode.SET_GLOBAL, expr.name)
@@ -0,0 +1,186 @@
+import argparse
+import asyncio
+import os
+import signal
+
+import grammar
+import lox
+import sinks
+import statement
+from environment import LoxRuntimeError
+from interpreter import Interpreter
+
+# Statements and expression nodes a session runs before it lets other sessions have the loop
+DEFAULT_BUDGET = 1000
+
+class AsyncInterpreter(Interpreter):
+    """
+    Interpreter whose interpretAsync is a coroutine that yields to the event loop
+    every budget instructions, counting each executed statement and evaluated expression node
+    Statements run synchronously between yields, since the visitor cannot suspend mid-tree,
+    and Lox has no loops, so one statement is at most as long as its source
+    Many instances, each with its own Environment, share one loop fairly this way
+    """
+    def __init__(self, interpreter, budget: int = DEFAULT_BUDGET, output: sinks.Sink = None) -> None:
+        super().__init__(interpreter, "visitor", output)
+        self.budget = budget
+        self._remaining = budget
+
+    async def interpretAsync(self, stmts: list[statement.Stmt]):
+        try:
+            for stmt in stmts:
+                self._execute(stmt)
+                if self._remaining <= 0:
+                    self._remaining = self.budget
+                    await self.pause()
+        except LoxRuntimeError as error:
+            self._interpreter.runtime_error(error)
+
+    async def pause(self) -> None:
+        """
+        Gives up the loop once, after waiting for an async sink to accept buffered output
+        """
+        drain = getattr(self.output, "drain", None)
+        if drain is not None:
+            await drain()
+        await asyncio.sleep(0)
+
+    def _evaluate(self, expr: grammar.Expression):
+        self._remaining -= 1
+        return expr.accept(self)
+
+    def _execute(self, stmt: statement.Stmt):
+        self._remaining -= 1
+        stmt.accept(self)
+
+class WriterSink(sinks.BufferedSink):
+    """
+    Buffers printed lines for an asyncio.StreamWriter
+    Writes never block, and drain() waits on the writer's flow control at each yield point,
+    so a slow client holds back only its own session
+    """
+    def __init__(self, writer: asyncio.StreamWriter, policy: str = sinks.SIZE,
+                 buffer_size: int = sinks.DEFAULT_BUFFER_SIZE, encoding: str = "utf-8") -> None:
+        super().__init__(policy, buffer_size)
+        self.writer = writer
+        self.encoding = encoding
+
+    def _write(self, text: str) -> None:
+        if not self.writer.is_closing():
+            self.writer.write(text.encode(self.encoding, "replace"))
+
+    async def drain(self) -> None:
+        self.flush()
+        if not self.writer.is_closing():
+            await self.writer.drain()
+
+class Session(lox.Lox):
+    """
+    One Lox session on a shared event loop, running source chunks with runAsync
+    Globals persist across chunks, and errors are reported and cleared like in Lox.runPrompt
+    Printed lines go to output, a sinks.CaptureSink by default, and diagnostics to errors,
+    which defaults to output
+    """
+    def __init__(self, output: sinks.Sink = None, errors: sinks.Sink = None, budget: int = DEFAULT_BUDGET,
+                 optimize: bool = False, lexer: str = "char", parser: str = "pratt") -> None:
+        output = output if output is not None else sinks.CaptureSink()
+        self._budget = budget
+        super().__init__("tree", optimize, lexer, parser=parser, output=output)
+        self.errors = errors if errors is not None else output
+
+    def _createInterpreter(self, limits) -> AsyncInterpreter:
+        return AsyncInterpreter(self, self._budget, self.output)
+
+    async def runAsync(self, source: str) -> bool:
+        """
+        Scans, parses and runs source in this session
+        Returns False if it had syntax or runtime errors
+        Any other exception, such as a bug in a backend, is reported through internal_error
+        and the session keeps its globals, as in Lox.runPrompt
+        """
+        try:
+            statements = self._scanAndParse(source)
+            if not self.had_error:
+                if self.optimizer is not None:
+                    statements = self.optimizer.run(statements, whole_program=False)
+                self.resolver.resolve(statements)
+                await self.interpreter.interpretAsync(statements)
+        except ConnectionError:
+            # The client is gone, which handleConnection deals with
+            raise
+        except Exception as error:
+            self.internal_error(error)
+        finally:
+            self.output.checkpoint()
+        await self.interpreter.pause()
+        succeeded = not self.had_error and not self.had_runtime_error
+        self.had_error = False
+        self.had_runtime_error = False
+        return succeeded
+
+    def report(self, line, where, message):
+        self.had_error = True
+        self.output.flush()
+        self.errors.writeLine("[line " + str(line) + "] Error" + where + ": " + message)
+
+    def runtime_error(self, error):
+        self.output.flush()
+        self.errors.writeLine("[line " + str(error._token.line) + "] " + error._message)
+        self.had_runtime_error = True
+
+    def internal_error(self, error: Exception):
+        self.output.flush()
+        self.errors.writeLine("Internal error: " + type(error).__name__ + ": " + str(error))
+        self.had_runtime_error = True
+
+async def handleConnection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                           budget: int = DEFAULT_BUDGET, optimize: bool = False) -> None:
+    """
+    Runs each line a client sends as the next chunk of its own Session, writing output back as it is printed
+    Errors in a chunk are reported to the client by the Session, and the connection stays open
+    An exception outside a chunk, such as a line over the reader's limit, is reported and closes only this connection
+    """
+    session = Session(WriterSink(writer), budget=budget, optimize=optimize)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            await session.runAsync(line.decode("utf-8", "replace"))
+    except ConnectionError:
+        pass
+    except Exception as error:
+        session.internal_error(error)
+    finally:
+        session.output.flush()
+        writer.close()
+
+async def serve(path: str, budget: int = DEFAULT_BUDGET, optimize: bool = False) -> None:
+    """
+    Accepts sessions on a Unix socket at path, all served by this process's one event loop
+    Returns after SIGTERM, removing the socket file
+    """
+    if os.path.exists(path):
+        os.unlink(path)
+    loop = asyncio.get_running_loop()
+    stopped = loop.create_future()
+    loop.add_signal_handler(signal.SIGTERM, stopped.set_result, None)
+    server = await asyncio.start_unix_server(
+        lambda reader, writer: handleConnection(reader, writer, budget, optimize), path)
+    try:
+        async with server:
+            await stopped
+    finally:
+        os.unlink(path)
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Serve many interactive Lox sessions from one event loop")
+    arg_parser.add_argument("socket", help="Unix socket path to listen on")
+    arg_parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET, help="instructions a session runs before yielding")
+    arg_parser.add_argument("--optimize", action="store_true")
+    options = arg_parser.parse_args()
+
+    try:
+        asyncio.run(serve(options.socket, options.budget, options.optimize))
+    except KeyboardInterrupt:
+        pass
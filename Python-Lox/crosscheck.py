@@ -0,0 +1,271 @@
+import argparse
+import contextlib
+import glob
+import io
+import os
+import random
+import sys
+import unittest
+
+import grammar
+import interpreter
+import lox
+import lox_parser
+import node_table
+import scanner
+import sinks
+import statement
+import vectorize
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+def runCaptured(source: str, backend: str, optimize: bool = False) -> tuple:
+    """
+    Runs source on a fresh Lox instance with the given backend and optimizer setting
+    Returns (stdout, stderr, exit code) so backends can be compared
+    """
+    out = io.StringIO()
+    err = io.StringIO()
+    code = 0
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        runner = lox.Lox(backend, optimize)
+        try:
+            # Optimized as a whole program, the way runFile runs a script
+            try:
+                runner._execute(runner.parse(source, whole_program=True))
+            finally:
+                runner.output.checkpoint()
+        except SystemExit as exit:
+            code = exit.code
+    return out.getvalue(), err.getvalue(), code
+
+def crosscheck(paths: list, backends: tuple, optimize: bool = False) -> int:
+    """
+    Runs every file in paths through each backend
+    With optimize, every backend also runs the optimized program
+    Reports any result that differs from the first backend without optimization
+    Returns the number of mismatches
+    """
+    failures = 0
+    for path in paths:
+        with open(path, 'r') as file:
+            source = file.read()
+
+        expected = runCaptured(source, backends[0])
+        variants = [(backend, False) for backend in backends[1:]]
+        if optimize:
+            variants += [(backend, True) for backend in backends]
+        for backend, optimized in variants:
+            actual = runCaptured(source, backend, optimized)
+            if optimized:
+                backend += "+optimize"
+            if actual != expected:
+                failures += 1
+                print("MISMATCH " + path + " (" + backends[0] + " vs " + backend + ")")
+                print("  " + backends[0] + ": " + repr(expected))
+                print("  " + backend + ": " + repr(actual))
+
+    print(str(len(paths)) + " files, " + str(failures) + " mismatches")
+    return failures
+
+class DiagnosticRecorder:
+    """
+    Stands in for Lox so scanners report diagnostics into a list
+    """
+    def __init__(self) -> None:
+        self.diagnostics = []
+
+    def scan_error(self, line, msg):
+        self.diagnostics.append((line, msg))
+
+def scanTokens(scanner_type, source: str) -> tuple:
+    """
+    Returns the token stream as plain tuples plus the diagnostics scanner_type reported
+    """
+    recorder = DiagnosticRecorder()
+    try:
+        tokens = scanner_type(recorder, source).scanTokens()
+    except Exception as error:
+        return ("crashed", type(error).__name__), recorder.diagnostics
+    return [(token.type, token.lexeme, token.literal, token.line) for token in tokens], recorder.diagnostics
+
+# Fragments random sources are built from, chosen to hit every scanner branch
+FUZZ_FRAGMENTS = ["var", "print", "x1", "and", "nil", "12", "3.5", "7.", ".5", "\"str\"", "\"multi\nline\"",
+                  "\"open", "//c\n", "/", "!", "!=", "=", "==", "<", "<=", ">", ">=", "(", ")", "{", "}",
+                  ",", ".", "-", "+", ";", "*", " ", "\t", "\r", "\n", "@", "_", "#", "é", "€", "٣", "\"ü\""]
+
+def fuzzSources(count: int, seed: int) -> list:
+    generator = random.Random(seed)
+    return ["".join(generator.choice(FUZZ_FRAGMENTS) for _ in range(generator.randint(1, 40))) for _ in range(count)]
+
+def crosscheckScanners(sources: list, names: list) -> int:
+    """
+    Compares the token stream and diagnostics of every scanner in lox.SCANNERS
+    Sources where the reference scanner crashes are skipped
+    Returns the number of mismatches
+    """
+    reference_name, *other_names = lox.SCANNERS
+    failures = 0
+    checked = 0
+    for name, source in zip(names, sources):
+        expected = scanTokens(lox.SCANNERS[reference_name], source)
+        if expected[0][0] == "crashed":
+            continue
+        checked += 1
+        for other in other_names:
+            actual = scanTokens(lox.SCANNERS[other], source)
+            if actual != expected:
+                failures += 1
+                print("SCANNER MISMATCH " + name + " (" + reference_name + " vs " + other + ")")
+                print("  source: " + repr(source))
+
+    print(str(checked) + " sources scanned, " + str(failures) + " scanner mismatches")
+    return failures
+
+# Runtime caches that node_table.NodeTable deliberately does not store
+RUNTIME_FIELDS = ("handler", "deopts", "hits", "compiled")
+
+def nodeFields(node) -> tuple:
+    """
+    Returns everything about a node, token or value that survives a NodeTable round trip, as nested tuples
+    """
+    if isinstance(node, scanner.Token):
+        return (node.type, node.lexeme, node.literal, node.line)
+    if isinstance(node, (grammar.Expression, statement.Stmt)):
+        return (type(node).__name__,) + tuple(nodeFields(getattr(node, name))
+                                              for name in type(node).__slots__ if name not in RUNTIME_FIELDS)
+    # Floats compare by hex so that -0.0 and 0.0 differ
+    return (type(node), node.hex() if isinstance(node, float) else node)
+
+def crosscheckTables(sources: list, names: list, optimize: bool = False) -> int:
+    """
+    Encodes every resolved program into a node_table.NodeTable, through shared memory and back,
+    and compares the rebuilt tree with the original
+    Sources with syntax errors are skipped
+    Returns the number of mismatches
+    """
+    failures = 0
+    checked = 0
+    for name, source in zip(names, sources):
+        runner = lox.Lox(optimize=optimize, output=sinks.CaptureSink())
+        with contextlib.redirect_stderr(io.StringIO()):
+            statements = runner._scanAndParse(source)
+        if runner.had_error:
+            continue
+        if runner.optimizer is not None:
+            statements = runner.optimizer.run(statements)
+        runner.resolver.resolve(statements)
+        checked += 1
+
+        shared = node_table.encode(statements).toSharedMemory()
+        try:
+            table = node_table.attach(shared.name)
+            rebuilt = table.toTree()
+            table.close()
+        finally:
+            shared.close()
+            shared.unlink()
+        if [nodeFields(stmt) for stmt in rebuilt] != [nodeFields(stmt) for stmt in statements]:
+            failures += 1
+            print("TABLE MISMATCH " + name)
+
+    print(str(checked) + " programs encoded, " + str(failures) + " table mismatches")
+    return failures
+
+# Columns for the vectorize comparison, as plain lists so that each can also be passed as a typed ndarray
+# Mixed lists must fall back to row evaluation rather than being coerced to one dtype
+VECTOR_COLUMNS = {
+    "n": [1.5, 0.0, -2.0, 3.0, 0.0, 7.25],
+    "i": [1, 2, 0, -4, 5, 6],
+    "b": [True, False, True, True, False, False],
+    "s": ["a", "", "bc", "a", "x", "yz"],
+    "z": [None] * 6,
+    "m": [1, "x", True, None, 2.5, "1"],
+    "mn": [1, 2.5, True, 0, -1, False],
+}
+TYPED_COLUMNS = ("n", "i", "b", "s")
+VECTOR_OPERATORS = ["+", "-", "*", "/", ">", ">=", "<", "<=", "==", "!="]
+VECTOR_LEAVES = ["n", "i", "b", "s", "z", "m", "mn", "undefined", "0", "2", "2.5", "\"a\"", "true", "false", "nil"]
+
+def randomExpression(generator: random.Random, depth: int) -> str:
+    if depth == 0 or generator.random() < 0.3:
+        return generator.choice(VECTOR_LEAVES)
+    choice = generator.random()
+    if choice < 0.15:
+        return generator.choice(["-", "!"]) + randomExpression(generator, depth - 1)
+    if choice < 0.25:
+        return "(" + randomExpression(generator, depth - 1) + ")"
+    return (randomExpression(generator, depth - 1) + " " + generator.choice(VECTOR_OPERATORS) + " " +
+            randomExpression(generator, depth - 1))
+
+def rowStrings(result: vectorize.VectorResult) -> list:
+    """
+    Returns each row of a result as Lox would print it, or None for invalid rows
+    """
+    values = result.values.tolist() if vectorize.numpy is not None else result.values
+    return [interpreter.stringify(value) if valid else None for value, valid in zip(values, result.valid)]
+
+def crosscheckVectorize(count: int, seed: int) -> int:
+    """
+    Compares VectorEvaluator.evaluate with the row-at-a-time evaluateRows on random expressions,
+    once with list columns and once with the typed columns as ndarrays
+    Returns the number of mismatches
+    """
+    generator = random.Random(seed)
+    evaluator = vectorize.VectorEvaluator()
+    column_sets = [VECTOR_COLUMNS]
+    if vectorize.numpy is not None:
+        typed = dict(VECTOR_COLUMNS)
+        for name in TYPED_COLUMNS:
+            typed[name] = vectorize.numpy.array(VECTOR_COLUMNS[name])
+        column_sets.append(typed)
+    rows = len(VECTOR_COLUMNS["n"])
+    runner = lox.Lox()
+    failures = 0
+    for _ in range(count):
+        source = randomExpression(generator, 4)
+        expr = lox_parser.Parser(runner, scanner.Scanner(runner, source).scanTokens()).parseExpression()
+        for columns in column_sets:
+            expected = rowStrings(evaluator.evaluateRows(expr, columns, rows))
+            actual = rowStrings(evaluator.evaluate(expr, columns))
+            if actual != expected:
+                failures += 1
+                print("VECTOR MISMATCH " + source)
+                print("  rows:   " + repr(expected))
+                print("  vector: " + repr(actual))
+
+    print(str(count) + " expressions evaluated, " + str(failures) + " vector mismatches")
+    return failures
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Check that every backend gives the same output on the corpus")
+    arg_parser.add_argument("paths", nargs="*")
+    arg_parser.add_argument("--backends", nargs="+", choices=lox.BACKENDS, default=list(lox.BACKENDS))
+    arg_parser.add_argument("--optimize", action="store_true", help="also compare the optimized program on every backend")
+    arg_parser.add_argument("--scanners", action="store_true", help="compare scanner token streams instead of program output")
+    arg_parser.add_argument("--tables", action="store_true", help="round-trip programs through node tables instead of running them")
+    arg_parser.add_argument("--fuzz", type=int, default=2000, help="random sources added to the scanner and table comparisons")
+    arg_parser.add_argument("--vectorize", action="store_true", help="compare vectorized and row-at-a-time evaluation of random expressions")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--api", action="store_true", help="run the API regression tests in test_api.py instead")
+    options = arg_parser.parse_args()
+
+    if options.api:
+        result = unittest.main(module="test_api", argv=[sys.argv[0]], exit=False).result
+        sys.exit(0 if result.wasSuccessful() else 1)
+
+    if options.vectorize:
+        sys.exit(1 if crosscheckVectorize(options.fuzz, options.seed) else 0)
+
+    paths = options.paths or sorted(glob.glob(os.path.join(CORPUS_DIR, "*.lox")))
+    if options.scanners or options.tables:
+        sources = []
+        for path in paths:
+            with open(path, 'r') as file:
+                sources.append(file.read())
+        fuzzed = fuzzSources(options.fuzz, options.seed)
+        names = paths + ["fuzz#" + str(index) for index in range(len(fuzzed))]
+        if options.tables:
+            sys.exit(1 if crosscheckTables(sources + fuzzed, names, options.optimize) else 0)
+        sys.exit(1 if crosscheckScanners(sources + fuzzed, names) else 0)
+    sys.exit(1 if crosscheck(paths, tuple(options.backends), options.optimize) else 0)
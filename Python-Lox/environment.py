@@ -1,12 +1,27 @@
 from scanner import *
 
+class LoxRuntimeError(Exception):
+    """
+    Raised to denote runtime errors
+    """
+    def __init__(self, token: Token, message: str):
+        self._message = message
+        self._token = token
+
+# Marks a slot that has been reserved by the resolver but not yet defined
+UNDEFINED = object()
+
 class Environment:
-    def __init__(self) -> None:
+    __slots__ = ("values", "slots", "enclosing")
+
+    def __init__(self, enclosing: "Environment" = None, size: int = 0) -> None:
         """
-        Initialize an empty dictionary for variable bindings
+        Initialize an empty dictionary for name-keyed bindings
+        and a fixed array of size slots for bindings resolved by resolver.Resolver
         """
         self.values = {}
-        self.enclosing = None
+        self.slots = [UNDEFINED] * size
+        self.enclosing = enclosing
 
     def define(self, name: str, value) -> None:
         """
@@ -17,21 +32,67 @@ class Environment:
 
     def get(self, name: Token):
         """
-        Checks self.values for a given identifier
+        Checks self.values for a given identifier, then each enclosing environment
         Returns bound value if found
-        Raises RuntimeError otherwise
+        Raises LoxRuntimeError otherwise
         """
         if name.lexeme in self.values:
-            return self.values.get(name.lexeme)
+            return self.values[name.lexeme]
 
-        if self.enclosing is None:
-            return 
+        if self.enclosing is not None:
+            return self.enclosing.get(name)
 
-        raise RuntimeError(name, "Undefined variable '" + name.lexeme + "'.")
+        raise LoxRuntimeError(name, "Undefined variable '" + name.lexeme + "'.")
 
     def assign(self, name: Token, value: object) -> None:
         if name.lexeme in self.values:
             self.values[name.lexeme] = value
             return
 
-        raise RuntimeError(name, "Undefined variable '" + name.lexeme + "'.")
\ No newline at end of file
+        if self.enclosing is not None:
+            self.enclosing.assign(name, value)
+            return
+
+        raise LoxRuntimeError(name, "Undefined variable '" + name.lexeme + "'.")
+
+    def ancestor(self, depth: int) -> "Environment":
+        """
+        Returns the environment depth hops up the enclosing chain
+        """
+        environment = self
+        for _ in range(depth):
+            environment = environment.enclosing
+        return environment
+
+    def defineAt(self, slot: int, value) -> None:
+        """
+        Binds value to a resolved slot in this environment
+        Grows the slot array when the resolver has added globals since it was created
+        """
+        slots = self.slots
+        if slot >= len(slots):
+            slots.extend([UNDEFINED] * (slot + 1 - len(slots)))
+        slots[slot] = value
+
+    def getAt(self, depth: int, slot: int, name: Token):
+        """
+        Returns the value in a resolved slot without any string lookups
+        name is only used for the error message if the slot was never defined
+        """
+        environment = self if depth == 0 else self.ancestor(depth)
+        slots = environment.slots
+        if slot < len(slots):
+            value = slots[slot]
+            if value is not UNDEFINED:
+                return value
+
+        raise LoxRuntimeError(name, "Undefined variable '" + name.lexeme + "'.")
+
+    def assignAt(self, depth: int, slot: int, name: Token, value: object) -> None:
+        environment = self if depth == 0 else self.ancestor(depth)
+        slots = environment.slots
+        if slot < len(slots) and slots[slot] is not UNDEFINED:
+            slots[slot] = value
+            return
+
+        raise LoxRuntimeError(name, "Undefined variable '" + name.lexeme + "'.")
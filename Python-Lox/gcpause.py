@@ -0,0 +1,17 @@
+import contextlib
+import gc
+
+@contextlib.contextmanager
+def pausedGC():
+    """
+    Disables the cyclic garbage collector for the block, restoring its previous state after
+    Building or pickling a whole tree allocates an object per node without creating reference cycles,
+    and left running the collector would rescan the growing tree many times for nothing to free
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
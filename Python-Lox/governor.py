@@ -0,0 +1,161 @@
+import time
+
+import grammar
+import rope
+import scanner
+import statement
+from environment import LoxRuntimeError
+from interpreter import Interpreter
+
+# Instructions between checks of the clock, so the deadline costs one comparison per node
+CHECK_INTERVAL = 1024
+
+# Approximate sizes in bytes used for memory accounting
+ENTRY_BYTES = 72
+STRING_BYTES = 49
+NUMBER_BYTES = 24
+OBJECT_BYTES = 16
+
+# Names of the limits, as reported by LimitExceeded.limit
+INSTRUCTIONS = "instructions"
+TIME = "time"
+MEMORY = "memory"
+
+class Limits:
+    """
+    Caps for one run of GovernedInterpreter, None leaving that resource unlimited
+    max_instructions counts executed statements and evaluated expression nodes
+    timeout is wall-clock seconds from the start of the run
+    max_bytes caps the approximate size of every value bound to a variable, plus the bindings themselves
+    """
+    __slots__ = ("max_instructions", "timeout", "max_bytes")
+
+    def __init__(self, max_instructions: int = None, timeout: float = None, max_bytes: int = None) -> None:
+        self.max_instructions = max_instructions
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+
+class LimitExceeded(LoxRuntimeError):
+    """
+    Raised when a run goes past one of its Limits
+    limit is INSTRUCTIONS, TIME or MEMORY
+    """
+    def __init__(self, token: scanner.Token, limit: str, message: str):
+        super().__init__(token, message)
+        self.limit = limit
+
+def valueBytes(value) -> int:
+    """
+    Approximate bytes held by a Lox value, counting a Rope by its length rather than its pieces
+    """
+    if type(value) is str or type(value) is rope.Rope:
+        return STRING_BYTES + len(value)
+    if type(value) is float:
+        return NUMBER_BYTES
+    return OBJECT_BYTES
+
+class GovernedInterpreter(Interpreter):
+    """
+    Interpreter that enforces Limits in visitor mode
+    Instructions are counted down in _evaluate and _execute, and only when a countdown of
+    up to CHECK_INTERVAL runs out are the instruction total and the deadline looked at
+    Memory is accounted when a variable is defined or assigned, so the check sits where values
+    become live rather than on every node
+    The instruction count and deadline restart with each interpret() call,
+    while memory follows the environment across calls
+    """
+    def __init__(self, interpreter, limits: Limits, output=None) -> None:
+        super().__init__(interpreter, "visitor", output)
+        self.limits = limits
+        self.bytes = 0
+        self._sizes = {}
+        self._used = 0
+        self._chunk = 0
+        self._remaining = 0
+        self._deadline = None
+
+    @property
+    def instructions(self) -> int:
+        """
+        Instructions run so far in the current or last run
+        """
+        return self._used + self._chunk - self._remaining
+
+    def interpret(self, stmts: list[statement.Stmt], mode: str = None):
+        if mode not in (None, "visitor"):
+            raise ValueError("limits are only enforced in visitor mode, not '" + mode + "'")
+        timeout = self.limits.timeout
+        self._deadline = None if timeout is None else time.monotonic() + timeout
+        self._used = 0
+        self._nextChunk()
+        try:
+            for stmt in stmts:
+                try:
+                    self._execute(stmt)
+                except LimitExceeded as error:
+                    # Limits are hit between tokens, so the error gets a bare token for the statement's line
+                    error._token = scanner.Token(scanner.TokenType.EOF, "", None, stmt.line)
+                    raise
+        except LoxRuntimeError as error:
+            self._interpreter.runtime_error(error)
+
+    def _nextChunk(self) -> None:
+        """
+        Starts the next countdown, ending exactly on the instruction past max_instructions
+        """
+        chunk = CHECK_INTERVAL
+        if self.limits.max_instructions is not None:
+            chunk = min(chunk, self.limits.max_instructions + 1 - self._used)
+        self._chunk = self._remaining = chunk
+
+    def _check(self) -> None:
+        self._used += self._chunk
+        limits = self.limits
+        if limits.max_instructions is not None and self._used > limits.max_instructions:
+            self._exceeded(INSTRUCTIONS, "Instruction limit of " + str(limits.max_instructions) + " exceeded")
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            self._exceeded(TIME, "Time limit of " + str(limits.timeout) + "s exceeded")
+        self._nextChunk()
+
+    def _exceeded(self, limit: str, message: str):
+        raise LimitExceeded(None, limit, message)
+
+    def _account(self, key, value) -> None:
+        size = ENTRY_BYTES + valueBytes(value)
+        self.bytes += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+        max_bytes = self.limits.max_bytes
+        if max_bytes is not None and self.bytes > max_bytes:
+            self._exceeded(MEMORY, "Memory limit of " + str(max_bytes) + " bytes exceeded")
+
+    def _evaluate(self, expr: grammar.Expression):
+        self._remaining -= 1
+        if self._remaining <= 0:
+            self._check()
+        return expr.accept(self)
+
+    def _execute(self, stmt: statement.Stmt):
+        self._remaining -= 1
+        if self._remaining <= 0:
+            self._check()
+        stmt.accept(self)
+
+    # Interpreter's store visits with the binding accounted, inlined to save a call per store
+
+    def visitVariableStmt(self, stmt: statement.VariableStmt) -> None:
+        value = None
+        if stmt.initializer is not None:
+            value = self._evaluate(stmt.initializer)
+
+        self.environment.defineAt(stmt.slot, value)
+        self._account(stmt.slot, value)
+
+    def visitAssign(self, expr: grammar.Assign) -> object:
+        value = self._evaluate(expr.value)
+        if expr.slot is None:
+            self.environment.assign(expr.name, value)
+            self._account(expr.name.lexeme, value)
+        else:
+            self.environment.assignAt(expr.depth, expr.slot, expr.name, value)
+            self._account(expr.slot, value)
+        return value
@@ -1,58 +1,92 @@
 import scanner
 
 class Expression:
-	pass
+	__slots__ = ()
 
 class Chain(Expression):
-	def __init__(self, left, Expression, right):
+	__slots__ = ("left", "right", "hits", "compiled")
+
+	def __init__(self, left, right):
 		self.left = left
-		self.Expression, right = Expression, right
+		self.right = right
+		self.hits = 0
+		self.compiled = None
 
 	def accept(self, visitor):
 		return visitor.visitChain(self)
 
 class Unary(Expression):
+	__slots__ = ("operator", "right", "hits", "compiled")
+
 	def __init__(self, operator, right):
 		self.operator = operator
 		self.right = right
+		self.hits = 0
+		self.compiled = None
 
 	def accept(self, visitor):
 		return visitor.visitUnary(self)
 
 class Binary(Expression):
+	__slots__ = ("left", "operator", "right", "handler", "deopts", "hits", "compiled")
+
 	def __init__(self, left, operator, right):
 		self.left = left
 		self.operator = operator
 		self.right = right
+		self.handler = None
+		self.deopts = 0
+		self.hits = 0
+		self.compiled = None
 
 	def accept(self, visitor):
 		return visitor.visitBinary(self)
 
 class Grouping(Expression):
+	__slots__ = ("expression", "hits", "compiled")
+
 	def __init__(self, expression):
 		self.expression = expression
+		self.hits = 0
+		self.compiled = None
 
 	def accept(self, visitor):
 		return visitor.visitGrouping(self)
 
 class Literal(Expression):
+	__slots__ = ("value", "hits", "compiled")
+
 	def __init__(self, value):
 		self.value = value
+		self.hits = 0
+		self.compiled = None
 
 	def accept(self, visitor):
 		return visitor.visitLiteral(self)
 
 class VariableExpr(Expression):
+	__slots__ = ("name", "depth", "slot", "hits", "compiled")
+
 	def __init__(self, name):
 		self.name = name
+		self.depth = None
+		self.slot = None
+		self.hits = 0
+		self.compiled = None
 
 	def accept(self, visitor):
 		return visitor.visitVariableExpr(self)
 
 class Assign(Expression):
+	__slots__ = ("name", "value", "depth", "slot", "hits", "compiled")
+
 	def __init__(self, name, value):
 		self.name = name
 		self.value = value
+		self.depth = None
+		self.slot = None
+		self.hits = 0
+		self.compiled = None
 
 	def accept(self, visitor):
 		return visitor.visitAssign(self)
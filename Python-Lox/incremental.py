@@ -0,0 +1,68 @@
+import copy
+
+import lox_parser
+import scanner
+
+class Document:
+    """
+    Source buffer that keeps its tokens and parsed statements between edits, for editor integrations
+    edit() re-lexes only around the change with Scanner.rescan and reuses unchanged top-level
+    statements with Parser.reparse
+    While the buffer has errors every edit falls back to a full scan and parse,
+    since diagnostics from the unchanged regions are not kept
+    """
+    def __init__(self, interpreter, source: str = "") -> None:
+        self._interpreter = interpreter
+        self.source = source
+        self._parseAll()
+
+    def _parseAll(self) -> None:
+        self._interpreter.had_error = False
+        scan = scanner.Scanner(self._interpreter, self.source)
+        self.tokens = scan.scanTokens()
+        self.offsets = scan.offsets
+        parser = lox_parser.PARSERS[self._interpreter.parser](self._interpreter, self.tokens)
+        self.statements = parser.parse()
+        self.starts = parser.starts
+        self.had_error = self._interpreter.had_error
+        self._optimized = None
+
+    def edit(self, offset: int, removed: int, inserted: str) -> list:
+        """
+        Replaces removed characters at offset with inserted
+        Returns the updated list of top-level statements
+        """
+        self.source = self.source[:offset] + inserted + self.source[offset + removed:]
+        if self.had_error:
+            self._parseAll()
+            return self.statements
+
+        self._interpreter.had_error = False
+        scan = scanner.Scanner(self._interpreter, self.source)
+        first, old_stop, new_stop = scan.rescan(self.tokens, self.offsets, offset, removed, len(inserted))
+        self.tokens = scan.tokens
+        self.offsets = scan.offsets
+        parser = lox_parser.PARSERS[self._interpreter.parser](self._interpreter, self.tokens)
+        self.statements = parser.reparse(self.statements, self.starts, first, old_stop, new_stop)
+        self.starts = parser.starts
+        self.had_error = self._interpreter.had_error
+        self._optimized = None
+        return self.statements
+
+    def run(self, backend: str = None) -> None:
+        """
+        Executes the whole buffer, or does nothing while it has syntax errors
+        The optimizer rewrites subtrees in place, so it runs on a deep copy that is kept until the next edit,
+        leaving self.statements unoptimized for reparse to reuse
+        """
+        if self.had_error:
+            return
+        statements = self.statements
+        if self._interpreter.optimizer is not None:
+            if self._optimized is None:
+                self._optimized = self._interpreter.optimizer.run(copy.deepcopy(statements), whole_program=False)
+            statements = self._optimized
+        try:
+            self._interpreter._execute(statements, backend)
+        finally:
+            self._interpreter.output.checkpoint()
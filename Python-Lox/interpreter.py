@@ -2,15 +2,9 @@ import grammar
 import scanner
 import numbers
 import statement
-from environment import Environment
-
-class LoxRuntimeError(Exception):
-    """
-    Raised to denote runtime errors
-    """
-    def __init__(self, token: scanner.Token, message: str):
-        self._message = message
-        self._token = token
+import rope
+import sinks
+from environment import Environment, LoxRuntimeError
 
 def stringify(obj: object) -> str:
     if obj is None:
@@ -28,12 +22,12 @@ def concatOrAdd(left, operator, right):
     """
     Checks the types of the left and right operands
     Adds them if they are numbers
-    Concatenates them if they are strings
+    Concatenates them if they are strings, lazily through rope.Rope once they get long
     """
     if isinstance(left, numbers.Number) and isinstance(right, numbers.Number):
         return float(left) + float(right)
-    elif isinstance(left, str) and isinstance(right, str):
-        return left + right
+    elif isinstance(left, (str, rope.Rope)) and isinstance(right, (str, rope.Rope)):
+        return rope.concat(left, right)
     else:
         raise LoxRuntimeError(operator, "Operands must both be either strings or numbers")
 
@@ -59,33 +53,111 @@ def isTrue(obj):
     else:
         return True
 
-def checkNumberOperand(operator: scanner.Token, right: grammar.Expression):
-    if isinstance(right.value, numbers.Number):
+def checkNumberOperand(operator: scanner.Token, right):
+    if isinstance(right, numbers.Number):
         return
     raise LoxRuntimeError(operator, "Operand must be a number")
 
 def checkNumberOperands(left, operator, right):
-    if isinstance(left.value, numbers.Number) and isinstance(right.value, numbers.Number):
+    if isinstance(left, numbers.Number) and isinstance(right, numbers.Number):
         return
     else:
         raise LoxRuntimeError(operator, "Operands must both be numbers")
 
+# Returned by a quickened handler when its operands no longer have the types it was specialized for
+DEOPT = object()
+
+# After this many deopts a Binary node stays on the generic path
+MAX_DEOPTS = 4
+
+STRING_TYPES = (str, rope.Rope)
+
+def _floatSpecialization(function):
+    """
+    Builds a handler for a Binary node that has only seen float operands
+    No conversions or ABC isinstance checks are needed once both types are exactly float
+    """
+    def handler(left, right):
+        if type(left) is float and type(right) is float:
+            return function(left, right)
+        return DEOPT
+    return handler
+
+def _concatSpecialization(left, right):
+    if type(left) in STRING_TYPES and type(right) in STRING_TYPES:
+        return rope.concat(left, right)
+    return DEOPT
+
+FLOAT_SPECIALIZATIONS = {
+    scanner.TokenType.PLUS: _floatSpecialization(lambda left, right: left + right),
+    scanner.TokenType.MINUS: _floatSpecialization(lambda left, right: left - right),
+    scanner.TokenType.STAR: _floatSpecialization(lambda left, right: left * right),
+    scanner.TokenType.SLASH: _floatSpecialization(lambda left, right: left / right),
+    scanner.TokenType.GREATER: _floatSpecialization(lambda left, right: left > right),
+    scanner.TokenType.GREATER_EQUAL: _floatSpecialization(lambda left, right: left >= right),
+    scanner.TokenType.LESS: _floatSpecialization(lambda left, right: left < right),
+    scanner.TokenType.LESS_EQUAL: _floatSpecialization(lambda left, right: left <= right),
+}
+
+def specialize(operator_type: scanner.TokenType, left, right):
+    """
+    Returns a quickened handler for a Binary operator given the operand values just seen
+    Returns None if these operand types have no fast path
+    """
+    if type(left) is float and type(right) is float:
+        return FLOAT_SPECIALIZATIONS.get(operator_type)
+    if operator_type == scanner.TokenType.PLUS and type(left) in STRING_TYPES and type(right) in STRING_TYPES:
+        return _concatSpecialization
+    return None
+
+MODES = ("visitor", "closure")
+
 class Interpreter():
-    def __init__(self, interpreter) -> None:
+    def __init__(self, interpreter, mode: str = "visitor", output: sinks.Sink = None) -> None:
         """
         Must pass Lox instance as interpreter argument
         Lox instance is required for error handling
+        mode "visitor" walks the tree through accept()
+        mode "closure" first compiles the tree into Python closures with closures.ClosureCompiler
+        output receives every printed line, a buffered sinks.StreamSink on stdout by default
         """
+        if mode not in MODES:
+            raise ValueError("Unknown mode '" + mode + "'")
         self._interpreter = interpreter
+        self.mode = mode
         self.environment = Environment()
+        self.output = output if output is not None else sinks.StreamSink()
 
-    def interpret(self, stmts: list[statement.Stmt]):
+    def interpret(self, stmts: list[statement.Stmt], mode: str = None):
         try:
-            for stmt in stmts:
-                self._execute(stmt)
+            if (mode or self.mode) == "closure":
+                self._runClosures(stmts)
+            else:
+                for stmt in stmts:
+                    self._execute(stmt)
         except LoxRuntimeError as error:
             self._interpreter.runtime_error(error)
 
+    def _runClosures(self, stmts: list[statement.Stmt]):
+        """
+        Compiles the statements not compiled yet, then runs every statement's closure
+        Closures are cached in stmt.compiled, which resolver.Resolver clears when a statement's slots change,
+        so a statement list interpreted again is not recompiled
+        Print closures write to this interpreter's output, so a tree should only be run by the Lox instance that parsed it
+        """
+        # Imported here since closures reuses the helpers defined in this module
+        import closures
+
+        pending = [stmt for stmt in stmts if stmt.compiled is None]
+        if pending:
+            compiled = closures.ClosureCompiler(self.output.writeLine).compile(pending)
+            for stmt, run in zip(pending, compiled):
+                stmt.compiled = run
+
+        environment = self.environment
+        for stmt in stmts:
+            stmt.compiled(environment)
+
     def _evaluate(self, expr: grammar.Expression):
         return expr.accept(self)
 
@@ -98,7 +170,7 @@ class Interpreter():
 
     def visitPrint(self, stmt: statement.Print) -> None:
         value = self._evaluate(stmt.expression)
-        print(stringify(value))
+        self.output.writeLine(stringify(value))
         return None
 
     def visitLiteral(self, expr: grammar.Literal):
@@ -112,17 +184,36 @@ class Interpreter():
         
         match expr.operator.type:
             case scanner.TokenType.MINUS:
-                checkNumberOperand(expr.operator)
+                checkNumberOperand(expr.operator, right)
                 return -float(right)
             case scanner.TokenType.BANG:
-                return isTrue(right)
+                return not isTrue(right)
 
         return None
 
     def visitBinary(self, expr: grammar.Binary):
+        """
+        Evaluates both operands, then tries the node's quickened handler
+        On a type mismatch the handler is dropped and the generic path runs
+        Each generic evaluation re-specializes the node for the types it saw, until MAX_DEOPTS
+        """
         left = self._evaluate(expr.left)
         right = self._evaluate(expr.right)
 
+        handler = expr.handler
+        if handler is not None:
+            result = handler(left, right)
+            if result is not DEOPT:
+                return result
+            expr.handler = None
+            expr.deopts += 1
+
+        result = self._binaryGeneric(expr, left, right)
+        if expr.deopts < MAX_DEOPTS:
+            expr.handler = specialize(expr.operator.type, left, right)
+        return result
+
+    def _binaryGeneric(self, expr: grammar.Binary, left, right):
         match expr.operator.type:
             case scanner.TokenType.MINUS:
                 checkNumberOperands(left, expr.operator, right)
@@ -160,13 +251,18 @@ class Interpreter():
         if stmt.initializer is not None:
             value = self._evaluate(stmt.initializer)
 
-        self.environment.define(stmt.name.lexeme, value)
+        self.environment.defineAt(stmt.slot, value)
         return None
 
     def visitVariableExpr(self, expr: grammar.VariableExpr) -> None:
-        return self.environment.get(expr.name)
+        if expr.slot is None:
+            return self.environment.get(expr.name)
+        return self.environment.getAt(expr.depth, expr.slot, expr.name)
 
-    def visitAssignExpr(self, expr: grammar.Assign) -> object:
+    def visitAssign(self, expr: grammar.Assign) -> object:
         value = self._evaluate(expr.value)
-        self.environment.assign(expr.name, value)
+        if expr.slot is None:
+            self.environment.assign(expr.name, value)
+        else:
+            self.environment.assignAt(expr.depth, expr.slot, expr.name, value)
         return value
\ No newline at end of file
@@ -1,22 +1,130 @@
-import io
+import argparse
+import contextlib
+import functools
 import sys
 import scanner
+import regex_scanner
+import mmap_scanner
 import lox_parser
 import interpreter
+import resolver
+import optimizer
+import program_cache
+import profiler
+import compiler
+import vm
+import transpiler
+import incremental
+import program
+import sinks
+import governor
+import tiering
+import node_table
+
+BACKENDS = ("tree", "closure", "vm", "python", "tiered", "table")
+SCANNERS = {"char": scanner.Scanner, "regex": regex_scanner.RegexScanner, "mmap": mmap_scanner.MmapScanner}
+
+# Shared do-nothing phase timer used when profiling is off
+NO_PHASE = contextlib.nullcontext()
 
 class Lox:
-    def __init__(self):
+    def __init__(self, backend: str = "tree", optimize: bool = False, lexer: str = "char",
+                 cache: program_cache.ProgramCache = None, profile: profiler.Profiler = None, parser: str = "pratt",
+                 output: sinks.Sink = None, limits: governor.Limits = None):
+        """
+        backend selects how parsed statements are executed
+        "tree" walks the AST with interpreter.Interpreter
+        "closure" runs interpreter.Interpreter in closure-compiled mode
+        "vm" compiles to bytecode and runs it on vm.VM
+        "python" transpiles to a CPython code object with transpiler.Transpiler
+        "tiered" walks the AST with tiering.TieredInterpreter, which compiles statements and expressions
+        into closures once they have run tiering.DEFAULT_THRESHOLD times
+        "table" encodes the program into a flat node_table.NodeTable and walks it by index
+        optimize runs optimizer.PassManager on the parsed statements before resolution
+        lexer picks the scanner, "char" for scanner.Scanner, "regex" for regex_scanner.RegexScanner
+        or "mmap" for mmap_scanner.MmapScanner, which runFile feeds the mapped file without decoding it
+        cache lets runFile load parsed programs from disk instead of scanning and parsing them
+        profile collects phase times, and with the tree backend per-node and per-line times
+        parser picks the expression parser, "pratt" for lox_parser.PrattParser or "descent" for lox_parser.Parser
+        output receives printed lines from every backend, a buffered sinks.StreamSink on stdout by default
+        It is checkpointed at the end of every run, and flushed before any error is reported
+        limits runs the tree backend on governor.GovernedInterpreter, which stops a run past its instruction,
+        time or memory budget with a governor.LimitExceeded runtime error
+        """
+        if limits is not None and (backend != "tree" or profile is not None):
+            raise ValueError("limits are only enforced by the tree backend without profiling")
         self.had_error = False
         self.had_runtime_error = False
-        self.interpreter = interpreter.Interpreter(self)
+        self.backend = backend
+        self.lexer = lexer
+        self.parser = parser
+        self.optimizer = optimizer.PassManager() if optimize else None
+        self.cache = cache
+        self.profiler = profile
+        self.output = output if output is not None else sinks.StreamSink()
+        self.resolver = resolver.Resolver(self)
+        self.interpreter = self._createInterpreter(limits)
+
+    def _createInterpreter(self, limits: governor.Limits):
+        """
+        Returns the tree-walking interpreter for this instance's backend, profiler and limits
+        """
+        if limits is not None:
+            return governor.GovernedInterpreter(self, limits, self.output)
+        if self.backend == "tiered":
+            return tiering.TieredInterpreter(self, output=self.output)
+        if self.profiler is None:
+            return interpreter.Interpreter(self, output=self.output)
+        return profiler.ProfilingInterpreter(self, self.profiler, output=self.output)
+
+    # The other backends are built on first use, since most instances only ever run one of them
+
+    @functools.cached_property
+    def vm(self) -> vm.VM:
+        return vm.VM(self, self.output)
+
+    @functools.cached_property
+    def python(self) -> transpiler.PythonBackend:
+        return transpiler.PythonBackend(self, self.output)
 
-    def runFile(self, path):
-        with open(path, 'r') as file:
-            contents = file.read()
-        self.run(contents)
+    @functools.cached_property
+    def table(self) -> node_table.TableInterpreter:
+        return node_table.TableInterpreter(self, self.output)
+
+    def runFile(self, path, stream: bool = False):
+        if self.lexer == "mmap" and not stream and self.cache is None:
+            # The scanner reads the mapped bytes in place and the parsed tokens keep the mapping open
+            contents = mmap_scanner.mapFile(path)
+        else:
+            with open(path, 'r') as file:
+                if stream:
+                    self.runStream(file)
+                    return
+                contents = file.read()
+
+        # A script is the whole program, so the optimizer may drop stores nothing reads afterwards
+        try:
+            if self.cache is None:
+                self._execute(self.parse(contents, whole_program=True))
+            else:
+                self._execute(self._parseCached(path, contents))
+        finally:
+            self.output.checkpoint()
         if self.had_error:
             sys.exit(1)
 
+    def _parseCached(self, path, contents: str) -> list:
+        """
+        Returns the program from self.cache, parsing and storing it on a miss
+        Programs with errors are never stored
+        """
+        variant = "" if self.optimizer is None else "optimize" + repr(sorted(self.optimizer.enabled.items()))
+        statements = self.cache.load(path, contents, variant)
+        if statements is None:
+            statements = self.parse(contents, whole_program=True)
+            self.cache.store(path, contents, statements, variant)
+        return statements
+
     def error(self, line, message):
         self.report(line, "", message)
 
@@ -25,50 +133,247 @@ class Lox:
 
     def parse_error(self, token: scanner.Token, msg: str):
         if token.type == scanner.TokenType.EOF:
-            self.report(token.line, "at end", msg)
+            self.report(token.line, " at end", msg)
         else:
             self.report(token.line, " at '" + token.lexeme + "'", msg)
 
-    def runtime_error(self, error):
-        sys.stderr.write(error.message + "\n[line " + error.token.line + "]")
-        self.had_runtime_error = True
-
     def report(self, line, where, message):
-        self.hadError = True
-        sys.stderr.write("[line " + line + "] Error" + where + ": " + message)
-
-    def runPrompt(self):
-        input = io.BufferedReader
+        self.had_error = True
+        self.output.flush()
+        sys.stderr.write("[line " + str(line) + "] Error" + where + ": " + message + "\n")
 
+    def runPrompt(self, input=sys.stdin, output=sys.stdout):
+        """
+        Reads and runs one line at a time until end of input
+        Every line shares one session, so globals defined on one line are visible on the next
+        through the interpreter's global Environment and the resolver's persistent scopes
+        Errors are reported and cleared instead of exiting, and the optimizer never treats
+        a single line as the whole program
+        Unexpected exceptions from a line are reported through internal_error and the prompt continues
+        """
         while True:
-            print("> ")
-            line = input()
-            if line == None:
+            output.write("> ")
+            output.flush()
+            line = input.readline()
+            if not line:
                 break
-            self.run(line)
-            self.hadError = False
 
-    def run(self, args: str):
-        scan = scanner.Scanner(self, args)
-        tokens = scan.scanTokens()
-        parser = lox_parser.Parser(self, tokens)
-        statements = parser.parse()
+            try:
+                statements = self._scanAndParse(line)
+                if not self.had_error:
+                    if self.optimizer is not None:
+                        statements = self.optimizer.run(statements, whole_program=False)
+                    self._execute(statements)
+            except Exception as error:
+                # A line that breaks the interpreter itself is reported like any other error, the session goes on
+                self.internal_error(error)
+            finally:
+                self.output.checkpoint()
+            self.had_error = False
+            self.had_runtime_error = False
+
+    def compile(self, source: str) -> program.Program:
+        """
+        Scans, parses, optimizes, resolves and closure-compiles source once for program.Program to run many times
+        The program gets its own resolver, so its global slots do not depend on this session
+        Dead stores are kept, since a program's final globals are part of every result
+        Raises program.CompileError after reporting any syntax errors
+        """
+        statements = self._scanAndParse(source)
+        if self.had_error:
+            self.had_error = False
+            raise program.CompileError("source has syntax errors")
+
+        if self.optimizer is not None:
+            statements = self.optimizer.run(statements, whole_program=False)
+        program_resolver = resolver.Resolver(self)
+        program_resolver.resolve(statements)
+        return program.Program(statements, dict(program_resolver.scopes[0]))
+
+    def openDocument(self, source: str = "") -> incremental.Document:
+        """
+        Returns an incremental.Document over source that reparses only what each edit touches
+        Documents always use scanner.Scanner, since only it records token offsets
+        """
+        return incremental.Document(self, source)
+
+    def run(self, args: str, backend: str = None):
+        try:
+            self._execute(self.parse(args), backend)
+        finally:
+            self.output.checkpoint()
+
+    def parse(self, args: str, whole_program: bool = False) -> list:
+        """
+        Scans, parses and optionally optimizes source
+        Exits with the usual status codes if there were errors
+        whole_program tells the optimizer no later run reads these globals, which only runFile knows
+        """
+        statements = self._scanAndParse(args)
 
         if self.had_error:
             sys.exit(65)
         if self.had_runtime_error:
             sys.exit(70)
-        
-        self.interpreter.interpret(statements)
+
+        if self.optimizer is not None:
+            with self._phase("optimize"):
+                statements = self.optimizer.run(statements, whole_program)
+        return statements
+
+    def _scanAndParse(self, source: str) -> list:
+        with self._phase("scan"):
+            scan = SCANNERS[self.lexer](self, source)
+            tokens = scan.scanTokens()
+        with self._phase("parse"):
+            parser = lox_parser.PARSERS[self.parser](self, tokens)
+            return parser.parse()
+
+    def _phase(self, name: str):
+        """
+        Returns a context manager timing name when profiling, or a shared no-op otherwise
+        """
+        if self.profiler is None:
+            return NO_PHASE
+        return self.profiler.phase(name)
+
+    def runStream(self, file, backend: str = None):
+        """
+        Scans, parses and executes an open file one top-level statement at a time
+        Tokens come from regex_scanner.streamTokens and statements from lox_parser.StreamingParser,
+        and each statement is dropped once it has run, so memory stays flat for any input size
+        Statements before a syntax error have already run when the error is reported
+        """
+        tokens = regex_scanner.streamTokens(self, file)
+        parser = lox_parser.StreamingParser(self, tokens)
+
+        if self.had_runtime_error:
+            sys.exit(70)
+
+        try:
+            for stmt in parser.parseStatements():
+                if self.had_error:
+                    sys.exit(65)
+
+                statements = [stmt]
+                if self.optimizer is not None:
+                    statements = self.optimizer.run(statements, whole_program=False)
+                self._execute(statements, backend)
+
+                # Like run, execution stops at the first runtime error
+                if self.had_runtime_error:
+                    return
+        finally:
+            self.output.checkpoint()
+
+        if self.had_error:
+            sys.exit(65)
+
+    def _execute(self, statements: list, backend: str = None):
+        """
+        Resolves parsed statements and runs them on the chosen backend
+        """
+        if backend not in (None, "tree") and isinstance(self.interpreter, governor.GovernedInterpreter):
+            raise ValueError("limits are only enforced by the tree backend, not '" + backend + "'")
+        with self._phase("resolve"):
+            self.resolver.resolve(statements)
+
+        match backend or self.backend:
+            case "tree" | "tiered":
+                with self._phase("execute"):
+                    self.interpreter.interpret(statements)
+            case "closure":
+                with self._phase("execute"):
+                    self.interpreter.interpret(statements, "closure")
+            case "vm":
+                with self._phase("compile"):
+                    chunk = compiler.Compiler().compile(statements)
+                with self._phase("execute"):
+                    self.vm.interpret(chunk)
+            case "python":
+                with self._phase("compile"):
+                    program = self.python.compile(statements)
+                with self._phase("execute"):
+                    self.python.interpret(program)
+            case "table":
+                with self._phase("compile"):
+                    table = node_table.encode(statements)
+                with self._phase("execute"):
+                    self.table.interpret(table)
+            case other:
+                raise ValueError("Unknown backend '" + other + "'")
+
+    def internal_error(self, error: Exception):
+        """
+        Reports an exception that is not a Lox error, such as a bug in a backend
+        """
+        self.output.flush()
+        sys.stderr.write("Internal error: " + type(error).__name__ + ": " + str(error) + "\n")
+        self.had_runtime_error = True
 
     def runtime_error(self, error):
-        sys.stderr.write("[line " + str(error._token.line) + "] " + error._message)
+        # Output printed before the error has to reach stdout before the message reaches stderr
+        self.output.flush()
+        sys.stderr.write("[line " + str(error._token.line) + "] " + error._message + "\n")
         self.had_runtime_error = True
 
 if __name__ == "__main__":
-    lox_test = Lox()
-    lox_test.runFile("loxtest.txt")
-    #user_input = input(">>>")
-    #while user_input != "exit":
-    #    lox_test.run(user_input)
-    #    user_input = input(">>>")
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description="Run a Lox script")
+    arg_parser.add_argument("script", nargs="?", default="loxtest.txt")
+    arg_parser.add_argument("--backend", choices=BACKENDS, default="tree")
+    arg_parser.add_argument("--lexer", choices=SCANNERS, default="char")
+    arg_parser.add_argument("--parser", choices=lox_parser.PARSERS, default="pratt")
+    arg_parser.add_argument("--prompt", action="store_true", help="read and run lines interactively instead of a script")
+    arg_parser.add_argument("--stream", action="store_true", help="scan, parse and execute one statement at a time")
+    arg_parser.add_argument("--cache", action="store_true", help="reuse parsed programs from a .loxc cache")
+    arg_parser.add_argument("--cache-dir", help="cache directory, defaults to __loxcache__ next to the script")
+    arg_parser.add_argument("--cache-max-bytes", type=int, default=program_cache.DEFAULT_MAX_BYTES)
+    arg_parser.add_argument("--profile", action="store_true", help="report phase, node and line timings on stderr")
+    arg_parser.add_argument("--profile-collapsed", help="with --profile, write flamegraph collapsed stacks to this file")
+    arg_parser.add_argument("--optimize", action="store_true", help="run the AST optimizer before executing")
+    arg_parser.add_argument("--optimizer-stats", action="store_true", help="with --optimize, report what each pass changed")
+    arg_parser.add_argument("--flush", choices=sinks.POLICIES, default=sinks.SIZE, help="when buffered output is written")
+    arg_parser.add_argument("--buffer-size", type=int, default=sinks.DEFAULT_BUFFER_SIZE, help="characters buffered by --flush size")
+    arg_parser.add_argument("--output-fd", action="store_true", help="write output as bytes straight to file descriptor 1")
+    arg_parser.add_argument("--max-instructions", type=int, help="stop after this many statements and expression nodes")
+    arg_parser.add_argument("--max-seconds", type=float, help="stop a run after this much wall-clock time")
+    arg_parser.add_argument("--max-bytes", type=int, help="stop when variables hold about this many bytes")
+    arg_parser.add_argument("--tier-threshold", type=int, default=tiering.DEFAULT_THRESHOLD,
+                            help="with --backend tiered, visitor runs before a node is compiled")
+    arg_parser.add_argument("--tier-stats", action="store_true", help="with --backend tiered, report promotions and deopts")
+    options = arg_parser.parse_args()
+
+    cache = None
+    if options.cache or options.cache_dir:
+        cache = program_cache.ProgramCache(options.cache_dir, options.cache_max_bytes)
+
+    profile = profiler.Profiler() if options.profile else None
+
+    if options.output_fd:
+        output = sinks.FdSink(1, options.flush, options.buffer_size)
+    else:
+        output = sinks.StreamSink(None, options.flush, options.buffer_size)
+
+    run_limits = None
+    if options.max_instructions is not None or options.max_seconds is not None or options.max_bytes is not None:
+        if options.backend != "tree" or options.profile:
+            arg_parser.error("--max-instructions, --max-seconds and --max-bytes need --backend tree without --profile")
+        run_limits = governor.Limits(options.max_instructions, options.max_seconds, options.max_bytes)
+
+    lox_test = Lox(options.backend, options.optimize, options.lexer, cache, profile, options.parser, output, run_limits)
+    if options.backend == "tiered":
+        lox_test.interpreter.threshold = options.tier_threshold
+    try:
+        if options.prompt:
+            lox_test.runPrompt()
+        else:
+            lox_test.runFile(options.script, options.stream)
+    finally:
+        if options.optimize and options.optimizer_stats:
+            lox_test.optimizer.report()
+        if options.backend == "tiered" and options.tier_stats:
+            lox_test.interpreter.stats.report()
+        if profile is not None:
+            profile.report()
+            if options.profile_collapsed:
+                profile.writeCollapsed(options.profile_collapsed)
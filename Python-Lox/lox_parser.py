@@ -1,3 +1,6 @@
+import bisect
+import itertools
+
 from scanner import Token, TokenType
 from statement import *
 import grammar
@@ -10,16 +13,64 @@ class Parser:
         self.tokens = token_list
         self._interpreter = interpreter
         self._current = 0
+        # Token index where each top-level statement starts, kept for incremental reparses
+        self.starts = []
 
     def parse(self):
         try:
             statements = []
             while not self.is_at_end():
+                self.starts.append(self._current)
                 statements.append(self._declaration())
             return statements
         except ParseError as error:
             return None
 
+    def parseExpression(self):
+        """
+        Parses the tokens as a single expression with nothing after it
+        Returns None after reporting an error
+        """
+        try:
+            expr = self._expression()
+            if not self.is_at_end():
+                raise self._error(self._peek(), "Expect end of expression.")
+            return expr
+        except ParseError as error:
+            return None
+
+    def reparse(self, statements: list, starts: list, first: int, old_stop: int, new_stop: int):
+        """
+        Reparses self.tokens after Scanner.rescan replaced old tokens[first:old_stop] with self.tokens[first:new_stop]
+        statements and starts come from the previous parse, which must have had no errors
+        Statements ending before first are kept as they are
+        Parsing resumes at the statement holding token first and stops at the first statement boundary
+        past the edit that was also a boundary before, after which the old statements are reused
+        """
+        delta = new_stop - old_stop
+        kept = max(0, bisect.bisect_right(starts, first) - 1)
+        self.starts = starts[:kept]
+        self._current = starts[kept] if starts else 0
+        try:
+            result = statements[:kept]
+            while not self.is_at_end():
+                if self._current >= new_stop:
+                    old = bisect.bisect_left(starts, self._current - delta, kept)
+                    if old < len(starts) and starts[old] == self._current - delta:
+                        line_delta = self._peek().line - statements[old].line
+                        if line_delta:
+                            for stmt in itertools.islice(statements, old, None):
+                                stmt.line += line_delta
+                        result += statements[old:]
+                        self.starts += [start + delta for start in itertools.islice(starts, old, None)]
+                        return result
+
+                self.starts.append(self._current)
+                result.append(self._declaration())
+            return result
+        except ParseError as error:
+            return None
+
     def is_at_end(self) -> bool:
         """Checks if next token is EOF"""
         return self._peek().type == TokenType.EOF
@@ -71,10 +122,14 @@ class Parser:
         return self._expressionStatement()
 
     def _declaration(self):
+        line = self._peek().line
         try:
             if self._match(TokenType.VAR):
-                return self._varDeclaration()
-            return self._statement()
+                stmt = self._varDeclaration()
+            else:
+                stmt = self._statement()
+            stmt.line = line
+            return stmt
         except ParseError as error:
             self._synchronize()
             return None
@@ -107,7 +162,7 @@ class Parser:
             value = self._assignment()
 
             if isinstance(expr, grammar.VariableExpr):
-                name = grammar.VariableExpr(expr).name
+                name = expr.name
                 return grammar.Assign(name, value)
 
             self._error(equals, "Invalid assignment target")
@@ -181,6 +236,7 @@ class Parser:
         """
         Checking for terminal expressions
         Returns Literal syntax tree node with corresponding Python type
+        Raises ParseError if the next token cannot start an expression
         """
         # Check for boolean and null types
         if self._match(TokenType.FALSE):
@@ -205,6 +261,8 @@ class Parser:
             self._consume(TokenType.RIGHT_PAREN, "Expected ')' after expression")
             return grammar.Grouping(expr)
 
+        raise self._error(self._peek(), "Expect expression.")
+
     def _consume(self, token_type: TokenType, msg: str):
         """
         Consumes next token if it is the provided type
@@ -216,10 +274,13 @@ class Parser:
         raise self._error(self._peek(), msg)
 
     def _error(self, token: Token, msg: str) -> ParseError:
-        self._interpreter.error()
+        self._interpreter.parse_error(token, msg)
         return ParseError()
 
     def _synchronize(self):
+        # An error at the end of input has nothing left to skip
+        if self.is_at_end():
+            return None
         self._advance()
 
         while not self.is_at_end():
@@ -245,4 +306,132 @@ class Parser:
                 case TokenType.RETURN:
                     return None
             
-            self._advance()
\ No newline at end of file
+            self._advance()
+
+# Binding powers for PrattParser, higher binds tighter
+# Left-associative operators parse their right operand one power above their own, assignment at the same power
+PREFIX_POWER = 11
+INFIX_POWERS = {
+    TokenType.EQUAL: (1, 1),
+    TokenType.BANG_EQUAL: (3, 4),
+    TokenType.EQUAL_EQUAL: (3, 4),
+    TokenType.GREATER: (5, 6),
+    TokenType.GREATER_EQUAL: (5, 6),
+    TokenType.LESS: (5, 6),
+    TokenType.LESS_EQUAL: (5, 6),
+    TokenType.PLUS: (7, 8),
+    TokenType.MINUS: (7, 8),
+    TokenType.SLASH: (9, 10),
+    TokenType.STAR: (9, 10),
+}
+
+# Prefix operators open a frame whose operand is parsed at this power, a grouping accepts any operator inside it
+PREFIX_OPERATORS = {
+    TokenType.BANG: PREFIX_POWER,
+    TokenType.MINUS: PREFIX_POWER,
+    TokenType.LEFT_PAREN: 0,
+}
+
+# Prefix handlers that build a leaf node from the token just consumed
+PREFIX_LEAVES = {
+    TokenType.FALSE: lambda token: grammar.Literal(False),
+    TokenType.TRUE: lambda token: grammar.Literal(True),
+    TokenType.NIL: lambda token: grammar.Literal(None),
+    TokenType.NUMBER: lambda token: grammar.Literal(token.literal),
+    TokenType.STRING: lambda token: grammar.Literal(token.literal),
+    TokenType.IDENTIFIER: grammar.VariableExpr,
+}
+
+# Left operand stored in frames opened by a prefix operator
+PREFIX = object()
+
+class PrattParser(Parser):
+    """
+    Parser whose expressions are parsed by table-driven precedence climbing instead of one method per level
+    Pending operators are kept on an explicit stack of (token, left operand, enclosing power) frames,
+    so nesting depth is limited by memory rather than Python's recursion limit
+    Builds the same grammar trees and reports the same errors as Parser
+    """
+    def _expression(self):
+        frames = []
+        min_power = 0
+        while True:
+            token = self._peek()
+            power = PREFIX_OPERATORS.get(token.type)
+            if power is not None:
+                self._advance()
+                frames.append((token, PREFIX, min_power))
+                min_power = power
+                continue
+
+            leaf = PREFIX_LEAVES.get(token.type)
+            if leaf is None:
+                raise self._error(token, "Expect expression.")
+            self._advance()
+            operand = leaf(token)
+
+            while True:
+                token = self._peek()
+                powers = INFIX_POWERS.get(token.type)
+                if powers is not None and powers[0] >= min_power:
+                    self._advance()
+                    frames.append((token, operand, min_power))
+                    min_power = powers[1]
+                    break
+
+                if not frames:
+                    return operand
+                token, left, min_power = frames.pop()
+                operand = self._reduce(token, left, operand)
+
+    def _reduce(self, token: Token, left, operand):
+        """
+        Closes the frame opened by token now that its right operand is complete
+        """
+        match token.type:
+            case TokenType.LEFT_PAREN:
+                self._consume(TokenType.RIGHT_PAREN, "Expected ')' after expression")
+                return grammar.Grouping(operand)
+            case TokenType.EQUAL:
+                if isinstance(left, grammar.VariableExpr):
+                    return grammar.Assign(left.name, operand)
+                self._error(token, "Invalid assignment target")
+                return left
+
+        if left is PREFIX:
+            return grammar.Unary(token, operand)
+        return grammar.Binary(left, token, operand)
+
+# Parser classes Lox can be configured with
+PARSERS = {"pratt": PrattParser, "descent": Parser}
+
+class StreamingParser(PrattParser):
+    """
+    Parser that pulls tokens from an iterator instead of indexing a list
+    Only the current and previous tokens are held, so memory does not grow with input size
+    """
+    def __init__(self, interpreter, tokens) -> None:
+        super().__init__(interpreter, [])
+        self._tokens = iter(tokens)
+        self._last = None
+        self._next = next(self._tokens)
+
+    def parseStatements(self):
+        """
+        Yields each top-level statement as soon as it has been parsed
+        Statements that failed to parse are yielded as None after the error is reported
+        """
+        while not self.is_at_end():
+            yield self._declaration()
+
+    def _peek(self) -> Token:
+        return self._next
+
+    def _previous(self) -> Token:
+        return self._last
+
+    def _advance(self) -> Token:
+        self._last = self._next
+        if self._next.type != TokenType.EOF:
+            self._next = next(self._tokens)
+        return self._last
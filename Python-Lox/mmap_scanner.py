@@ -0,0 +1,205 @@
+import bisect
+import mmap
+import re
+from array import array
+
+import scanner
+from scanner import Token, TokenType, RESERVED_WORDS
+from regex_scanner import PUNCTUATION
+
+# TokenType members by position, so a token's type is stored as one byte
+TYPES = list(TokenType)
+TYPE_CODES = {token_type: code for code, token_type in enumerate(TYPES)}
+
+PUNCTUATION_CODES = {lexeme.encode(): TYPE_CODES[token_type] for lexeme, token_type in PUNCTUATION.items()}
+RESERVED_CODES = {word.encode(): TYPE_CODES[token_type] for word, token_type in RESERVED_WORDS.items()}
+
+# regex_scanner.MASTER_PATTERN over bytes
+# Bytes patterns only know ASCII letters and digits, so a run of word characters and dots holding
+# a non-ASCII byte is matched as WIDE and handed to scanner.Scanner for its str.isalpha/str.isdigit rules
+# Such runs are bounded by characters that always end a token, so scanning them alone gives the same tokens
+MASTER_PATTERN = re.compile(rb"""
+    (?P<SPACE>[ \r\t\n]+)
+  | (?P<COMMENT>//[^\n]*)
+  | (?P<STRING>"[^"]*")
+  | (?P<UNTERMINATED>"[^"]*)
+  | (?P<WIDE>[A-Za-z0-9.]*+[\x80-\xff][A-Za-z0-9.\x80-\xff]*)
+  | (?P<NUMBER>[0-9]+(?:\.[0-9]+)?)
+  | (?P<IDENTIFIER>[A-Za-z][A-Za-z0-9]*)
+  | (?P<OPERATOR>[!=<>]=?|[(){},.\-+;/*])
+  | (?P<ERROR>.)
+""", re.VERBOSE | re.DOTALL)
+
+NEWLINE = re.compile(rb"\n")
+
+def mapFile(path: str):
+    """
+    Returns a read-only mmap of the file at path, or empty bytes for an empty file, which cannot be mapped
+    The mapping stays valid after the file is closed, for as long as something references it
+    """
+    with open(path, "rb") as file:
+        try:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return b""
+
+class TokenTable:
+    """
+    Token stream stored as three parallel arrays instead of one Token object per token
+    types holds a TYPES index, starts and lengths the byte span of the lexeme in data
+    Line numbers are not stored, lineAt finds them by binary search over the offsets of every newline
+    A LazyToken is only made when a token is indexed, and it decodes its lexeme when asked for it
+    """
+    def __init__(self, data) -> None:
+        self.data = data
+        # Four byte offsets unless the source is too large for them
+        offset = "I" if len(data) < 1 << 32 else "q"
+        self.types = array("B")
+        self.starts = array(offset)
+        self.lengths = array(offset)
+        self.newlines = array(offset, [match.start() for match in NEWLINE.finditer(data)])
+        self._last = None
+
+    def append(self, code: int, start: int, length: int) -> None:
+        self.types.append(code)
+        self.starts.append(start)
+        self.lengths.append(length)
+
+    def lineAt(self, offset: int) -> int:
+        """
+        Returns the line of the character just before offset, counting newlines before it
+        """
+        return bisect.bisect_left(self.newlines, offset) + 1
+
+    def lexeme(self, index: int) -> str:
+        start = self.starts[index]
+        return self.data[start:start + self.lengths[index]].decode("utf-8", "replace")
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        # The parser looks at the current token several times in a row, so the last one is reused
+        last = self._last
+        if last is not None and last._index == index:
+            return last
+        if index < 0:
+            index += len(self.types)
+        last = self._last = LazyToken(self, index)
+        return last
+
+    def __iter__(self):
+        for index in range(len(self.types)):
+            yield LazyToken(self, index)
+
+class LazyToken:
+    """
+    Stands in for scanner.Token, reading its lexeme, literal and line from a TokenTable on access
+    Pickles as a plain scanner.Token, so cached programs do not hold on to the mapped file
+    """
+    __slots__ = ("type", "_table", "_index")
+
+    def __init__(self, table: TokenTable, index: int) -> None:
+        self.type = TYPES[table.types[index]]
+        self._table = table
+        self._index = index
+
+    @property
+    def lexeme(self) -> str:
+        return self._table.lexeme(self._index)
+
+    @property
+    def literal(self):
+        if self.type == TokenType.NUMBER:
+            return float(self.lexeme)
+        if self.type == TokenType.STRING:
+            return self.lexeme[1:-1]
+        return None
+
+    @property
+    def line(self) -> int:
+        table = self._table
+        return table.lineAt(table.starts[self._index] + table.lengths[self._index])
+
+    def toToken(self) -> Token:
+        return Token(self.type, self.lexeme, self.literal, self.line)
+
+    def __reduce__(self):
+        return (Token, (self.type, self.lexeme, self.literal, self.line))
+
+class MmapScanner():
+    """
+    Drop-in replacement for scanner.Scanner that scans bytes in place, typically an mmap from mapFile
+    A str source is encoded to UTF-8 first
+    Emits the same token types, lexemes, literals, lines and scan_error diagnostics as Scanner,
+    but as a TokenTable of byte offsets, so no lexeme string exists until a token is looked at
+    """
+    def __init__(self, interpreter, source) -> None:
+        if isinstance(source, str):
+            source = source.encode("utf-8")
+        self.source = source
+        self._interpreter = interpreter
+        self.tokens = TokenTable(source)
+
+    def scanTokens(self) -> TokenTable:
+        """
+        Tokenizes the whole source with MASTER_PATTERN
+        Appends an EOF token and returns self.tokens
+        """
+        tokens = self.tokens
+        append = tokens.append
+        punctuation = PUNCTUATION_CODES
+        reserved_words = RESERVED_CODES
+        identifier = TYPE_CODES[TokenType.IDENTIFIER]
+        number = TYPE_CODES[TokenType.NUMBER]
+        string = TYPE_CODES[TokenType.STRING]
+
+        for match in MASTER_PATTERN.finditer(self.source):
+            kind = match.lastgroup
+            if kind == "SPACE" or kind == "COMMENT":
+                continue
+            start, end = match.span()
+
+            if kind == "OPERATOR":
+                append(punctuation[match.group()], start, end - start)
+            elif kind == "IDENTIFIER":
+                append(reserved_words.get(match.group(), identifier), start, end - start)
+            elif kind == "NUMBER":
+                append(number, start, end - start)
+            elif kind == "STRING":
+                append(string, start, end - start)
+            elif kind == "UNTERMINATED":
+                self._interpreter.scan_error(tokens.lineAt(end), "Unterminated string.")
+            elif kind == "WIDE":
+                self._scanWide(start, end)
+            else:
+                self._interpreter.scan_error(tokens.lineAt(start), "Unexpected character")
+
+        append(TYPE_CODES[TokenType.EOF], len(self.source), 0)
+        return tokens
+
+    def _scanWide(self, start: int, end: int) -> None:
+        """
+        Scans a run of letters, digits, dots and non-ASCII bytes with scanner.Scanner
+        and records its tokens at their byte offsets
+        """
+        text = self.source[start:end].decode("utf-8", "replace")
+        line = self.tokens.lineAt(start)
+        wide = scanner.Scanner(_LineOffset(self._interpreter, line - 1), text)
+        wide.scanTokens()
+        for token, offset in zip(wide.tokens[:-1], wide.offsets):
+            position = start + len(text[:offset].encode("utf-8"))
+            self.tokens.append(TYPE_CODES[token.type], position, len(token.lexeme.encode("utf-8")))
+
+class _LineOffset:
+    """
+    Passes scan_error on with line numbers shifted, for scanning a piece of a larger source
+    """
+    def __init__(self, interpreter, offset: int) -> None:
+        self._interpreter = interpreter
+        self._offset = offset
+
+    def scan_error(self, line, msg):
+        self._interpreter.scan_error(line + self._offset, msg)
@@ -0,0 +1,427 @@
+import array
+import numbers
+import pickle
+import struct
+from multiprocessing import shared_memory
+
+import grammar
+import rope
+import scanner
+import sinks
+import statement
+from closures import NUMBER_OPERATORS
+from environment import Environment, LoxRuntimeError, UNDEFINED
+from gcpause import pausedGC
+from interpreter import stringify, concatOrAdd, isEqual, isTrue, STRING_TYPES
+
+Number = numbers.Number
+
+# Node kinds, numbered in the order of KINDS
+LITERAL, GROUPING, UNARY, BINARY, CHAIN, VARIABLE, ASSIGN, EXPRESSION_STMT, PRINT_STMT, VARIABLE_STMT = range(10)
+KINDS = (grammar.Literal, grammar.Grouping, grammar.Unary, grammar.Binary, grammar.Chain,
+         grammar.VariableExpr, grammar.Assign, statement.Expression, statement.Print, statement.VariableStmt)
+
+# Marks an absent child, pool entry, line or resolver annotation
+NONE = -1
+
+# What each column holds for each kind, columns not listed hold NONE, or 0 for operators
+# Literal       operand: pool index of the value
+# Grouping      first: expression
+# Unary         operator, operand: operator lexeme, line: operator line, first: right
+# Binary        operator, operand: operator lexeme, line: operator line, first: left, second: right
+# Chain         first: left, second: right
+# VariableExpr  operator: name type, operand: name, line: name line, depth, slot
+# Assign        operator: name type, operand: name, line: name line, depth, slot, first: value
+# Expression    line, first: expression
+# Print         line, first: expression
+# VariableStmt  operator: name type, operand: name, line, slot, first: initializer, second: name line
+# Children always come before their parents
+COLUMNS = (
+    ("firsts", "i"),
+    ("seconds", "i"),
+    ("operands", "i"),
+    ("lines", "i"),
+    ("depths", "i"),
+    ("slots", "i"),
+    ("kinds", "B"),
+    ("operators", "B"),
+)
+COLUMN_NAMES = tuple(name for name, _ in COLUMNS)
+
+# Order of the fields in the rows Encoder collects
+ROW = ("kinds", "operators", "firsts", "seconds", "operands", "lines", "depths", "slots")
+
+TOKEN_TYPES = {token_type.value: token_type for token_type in scanner.TokenType}
+
+# Binary operators on two floats, keyed by TokenType value
+FLOAT_OPERATORS = {
+    **{token_type.value: function for token_type, function in NUMBER_OPERATORS.items()},
+    scanner.TokenType.PLUS.value: lambda left, right: left + right,
+    scanner.TokenType.EQUAL_EQUAL.value: lambda left, right: left == right,
+    scanner.TokenType.BANG_EQUAL.value: lambda left, right: left != right,
+}
+NUMBER_CODES = {token_type.value: function for token_type, function in NUMBER_OPERATORS.items()}
+PLUS = scanner.TokenType.PLUS.value
+MINUS = scanner.TokenType.MINUS.value
+BANG = scanner.TokenType.BANG.value
+EQUAL_EQUAL = scanner.TokenType.EQUAL_EQUAL.value
+BANG_EQUAL = scanner.TokenType.BANG_EQUAL.value
+
+# Bump when the shared memory layout below changes
+TABLE_FORMAT = 1
+
+MAGIC = b"LOXT"
+
+# magic, format, node count, root count, pool bytes
+# Padded to 8 bytes so the 4-byte columns that follow stay aligned
+HEADER = struct.Struct("<4sH2xIII4x")
+
+def _optional(value) -> int:
+    return NONE if value is None else value
+
+def _fromOptional(value: int):
+    return None if value == NONE else value
+
+class NodeTable:
+    """
+    Struct-of-arrays form of a parsed program, one entry per node in every column
+    roots lists the top-level statements in order, and pool holds each literal value and name once
+    Columns are array.array when built by Encoder, or typed memoryviews over a shared memory block after attach
+    Runtime caches such as Binary handlers and tiering hit counts are not stored and start fresh in toTree
+    """
+    __slots__ = COLUMN_NAMES + ("roots", "pool", "_shared")
+
+    def __init__(self, columns: dict, roots, pool: list, shared: shared_memory.SharedMemory = None) -> None:
+        for name in COLUMN_NAMES:
+            setattr(self, name, columns[name])
+        self.roots = roots
+        self.pool = pool
+        self._shared = shared
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def toTree(self) -> list[statement.Stmt]:
+        """
+        Rebuilds the statement list, with the resolver annotations and lines it was encoded with
+        """
+        with pausedGC():
+            return self._buildTree()
+
+    def _buildTree(self) -> list[statement.Stmt]:
+        kinds = self.kinds
+        operators = self.operators
+        firsts = self.firsts
+        seconds = self.seconds
+        operands = self.operands
+        lines = self.lines
+        depths = self.depths
+        slots = self.slots
+        pool = self.pool
+
+        nodes = []
+        for index in range(len(kinds)):
+            kind = kinds[index]
+            first = firsts[index]
+            child = None if first == NONE else nodes[first]
+            if kind == LITERAL:
+                node = grammar.Literal(pool[operands[index]])
+            elif kind == GROUPING:
+                node = grammar.Grouping(child)
+            elif kind == BINARY or kind == UNARY:
+                token = scanner.Token(TOKEN_TYPES[operators[index]], pool[operands[index]], None, _fromOptional(lines[index]))
+                if kind == BINARY:
+                    node = grammar.Binary(child, token, nodes[seconds[index]])
+                else:
+                    node = grammar.Unary(token, child)
+            elif kind == CHAIN:
+                node = grammar.Chain(child, nodes[seconds[index]])
+            elif kind == VARIABLE or kind == ASSIGN:
+                token = scanner.Token(TOKEN_TYPES[operators[index]], pool[operands[index]], None, _fromOptional(lines[index]))
+                node = grammar.VariableExpr(token) if kind == VARIABLE else grammar.Assign(token, child)
+                node.depth = _fromOptional(depths[index])
+                node.slot = _fromOptional(slots[index])
+            elif kind == VARIABLE_STMT:
+                token = scanner.Token(TOKEN_TYPES[operators[index]], pool[operands[index]], None, _fromOptional(seconds[index]))
+                node = statement.VariableStmt(token, child)
+                node.slot = _fromOptional(slots[index])
+                node.line = _fromOptional(lines[index])
+            else:
+                node = statement.Expression(child) if kind == EXPRESSION_STMT else statement.Print(child)
+                node.line = _fromOptional(lines[index])
+            nodes.append(node)
+        return [nodes[root] for root in self.roots]
+
+    def nbytes(self) -> int:
+        """
+        Bytes the columns and roots take, not counting the pool
+        """
+        columns = [getattr(self, name) for name in COLUMN_NAMES] + [self.roots]
+        return sum(len(column) * column.itemsize for column in columns)
+
+    def toSharedMemory(self, name: str = None) -> shared_memory.SharedMemory:
+        """
+        Copies the table into a new shared memory block that other processes can attach to by name
+        The caller owns the block, and should close() and unlink() it once every reader is done
+        """
+        pool = pickle.dumps(self.pool, pickle.HIGHEST_PROTOCOL)
+        parts = [memoryview(self.roots).cast("B")]
+        parts += [memoryview(getattr(self, column)).cast("B") for column in COLUMN_NAMES]
+        size = HEADER.size + sum(len(part) for part in parts) + len(pool)
+
+        shared = shared_memory.SharedMemory(name, create=True, size=size)
+        buffer = shared.buf
+        HEADER.pack_into(buffer, 0, MAGIC, TABLE_FORMAT, len(self), len(self.roots), len(pool))
+        offset = HEADER.size
+        for part in parts + [pool]:
+            buffer[offset:offset + len(part)] = part
+            offset += len(part)
+        del buffer
+        return shared
+
+    def close(self) -> None:
+        """
+        Releases the columns of an attached table and closes its shared memory block
+        The table cannot be used afterwards
+        """
+        if self._shared is None:
+            return
+        for name in COLUMN_NAMES + ("roots",):
+            getattr(self, name).release()
+        self._shared.close()
+        self._shared = None
+
+def fromBuffer(buffer, shared: shared_memory.SharedMemory = None) -> NodeTable:
+    """
+    Returns a NodeTable whose columns are memoryviews into buffer, as written by NodeTable.toSharedMemory
+    Only the pool is unpickled, the columns are not copied
+    """
+    view = memoryview(buffer)
+    magic, table_format, count, root_count, pool_size = HEADER.unpack_from(view, 0)
+    if magic != MAGIC or table_format != TABLE_FORMAT:
+        raise ValueError("not a node table in format " + str(TABLE_FORMAT))
+
+    offset = HEADER.size
+    def take(typecode: str, length: int) -> memoryview:
+        nonlocal offset
+        size = length * array.array(typecode).itemsize
+        column = view[offset:offset + size].cast(typecode)
+        offset += size
+        return column
+
+    roots = take("i", root_count)
+    columns = {name: take(typecode, count) for name, typecode in COLUMNS}
+    pool = pickle.loads(view[offset:offset + pool_size])
+    return NodeTable(columns, roots, pool, shared)
+
+def attach(name: str) -> NodeTable:
+    """
+    Maps the table another process shared under name
+    close() the table when done with it
+    """
+    shared = shared_memory.SharedMemory(name)
+    return fromBuffer(shared.buf, shared)
+
+class Encoder:
+    """
+    Flattens a parsed, and usually resolved, statement list into a NodeTable
+    Each visit appends its node after its children and returns the node's index
+    """
+    def __init__(self) -> None:
+        # One (kinds, operators, firsts, ...) tuple per node, in ROW order, transposed into columns at the end
+        self._rows = []
+        self._pool = []
+        self._pooled = {}
+
+    def encode(self, stmts: list[statement.Stmt]) -> NodeTable:
+        with pausedGC():
+            roots = array.array("i", [stmt.accept(self) for stmt in stmts])
+        rows = self._rows
+        columns = {name: array.array(typecode) for name, typecode in COLUMNS}
+        for position, name in enumerate(ROW):
+            columns[name].fromlist([row[position] for row in rows])
+        return NodeTable(columns, roots, self._pool)
+
+    def _intern(self, value) -> int:
+        """
+        Returns the pool index of value, adding it on first use
+        Strings, the common case, are their own key, and other keys include the type
+        so that 1.0, True and a Rope of "1" stay apart, with floats keyed by hex so -0.0 keeps its sign
+        """
+        value_type = type(value)
+        if value_type is str:
+            key = value
+        elif value_type is float:
+            key = (float, value.hex())
+        else:
+            key = (value_type, value)
+        index = self._pooled.get(key)
+        if index is None:
+            index = self._pooled[key] = len(self._pool)
+            self._pool.append(value)
+        return index
+
+    def _append(self, kind: int, operator: int, first: int, second: int, operand: int,
+                line, depth=None, slot=None) -> int:
+        rows = self._rows
+        rows.append((kind, operator, first, second, operand, NONE if line is None else line,
+                     NONE if depth is None else depth, NONE if slot is None else slot))
+        return len(rows) - 1
+
+    def _token(self, kind: int, token: scanner.Token, first: int = NONE, second: int = NONE,
+               depth=None, slot=None) -> int:
+        return self._append(kind, token.type.value, first, second, self._intern(token.lexeme), token.line, depth, slot)
+
+    def visitLiteral(self, expr: grammar.Literal) -> int:
+        return self._append(LITERAL, 0, NONE, NONE, self._intern(expr.value), None)
+
+    def visitGrouping(self, expr: grammar.Grouping) -> int:
+        return self._append(GROUPING, 0, expr.expression.accept(self), NONE, NONE, None)
+
+    def visitUnary(self, expr: grammar.Unary) -> int:
+        return self._token(UNARY, expr.operator, expr.right.accept(self))
+
+    def visitBinary(self, expr: grammar.Binary) -> int:
+        left = expr.left.accept(self)
+        return self._token(BINARY, expr.operator, left, expr.right.accept(self))
+
+    def visitChain(self, expr: grammar.Chain) -> int:
+        left = expr.left.accept(self)
+        return self._append(CHAIN, 0, left, expr.right.accept(self), NONE, None)
+
+    def visitVariableExpr(self, expr: grammar.VariableExpr) -> int:
+        return self._token(VARIABLE, expr.name, depth=expr.depth, slot=expr.slot)
+
+    def visitAssign(self, expr: grammar.Assign) -> int:
+        return self._token(ASSIGN, expr.name, expr.value.accept(self), depth=expr.depth, slot=expr.slot)
+
+    def visitExpression(self, stmt: statement.Expression) -> int:
+        return self._append(EXPRESSION_STMT, 0, stmt.expression.accept(self), NONE, NONE, stmt.line)
+
+    def visitPrint(self, stmt: statement.Print) -> int:
+        return self._append(PRINT_STMT, 0, stmt.expression.accept(self), NONE, NONE, stmt.line)
+
+    def visitVariableStmt(self, stmt: statement.VariableStmt) -> int:
+        initializer = NONE if stmt.initializer is None else stmt.initializer.accept(self)
+        name = stmt.name
+        return self._append(VARIABLE_STMT, name.type.value, initializer, _optional(name.line),
+                            self._intern(name.lexeme), stmt.line, slot=stmt.slot)
+
+def encode(stmts: list[statement.Stmt]) -> NodeTable:
+    return Encoder().encode(stmts)
+
+class TableInterpreter:
+    """
+    Runs a NodeTable by walking it by index, without any node objects
+    Gives the same results and runtime errors as interpreter.Interpreter,
+    rebuilding a node's token only when an error needs it
+    """
+    def __init__(self, interpreter, output: sinks.Sink = None) -> None:
+        """
+        Must pass Lox instance as interpreter argument
+        Lox instance is required for error handling
+        output receives every printed line, as for interpreter.Interpreter
+        """
+        self._interpreter = interpreter
+        self.environment = Environment()
+        self.output = output if output is not None else sinks.StreamSink()
+
+    def interpret(self, table: NodeTable):
+        try:
+            self._run(table)
+        except LoxRuntimeError as error:
+            self._interpreter.runtime_error(error)
+
+    def _run(self, table: NodeTable):
+        kinds = table.kinds
+        operators = table.operators
+        firsts = table.firsts
+        seconds = table.seconds
+        operands = table.operands
+        lines = table.lines
+        depths = table.depths
+        slots = table.slots
+        pool = table.pool
+        environment = self.environment
+        write_line = self.output.writeLine
+
+        def token(index: int) -> scanner.Token:
+            return scanner.Token(TOKEN_TYPES[operators[index]], pool[operands[index]], None, _fromOptional(lines[index]))
+
+        def evaluate(index: int):
+            kind = kinds[index]
+            if kind == BINARY:
+                left = evaluate(firsts[index])
+                right = evaluate(seconds[index])
+                operator = operators[index]
+                if type(left) is float and type(right) is float:
+                    return FLOAT_OPERATORS[operator](left, right)
+                function = NUMBER_CODES.get(operator)
+                if function is not None:
+                    if isinstance(left, Number) and isinstance(right, Number):
+                        return function(float(left), float(right))
+                    raise LoxRuntimeError(token(index), "Operands must both be numbers")
+                if operator == PLUS:
+                    if type(left) in STRING_TYPES and type(right) in STRING_TYPES:
+                        return rope.concat(left, right)
+                    return concatOrAdd(left, token(index), right)
+                if operator == EQUAL_EQUAL:
+                    return isEqual(left, right)
+                if operator == BANG_EQUAL:
+                    return left != right
+                return None
+            if kind == LITERAL:
+                return pool[operands[index]]
+            if kind == VARIABLE:
+                slot = slots[index]
+                if slot == NONE:
+                    return environment.get(token(index))
+                depth = depths[index]
+                if depth == 0:
+                    values = environment.slots
+                    if slot < len(values):
+                        value = values[slot]
+                        if value is not UNDEFINED:
+                            return value
+                return environment.getAt(depth, slot, token(index))
+            if kind == ASSIGN:
+                value = evaluate(firsts[index])
+                slot = slots[index]
+                if slot == NONE:
+                    environment.assign(token(index), value)
+                    return value
+                depth = depths[index]
+                if depth == 0:
+                    values = environment.slots
+                    if slot < len(values) and values[slot] is not UNDEFINED:
+                        values[slot] = value
+                        return value
+                environment.assignAt(depth, slot, token(index), value)
+                return value
+            if kind == GROUPING:
+                return evaluate(firsts[index])
+            if kind == UNARY:
+                right = evaluate(firsts[index])
+                operator = operators[index]
+                if operator == MINUS:
+                    if isinstance(right, Number):
+                        return -float(right)
+                    raise LoxRuntimeError(token(index), "Operand must be a number")
+                if operator == BANG:
+                    return not isTrue(right)
+                return None
+            raise ValueError("node " + str(index) + " of kind " + KINDS[kind].__name__ + " cannot be evaluated")
+
+        for index in table.roots:
+            kind = kinds[index]
+            if kind == PRINT_STMT:
+                write_line(stringify(evaluate(firsts[index])))
+            elif kind == EXPRESSION_STMT:
+                evaluate(firsts[index])
+            else:
+                slot = slots[index]
+                if slot == NONE:
+                    # defineAt would write through the negative index into the last slot
+                    raise ValueError("node " + str(index) + " is a VariableStmt that was encoded before it was resolved")
+                first = firsts[index]
+                environment.defineAt(slot, None if first == NONE else evaluate(first))
@@ -0,0 +1,367 @@
+import sys
+
+import grammar
+import scanner
+import statement
+import rope
+from environment import LoxRuntimeError
+from interpreter import Interpreter
+
+# Binary operators whose result is always a float when evaluation succeeds
+FLOAT_OPERATORS = frozenset((scanner.TokenType.MINUS, scanner.TokenType.STAR, scanner.TokenType.SLASH))
+
+# Binary operators whose result is always a bool
+BOOL_OPERATORS = frozenset((
+    scanner.TokenType.GREATER, scanner.TokenType.GREATER_EQUAL,
+    scanner.TokenType.LESS, scanner.TokenType.LESS_EQUAL,
+    scanner.TokenType.EQUAL_EQUAL, scanner.TokenType.BANG_EQUAL,
+))
+
+def isNumberLiteral(expr: grammar.Expression, value=None) -> bool:
+    """
+    Checks for a number Literal, optionally one equal to value
+    Booleans are excluded even though Python treats them as numbers
+    """
+    if not isinstance(expr, grammar.Literal):
+        return False
+    if isinstance(expr.value, bool) or not isinstance(expr.value, (int, float)):
+        return False
+    return value is None or expr.value == value
+
+def isFloat(expr: grammar.Expression) -> bool:
+    """
+    Checks whether expr is statically known to evaluate to a float
+    """
+    if isinstance(expr, grammar.Grouping):
+        return isFloat(expr.expression)
+    if isinstance(expr, grammar.Literal):
+        return isinstance(expr.value, float)
+    if isinstance(expr, grammar.Unary):
+        return expr.operator.type == scanner.TokenType.MINUS
+    if isinstance(expr, grammar.Binary):
+        if expr.operator.type in FLOAT_OPERATORS:
+            return True
+        if expr.operator.type == scanner.TokenType.PLUS:
+            return isNumber(expr.left) and isNumber(expr.right)
+    return False
+
+def isNumber(expr: grammar.Expression) -> bool:
+    return isNumberLiteral(expr) or isFloat(expr)
+
+def isBool(expr: grammar.Expression) -> bool:
+    """
+    Checks whether expr is statically known to evaluate to a bool
+    """
+    if isinstance(expr, grammar.Grouping):
+        return isBool(expr.expression)
+    if isinstance(expr, grammar.Literal):
+        return isinstance(expr.value, bool)
+    if isinstance(expr, grammar.Unary):
+        return expr.operator.type == scanner.TokenType.BANG
+    if isinstance(expr, grammar.Binary):
+        return expr.operator.type in BOOL_OPERATORS
+    return False
+
+def isPure(expr: grammar.Expression) -> bool:
+    """
+    Checks whether evaluating expr can neither raise nor assign
+    Variable reads are impure since they raise for undefined names
+    """
+    if isinstance(expr, grammar.Literal):
+        return True
+    if isinstance(expr, grammar.Grouping):
+        return isPure(expr.expression)
+    if isinstance(expr, grammar.Unary):
+        return expr.operator.type == scanner.TokenType.BANG and isPure(expr.right)
+    if isinstance(expr, grammar.Binary):
+        return (expr.operator.type in (scanner.TokenType.EQUAL_EQUAL, scanner.TokenType.BANG_EQUAL)
+                and isPure(expr.left) and isPure(expr.right))
+    return False
+
+def countNodes(stmts: list[statement.Stmt]) -> int:
+    counter = NodeCounter()
+    for stmt in stmts:
+        stmt.accept(counter)
+    return counter.count
+
+class NodeCounter:
+    """
+    Counts statement and expression nodes
+    """
+    def __init__(self) -> None:
+        self.count = 0
+
+    def visitExpression(self, stmt: statement.Expression) -> None:
+        self.count += 1
+        stmt.expression.accept(self)
+
+    def visitPrint(self, stmt: statement.Print) -> None:
+        self.count += 1
+        stmt.expression.accept(self)
+
+    def visitVariableStmt(self, stmt: statement.VariableStmt) -> None:
+        self.count += 1
+        if stmt.initializer is not None:
+            stmt.initializer.accept(self)
+
+    def visitLiteral(self, expr: grammar.Literal) -> None:
+        self.count += 1
+
+    def visitGrouping(self, expr: grammar.Grouping) -> None:
+        self.count += 1
+        expr.expression.accept(self)
+
+    def visitUnary(self, expr: grammar.Unary) -> None:
+        self.count += 1
+        expr.right.accept(self)
+
+    def visitBinary(self, expr: grammar.Binary) -> None:
+        self.count += 1
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visitVariableExpr(self, expr: grammar.VariableExpr) -> None:
+        self.count += 1
+
+    def visitAssign(self, expr: grammar.Assign) -> None:
+        self.count += 1
+        expr.value.accept(self)
+
+class ExpressionPass:
+    """
+    Base class for passes that rewrite expressions bottom up
+    Each visit method returns the node that should replace expr
+    Subclasses override the visit methods for the nodes they rewrite
+    """
+    name = "expression"
+
+    def __init__(self) -> None:
+        self.stats = {"rewritten": 0}
+
+    def run(self, stmts: list[statement.Stmt], whole_program: bool) -> list[statement.Stmt]:
+        for stmt in stmts:
+            stmt.accept(self)
+        return stmts
+
+    def visitExpression(self, stmt: statement.Expression) -> None:
+        stmt.expression = stmt.expression.accept(self)
+
+    def visitPrint(self, stmt: statement.Print) -> None:
+        stmt.expression = stmt.expression.accept(self)
+
+    def visitVariableStmt(self, stmt: statement.VariableStmt) -> None:
+        if stmt.initializer is not None:
+            stmt.initializer = stmt.initializer.accept(self)
+
+    def visitLiteral(self, expr: grammar.Literal) -> grammar.Expression:
+        return expr
+
+    def visitGrouping(self, expr: grammar.Grouping) -> grammar.Expression:
+        expr.expression = expr.expression.accept(self)
+        return expr
+
+    def visitUnary(self, expr: grammar.Unary) -> grammar.Expression:
+        expr.right = expr.right.accept(self)
+        return expr
+
+    def visitBinary(self, expr: grammar.Binary) -> grammar.Expression:
+        expr.left = expr.left.accept(self)
+        expr.right = expr.right.accept(self)
+        return expr
+
+    def visitVariableExpr(self, expr: grammar.VariableExpr) -> grammar.Expression:
+        return expr
+
+    def visitAssign(self, expr: grammar.Assign) -> grammar.Expression:
+        expr.value = expr.value.accept(self)
+        return expr
+
+class GroupingElimination(ExpressionPass):
+    """
+    Drops Grouping wrappers, which only matter while parsing
+    """
+    name = "grouping"
+
+    def visitGrouping(self, expr: grammar.Grouping) -> grammar.Expression:
+        self.stats["rewritten"] += 1
+        return expr.expression.accept(self)
+
+class ConstantFolding(ExpressionPass):
+    """
+    Evaluates Unary, Binary and Grouping nodes whose operands are all Literals
+    Folding reuses Interpreter so results match runtime exactly
+    Operations that would raise are left in place so the error still happens at runtime
+    """
+    name = "fold"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._evaluator = Interpreter(None)
+
+    def _fold(self, expr: grammar.Expression, evaluate) -> grammar.Expression:
+        try:
+            value = evaluate(expr)
+        except (LoxRuntimeError, ArithmeticError):
+            return expr
+        if isinstance(value, rope.Rope):
+            value = value.flatten()
+        self.stats["rewritten"] += 1
+        return grammar.Literal(value)
+
+    def visitGrouping(self, expr: grammar.Grouping) -> grammar.Expression:
+        expr.expression = expr.expression.accept(self)
+        if isinstance(expr.expression, grammar.Literal):
+            self.stats["rewritten"] += 1
+            return expr.expression
+        return expr
+
+    def visitUnary(self, expr: grammar.Unary) -> grammar.Expression:
+        expr.right = expr.right.accept(self)
+        if isinstance(expr.right, grammar.Literal):
+            return self._fold(expr, self._evaluator.visitUnary)
+        return expr
+
+    def visitBinary(self, expr: grammar.Binary) -> grammar.Expression:
+        expr.left = expr.left.accept(self)
+        expr.right = expr.right.accept(self)
+        if isinstance(expr.left, grammar.Literal) and isinstance(expr.right, grammar.Literal):
+            return self._fold(expr, self._evaluator.visitBinary)
+        return expr
+
+class AlgebraicSimplification(ExpressionPass):
+    """
+    Removes identity operations whose operand is statically known to be a float
+    x * 1, 1 * x, x / 1 and x - 0 are exact for every float
+    x + 0 is left alone since it turns -0 into 0
+    --x and !!x are removed when x is already a float or bool respectively
+    Operands that may not be numbers are kept so Lox still raises its type errors
+    """
+    name = "algebraic"
+
+    def visitUnary(self, expr: grammar.Unary) -> grammar.Expression:
+        expr.right = expr.right.accept(self)
+        inner = expr.right
+        if isinstance(inner, grammar.Unary) and inner.operator.type == expr.operator.type:
+            if expr.operator.type == scanner.TokenType.MINUS and isFloat(inner.right):
+                self.stats["rewritten"] += 1
+                return inner.right
+            if expr.operator.type == scanner.TokenType.BANG and isBool(inner.right):
+                self.stats["rewritten"] += 1
+                return inner.right
+        return expr
+
+    def visitBinary(self, expr: grammar.Binary) -> grammar.Expression:
+        expr.left = expr.left.accept(self)
+        expr.right = expr.right.accept(self)
+
+        match expr.operator.type:
+            case scanner.TokenType.STAR:
+                if isNumberLiteral(expr.right, 1) and isFloat(expr.left):
+                    self.stats["rewritten"] += 1
+                    return expr.left
+                if isNumberLiteral(expr.left, 1) and isFloat(expr.right):
+                    self.stats["rewritten"] += 1
+                    return expr.right
+            case scanner.TokenType.SLASH:
+                if isNumberLiteral(expr.right, 1) and isFloat(expr.left):
+                    self.stats["rewritten"] += 1
+                    return expr.left
+            case scanner.TokenType.MINUS:
+                if isNumberLiteral(expr.right, 0) and isFloat(expr.left):
+                    self.stats["rewritten"] += 1
+                    return expr.left
+
+        return expr
+
+class DeadStoreElimination:
+    """
+    Removes VariableStmt bindings that are never read or assigned before being redeclared
+    With whole_program set, bindings never referenced before the end of the program are dead too
+    A dead store with an impure initializer is kept as an expression statement for its effects
+    """
+    name = "deadstore"
+
+    def __init__(self) -> None:
+        self.stats = {"removed": 0, "kept_for_effects": 0}
+
+    def run(self, stmts: list[statement.Stmt], whole_program: bool) -> list[statement.Stmt]:
+        live = set()
+        killed = set()
+        output = []
+        for stmt in reversed(stmts):
+            if isinstance(stmt, statement.VariableStmt):
+                name = stmt.name.lexeme
+                is_live = name in live or (not whole_program and name not in killed)
+                killed.add(name)
+                live.discard(name)
+                if not is_live:
+                    if stmt.initializer is None or isPure(stmt.initializer):
+                        self.stats["removed"] += 1
+                        continue
+                    self.stats["kept_for_effects"] += 1
+                    effects = statement.Expression(stmt.initializer)
+                    effects.line = stmt.line
+                    stmt = effects
+                live.update(self._references(stmt))
+            elif stmt is not None:
+                live.update(self._references(stmt))
+            output.append(stmt)
+
+        output.reverse()
+        return output
+
+    def _references(self, stmt: statement.Stmt) -> set:
+        collector = ReferenceCollector()
+        stmt.accept(collector)
+        return collector.names
+
+class ReferenceCollector(NodeCounter):
+    """
+    Collects the lexemes of every variable read or assigned
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self.names = set()
+
+    def visitVariableExpr(self, expr: grammar.VariableExpr) -> None:
+        self.names.add(expr.name.lexeme)
+
+    def visitAssign(self, expr: grammar.Assign) -> None:
+        self.names.add(expr.name.lexeme)
+        expr.value.accept(self)
+
+PASSES = (GroupingElimination, ConstantFolding, AlgebraicSimplification, DeadStoreElimination)
+
+class PassManager:
+    """
+    Runs the optimizer passes in order between Parser.parse() and resolution
+    enabled maps each pass name to whether it runs
+    stats maps each pass name to its counters, plus the node count it left behind
+    """
+    def __init__(self, **enabled) -> None:
+        self.enabled = {}
+        for pass_type in PASSES:
+            self.enabled[pass_type.name] = enabled.pop(pass_type.name, True)
+        if enabled:
+            raise ValueError("Unknown optimizer passes: " + ", ".join(enabled))
+        self.stats = {}
+
+    def run(self, stmts: list[statement.Stmt], whole_program: bool = True) -> list[statement.Stmt]:
+        """
+        Returns the optimized statement list
+        whole_program must be False when later input can still read the current globals, as in a REPL
+        """
+        stmts = [stmt for stmt in stmts if stmt is not None]
+        self.stats = {"input": {"nodes": countNodes(stmts)}}
+        for pass_type in PASSES:
+            if not self.enabled[pass_type.name]:
+                continue
+            optimization = pass_type()
+            stmts = optimization.run(stmts, whole_program)
+            optimization.stats["nodes"] = countNodes(stmts)
+            self.stats[pass_type.name] = optimization.stats
+        return stmts
+
+    def report(self, output=sys.stderr) -> None:
+        for name, counters in self.stats.items():
+            output.write(name.ljust(10) + " " + " ".join(key + "=" + str(value) for key, value in counters.items()) + "\n")
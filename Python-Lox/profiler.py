@@ -0,0 +1,108 @@
+import contextlib
+import sys
+import time
+
+import grammar
+import statement
+from interpreter import Interpreter
+
+class Profiler:
+    """
+    Collects per-phase wall time, per-visit-method counts and times, and per-line statement times
+    Only ProfilingInterpreter and Lox phase hooks feed it, so nothing is recorded unless profiling is on
+    """
+    def __init__(self) -> None:
+        self.phases = {}
+        # visit method name -> [calls, cumulative seconds, self seconds]
+        self.methods = {}
+        # source line -> [statements executed, seconds]
+        self.lines = {}
+        # ";"-joined visit method stack -> self seconds, for flamegraph collapsed stacks
+        self.stacks = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self, output=sys.stderr, top: int = 10) -> None:
+        output.write("phase        seconds\n")
+        for name, seconds in self.phases.items():
+            output.write("%-12s %8.4f\n" % (name, seconds))
+
+        if self.methods:
+            output.write("\nvisit method              calls   cumulative s     self s\n")
+            for name, (calls, cumulative, own) in sorted(self.methods.items(), key=lambda item: -item[1][2]):
+                output.write("%-22s %9d %14.4f %10.4f\n" % (name, calls, cumulative, own))
+
+        if self.lines:
+            output.write("\nhottest lines          statements  seconds\n")
+            hottest = sorted(self.lines.items(), key=lambda item: -item[1][1])[:top]
+            for line, (count, seconds) in hottest:
+                output.write("line %-17s %10d %8.4f\n" % (line, count, seconds))
+
+    def writeCollapsed(self, path: str) -> None:
+        """
+        Writes self times as collapsed stacks, one "frame;frame;frame microseconds" line per stack
+        The format is accepted by flamegraph.pl, speedscope and inferno
+        """
+        with open(path, "w") as file:
+            for stack, seconds in sorted(self.stacks.items()):
+                microseconds = int(seconds * 1e6)
+                if microseconds > 0:
+                    file.write(stack + " " + str(microseconds) + "\n")
+
+class ProfilingInterpreter(Interpreter):
+    """
+    Interpreter that times every node through the _evaluate and _execute dispatch points
+    The plain Interpreter is used when profiling is off, so the hooks cost nothing there
+    """
+    def __init__(self, interpreter, profiler: Profiler, mode: str = "visitor", output=None) -> None:
+        super().__init__(interpreter, mode, output)
+        self.profiler = profiler
+        self._stack = []
+        self._active = {}
+
+    def _evaluate(self, expr: grammar.Expression):
+        return self._timed(expr, "visit" + type(expr).__name__)
+
+    def _execute(self, stmt: statement.Stmt):
+        start = time.perf_counter()
+        try:
+            self._timed(stmt, "visit" + type(stmt).__name__)
+        finally:
+            record = self.profiler.lines.setdefault(stmt.line, [0, 0.0])
+            record[0] += 1
+            record[1] += time.perf_counter() - start
+
+    def _timed(self, node, name: str):
+        """
+        Runs node.accept(self) while tracking inclusive and self time for name
+        Cumulative time is only added by the outermost active call so recursion is not double counted
+        """
+        stack = self._stack
+        frame = [name, 0.0]
+        stack.append(frame)
+        self._active[name] = self._active.get(name, 0) + 1
+        start = time.perf_counter()
+        try:
+            return node.accept(self)
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            self._active[name] -= 1
+            own = elapsed - frame[1]
+            if stack:
+                stack[-1][1] += elapsed
+
+            record = self.profiler.methods.setdefault(name, [0, 0.0, 0.0])
+            record[0] += 1
+            if self._active[name] == 0:
+                record[1] += elapsed
+            record[2] += own
+
+            key = ";".join([entry[0] for entry in stack] + [name])
+            self.profiler.stacks[key] = self.profiler.stacks.get(key, 0.0) + own
@@ -0,0 +1,92 @@
+import closures
+import rope
+import statement
+from environment import Environment, LoxRuntimeError, UNDEFINED
+
+class CompileError(Exception):
+    """
+    Raised by Lox.compile when the source has syntax errors, after they have been reported
+    """
+
+class Result:
+    """
+    Outcome of one Program run
+    output holds the text of every Print in order
+    values maps each global the script declared, and each binding, to its final value
+    error is the LoxRuntimeError that stopped the run, or None
+    """
+    __slots__ = ("output", "values", "error")
+
+    def __init__(self, output: list, values: dict, error: LoxRuntimeError) -> None:
+        self.output = output
+        self.values = values
+        self.error = error
+
+class Program:
+    """
+    Parsed, resolved and closure-compiled script that can be run many times
+    Each run starts from an empty global Environment seeded with that run's bindings
+    Names the script reads but never declares are looked up by name, so bindings supply them
+    Runs of one Program must not overlap, since Print output goes to the current run's list
+    """
+    def __init__(self, stmts: list[statement.Stmt], global_slots: dict) -> None:
+        """
+        stmts must already be resolved, global_slots maps each global they declare to its resolver slot
+        """
+        self._globals = global_slots
+        self._size = len(global_slots)
+        self._output = None
+        self._runs = closures.ClosureCompiler(self.emit).compile(stmts)
+
+    def emit(self, text: str) -> None:
+        self._output.append(text)
+
+    def run(self, bindings: dict = None) -> Result:
+        environment = Environment(None, self._size)
+        if bindings:
+            environment.values.update(_loxValues(bindings))
+        return self._run(environment)
+
+    def run_many(self, records):
+        """
+        Runs the program once per bindings dict in records and yields each Result as it finishes
+        One Environment is reused for every record, reset in place instead of being rebuilt
+        """
+        environment = Environment(None, self._size)
+        slots = environment.slots
+        values = environment.values
+        empty = [UNDEFINED] * self._size
+        for bindings in records:
+            slots[:] = empty
+            values.clear()
+            if bindings:
+                values.update(_loxValues(bindings))
+            yield self._run(environment)
+
+    def _run(self, environment: Environment) -> Result:
+        output = self._output = []
+        error = None
+        try:
+            for run in self._runs:
+                run(environment)
+        except LoxRuntimeError as runtime_error:
+            error = runtime_error
+        finally:
+            self._output = None
+
+        values = {name: _hostValue(value) for name, value in environment.values.items()}
+        slots = environment.slots
+        for name, slot in self._globals.items():
+            value = slots[slot]
+            if value is not UNDEFINED:
+                values[name] = _hostValue(value)
+        return Result(output, values, error)
+
+def _loxValues(bindings: dict) -> dict:
+    """
+    Converts Python ints to floats, since Lox numbers are always floats
+    """
+    return {name: float(value) if type(value) is int else value for name, value in bindings.items()}
+
+def _hostValue(value):
+    return str(value) if type(value) is rope.Rope else value
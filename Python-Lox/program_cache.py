@@ -0,0 +1,168 @@
+import functools
+import hashlib
+import os
+import pickle
+import struct
+import tempfile
+
+import GenerateAST
+import scanner
+from gcpause import pausedGC
+
+# Bump when the file layout below changes
+CACHE_FORMAT = 2
+
+MAGIC = b"LOXC"
+
+# magic, format, grammar digest, source digest
+HEADER = struct.Struct("<4sH32s32s")
+
+CACHE_SUFFIX = ".loxc"
+DEFAULT_DIRNAME = "__loxcache__"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Modules whose code decides the tree a source scans, parses and optimizes to, constant folding included
+TREE_MODULES = ("GenerateAST", "grammar", "statement", "scanner", "regex_scanner", "mmap_scanner",
+                "lox_parser", "optimizer", "interpreter", "environment", "rope")
+
+@functools.cache
+def grammarDigest() -> bytes:
+    """
+    Hash of everything a cached tree depends on: node layouts, token types, the pickle protocol
+    and the source of TREE_MODULES
+    Any change to the grammar, a scanner, the parser or an optimizer pass invalidates existing cache files
+    Computed on first use, so runs without a cache never read those files
+    """
+    description = repr((GenerateAST.base_description, GenerateAST.annotations, GenerateAST.tier_annotations,
+                        [token_type.name for token_type in scanner.TokenType], pickle.HIGHEST_PROTOCOL))
+    digest = hashlib.sha256(description.encode())
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in TREE_MODULES:
+        with open(os.path.join(directory, name + ".py"), "rb") as file:
+            digest.update(file.read())
+    return digest.digest()
+
+class ProgramCache:
+    """
+    Persistent cache of parsed programs, the .loxc analogue of .pyc files
+    Entries are named by a hash of the source, grammarDigest() and the variant (such as optimizer settings),
+    so an edited script or a change to the parsing code simply misses and stale files age out through cleanup
+    """
+    def __init__(self, directory: str = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        directory defaults to a __loxcache__ folder next to each script
+        max_bytes bounds the total size of a cache directory, oldest entries are removed first
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, script_path: str, source_digest: bytes) -> str:
+        directory = self.directory
+        if directory is None:
+            directory = os.path.join(os.path.dirname(os.path.abspath(script_path)), DEFAULT_DIRNAME)
+        return os.path.join(directory, source_digest.hex() + CACHE_SUFFIX)
+
+    def _digest(self, source: str, variant: str) -> bytes:
+        return hashlib.sha256(grammarDigest() + variant.encode() + b"\0" + source.encode()).digest()
+
+    def load(self, script_path: str, source: str, variant: str = ""):
+        """
+        Returns the cached statement list for source, or None on a miss
+        Files with a bad header or mismatched digests are deleted
+        """
+        digest = self._digest(source, variant)
+        path = self._path(script_path, digest)
+        try:
+            with open(path, "rb") as file:
+                header = file.read(HEADER.size)
+                payload = file.read()
+        except OSError:
+            self.misses += 1
+            return None
+
+        if len(header) == HEADER.size and HEADER.unpack(header) == (MAGIC, CACHE_FORMAT, grammarDigest(), digest):
+            try:
+                with pausedGC():
+                    statements = pickle.loads(payload)
+            except Exception:
+                statements = None
+            if statements is not None:
+                self.hits += 1
+                # Refresh the modification time so cleanup removes least recently used entries first
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+                return statements
+
+        self._remove(path)
+        self.misses += 1
+        return None
+
+    def store(self, script_path: str, source: str, statements: list, variant: str = "") -> bool:
+        """
+        Writes statements to the cache atomically, then trims the directory to max_bytes
+        Returns False if the program could not be cached, which never affects the run
+        """
+        digest = self._digest(source, variant)
+        path = self._path(script_path, digest)
+        directory = os.path.dirname(path)
+        try:
+            with pausedGC():
+                payload = pickle.dumps(statements, pickle.HIGHEST_PROTOCOL)
+        except (RecursionError, pickle.PicklingError):
+            return False
+
+        try:
+            os.makedirs(directory, exist_ok=True)
+            handle, temp_path = tempfile.mkstemp(prefix=".tmp-", suffix=CACHE_SUFFIX, dir=directory)
+            try:
+                os.chmod(temp_path, 0o644)
+                with os.fdopen(handle, "wb") as file:
+                    file.write(HEADER.pack(MAGIC, CACHE_FORMAT, grammarDigest(), digest))
+                    file.write(payload)
+                os.replace(temp_path, path)
+            except BaseException:
+                self._remove(temp_path)
+                raise
+        except OSError:
+            return False
+
+        self.cleanup(directory)
+        return True
+
+    def cleanup(self, directory: str) -> None:
+        """
+        Removes the least recently used cache files until the directory fits in max_bytes
+        """
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(CACHE_SUFFIX) or name.startswith(".tmp-"):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+            total += info.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
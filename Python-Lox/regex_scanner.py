@@ -0,0 +1,123 @@
+import re
+from typing import Iterator
+
+from scanner import Token, TokenType, RESERVED_WORDS
+
+# Lexemes that map straight to a TokenType
+PUNCTUATION = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    "{": TokenType.LEFT_BRACE,
+    "}": TokenType.RIGHT_BRACE,
+    ",": TokenType.COMMA,
+    ".": TokenType.DOT,
+    "-": TokenType.MINUS,
+    "+": TokenType.PLUS,
+    ";": TokenType.SEMICOLON,
+    "/": TokenType.SLASH,
+    "*": TokenType.STAR,
+    "!": TokenType.BANG,
+    "!=": TokenType.BANG_EQUAL,
+    "=": TokenType.EQUAL,
+    "==": TokenType.EQUAL_EQUAL,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GREATER_EQUAL,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQUAL,
+}
+
+# Characters that must follow a match before it is known to be complete, as in "1.5"
+LOOKAHEAD = 2
+
+# One alternation over every lexeme class, tried in order at each position
+# Identifiers follow str.isalpha/str.isalnum like Scanner, so underscores are not identifier characters
+MASTER_PATTERN = re.compile(r"""
+    (?P<NEWLINE>\n)
+  | (?P<SPACE>[ \r\t]+)
+  | (?P<COMMENT>//[^\n]*)
+  | (?P<STRING>"[^"]*")
+  | (?P<UNTERMINATED>"[^"]*)
+  | (?P<NUMBER>\d+(?:\.\d+)?)
+  | (?P<IDENTIFIER>[^\W\d_][^\W_]*)
+  | (?P<OPERATOR>[!=<>]=?|[(){},.\-+;/*])
+  | (?P<ERROR>.)
+""", re.VERBOSE)
+
+class RegexScanner():
+    """
+    Drop-in replacement for scanner.Scanner built on one compiled master regex
+    Emits the same Token stream, line numbers and scan_error diagnostics
+    """
+    def __init__(self, interpreter, source: str) -> None:
+        self.source = source
+        self._interpreter = interpreter
+        self.tokens = []
+
+    def scanTokens(self) -> list:
+        """
+        Tokenizes the whole source with MASTER_PATTERN
+        Appends an EOF token and returns self.tokens
+        """
+        self.tokens.extend(self.iterTokens((self.source,)))
+        return self.tokens
+
+    def iterTokens(self, chunks) -> Iterator[Token]:
+        """
+        Yields tokens from an iterable of source text chunks, ending with an EOF token
+        Matches ending within LOOKAHEAD characters of the buffered text are held back
+        until the next chunk arrives, so tokens spanning a chunk boundary come out whole
+        Only the unscanned tail of the text is kept between chunks
+        """
+        punctuation = PUNCTUATION
+        reserved_words = RESERVED_WORDS
+        identifier = TokenType.IDENTIFIER
+        line = 1
+        buffer = ""
+        chunks = iter(chunks)
+        at_eof = False
+
+        while not at_eof:
+            chunk = next(chunks, None)
+            if chunk is None:
+                at_eof = True
+            else:
+                buffer += chunk
+            limit = len(buffer) if at_eof else len(buffer) - LOOKAHEAD
+            scanned = 0
+
+            for match in MASTER_PATTERN.finditer(buffer):
+                end = match.end()
+                if end > limit:
+                    break
+                scanned = end
+                kind = match.lastgroup
+                if kind == "SPACE":
+                    continue
+                text = match.group()
+
+                if kind == "OPERATOR":
+                    yield Token(punctuation[text], text, None, line)
+                elif kind == "IDENTIFIER":
+                    yield Token(reserved_words.get(text, identifier), text, None, line)
+                elif kind == "NUMBER":
+                    yield Token(TokenType.NUMBER, text, float(text), line)
+                elif kind == "NEWLINE":
+                    line += 1
+                elif kind == "STRING":
+                    line += text.count('\n')
+                    yield Token(TokenType.STRING, text, text[1:-1], line)
+                elif kind == "UNTERMINATED":
+                    line += text.count('\n')
+                    self._interpreter.scan_error(line, "Unterminated string.")
+                elif kind == "ERROR":
+                    self._interpreter.scan_error(line, "Unexpected character")
+
+            buffer = buffer[scanned:]
+
+        yield Token(TokenType.EOF, "", None, line)
+
+def streamTokens(interpreter, file, chunk_size: int = 1 << 16) -> Iterator[Token]:
+    """
+    Lazily scans an open text file chunk_size characters at a time
+    """
+    return RegexScanner(interpreter, None).iterTokens(iter(lambda: file.read(chunk_size), ""))
@@ -0,0 +1,106 @@
+import grammar
+import scanner
+import statement
+
+class Resolver:
+    """
+    Static pass run between Parser.parse() and Interpreter.interpret()
+    Annotates each VariableStmt with the slot it defines
+    and each VariableExpr and Assign with the (depth, slot) of the binding it refers to
+    Names with no declaration in scope are left as (None, None) and looked up by name at runtime
+    A statement whose annotations change from an earlier resolve has its compiled closures dropped,
+    since tiering.TieredInterpreter baked the old ones in
+    """
+    def __init__(self, interpreter) -> None:
+        """
+        Must pass Lox instance as interpreter argument
+        scopes[0] is the global scope, kept across calls so later runs reuse earlier slots
+        """
+        self._interpreter = interpreter
+        self.scopes = [{}]
+        self._changed = False
+
+    def resolve(self, stmts: list[statement.Stmt]) -> None:
+        for stmt in stmts:
+            self._changed = False
+            stmt.accept(self)
+            # Only a statement that has run can hold compiled closures
+            if self._changed and (stmt.hits or stmt.compiled is not None):
+                self._invalidate(stmt)
+
+    def _invalidate(self, root) -> None:
+        """
+        Drops the compiled closure and hit count of root and every node under it
+        """
+        pending = [root]
+        while pending:
+            node = pending.pop()
+            node.compiled = None
+            node.hits = 0
+            for name in type(node).__slots__:
+                child = getattr(node, name)
+                if isinstance(child, (grammar.Expression, statement.Stmt)):
+                    pending.append(child)
+
+    def _declare(self, name: scanner.Token) -> int:
+        """
+        Reserves a slot for name in the innermost scope
+        Redeclaring a name reuses its existing slot
+        """
+        scope = self.scopes[-1]
+        slot = scope.get(name.lexeme)
+        if slot is None:
+            slot = len(scope)
+            scope[name.lexeme] = slot
+        return slot
+
+    def _resolveLocal(self, expr: grammar.Expression, name: scanner.Token) -> None:
+        """
+        Walks scopes from innermost to outermost
+        Stores hops to the declaring scope in expr.depth and its slot in expr.slot
+        """
+        for depth, scope in enumerate(reversed(self.scopes)):
+            slot = scope.get(name.lexeme)
+            if slot is not None:
+                break
+        else:
+            depth = None
+
+        if expr.slot != slot or expr.depth != depth:
+            self._changed = True
+            expr.depth = depth
+            expr.slot = slot
+
+    def visitExpression(self, stmt: statement.Expression) -> None:
+        stmt.expression.accept(self)
+
+    def visitPrint(self, stmt: statement.Print) -> None:
+        stmt.expression.accept(self)
+
+    def visitVariableStmt(self, stmt: statement.VariableStmt) -> None:
+        if stmt.initializer is not None:
+            stmt.initializer.accept(self)
+        slot = self._declare(stmt.name)
+        if stmt.slot != slot:
+            self._changed = True
+            stmt.slot = slot
+
+    def visitLiteral(self, expr: grammar.Literal) -> None:
+        return None
+
+    def visitGrouping(self, expr: grammar.Grouping) -> None:
+        expr.expression.accept(self)
+
+    def visitUnary(self, expr: grammar.Unary) -> None:
+        expr.right.accept(self)
+
+    def visitBinary(self, expr: grammar.Binary) -> None:
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visitVariableExpr(self, expr: grammar.VariableExpr) -> None:
+        self._resolveLocal(expr, expr.name)
+
+    def visitAssign(self, expr: grammar.Assign) -> None:
+        expr.value.accept(self)
+        self._resolveLocal(expr, expr.name)
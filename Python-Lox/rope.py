@@ -0,0 +1,75 @@
+import itertools
+
+# Concatenations shorter than this stay plain str, copying small strings is cheaper than tracking pieces
+THRESHOLD = 256
+
+class Rope:
+    """
+    Lazily concatenated Lox string produced by interpreter.concatOrAdd
+    Pieces live in a list that successive appends share, so s = s + piece is amortized O(len(piece))
+    The flat str is only built when the value is observed: str(), ==, hash or a prepend
+    A prepend s = piece + s returns a plain str, copying s once as str concatenation would
+    """
+    __slots__ = ("_parts", "_count", "_length", "_flat")
+
+    def __init__(self, parts: list, count: int, length: int) -> None:
+        """
+        The rope is the first count entries of parts
+        Later entries belong to ropes built by appending to this one
+        """
+        self._parts = parts
+        self._count = count
+        self._length = length
+        self._flat = None
+
+    def flatten(self) -> str:
+        if self._flat is None:
+            self._flat = "".join(itertools.islice(self._parts, self._count))
+            # Detach from the shared buffer so it can be freed once newer ropes are gone
+            self._parts = [self._flat]
+            self._count = 1
+        return self._flat
+
+    def __str__(self) -> str:
+        return self.flatten()
+
+    def __repr__(self) -> str:
+        return "Rope(" + repr(self.flatten()) + ")"
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (str, Rope)):
+            return self._length == len(other) and self.flatten() == str(other)
+        return NotImplemented
+
+    def __ne__(self, other) -> bool:
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self) -> int:
+        return hash(self.flatten())
+
+def concat(left, right):
+    """
+    Concatenates two Lox strings, each either a str or a Rope
+    Returns a plain str below THRESHOLD and a Rope above it
+    """
+    length = len(left) + len(right)
+    if length < THRESHOLD:
+        return str(left) + str(right)
+
+    if type(left) is Rope and left._flat is None:
+        parts = left._parts
+        if left._count != len(parts):
+            # Another rope already appended to this buffer, so branch off a copy
+            parts = parts[:left._count]
+    elif len(left) < len(right):
+        # A prepend gains nothing from a rope, the next s = piece + s would only flatten it again
+        return str(left) + str(right)
+    else:
+        parts = [str(left)]
+
+    parts.append(str(right))
+    return Rope(parts, len(parts), length)
@@ -0,0 +1,340 @@
+import argparse
+import io
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+
+import governor
+import lox
+
+def runJob(job: dict, backend: str = "tree", optimize: bool = False, lexer: str = "char",
+           limits: governor.Limits = None) -> dict:
+    """
+    Runs one job on a fresh Lox, so every job gets its own Interpreter and global Environment
+    A job has a "path" to run like lox.py would, or "source" text
+    limits stops a runaway job inside its worker with a governor.LimitExceeded error on stderr,
+    leaving the worker to take the next job
+    Returns the job id, the exit status lox.py would have had, captured stdout and stderr, and the run time
+    """
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    saved = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = stdout, stderr
+    status = 0
+    start = time.perf_counter()
+    try:
+        runner = lox.Lox(backend, optimize, lexer, limits=limits)
+        if "path" in job:
+            runner.runFile(job["path"])
+        else:
+            runner.run(job["source"])
+            if runner.had_error:
+                sys.exit(1)
+    except SystemExit as exit:
+        status = exit.code if isinstance(exit.code, int) else 1
+    except Exception as error:
+        stderr.write(type(error).__name__ + ": " + str(error) + "\n")
+        status = 1
+    finally:
+        sys.stdout, sys.stderr = saved
+    return {
+        "id": job.get("id"),
+        "status": status,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "seconds": time.perf_counter() - start,
+        "error": None,
+    }
+
+def _workerMain(connection, max_jobs: int, settings: tuple) -> None:
+    """
+    Worker process loop, exits after max_jobs so the pool can replace it with a fresh process
+    """
+    for _ in range(max_jobs):
+        try:
+            job = connection.recv()
+        except EOFError:
+            return
+        connection.send(runJob(job, *settings))
+
+class Worker:
+    __slots__ = ("process", "connection", "job", "reply", "deadline", "jobs")
+
+    def __init__(self, process, connection) -> None:
+        self.process = process
+        self.connection = connection
+        self.job = None
+        self.reply = None
+        self.deadline = None
+        self.jobs = 0
+
+class WorkerPool:
+    """
+    Keeps size warm worker processes and hands each one a job at a time
+    Workers come from a forkserver that has already imported lox, so a new or recycled worker
+    starts without paying for the imports again
+    A worker is replaced after max_jobs jobs to bound memory growth, and killed and replaced
+    when a job runs past timeout seconds
+    """
+    def __init__(self, size: int = None, max_jobs: int = 100, timeout: float = None,
+                 backend: str = "tree", optimize: bool = False, lexer: str = "char",
+                 limits: governor.Limits = None) -> None:
+        self.size = size or os.cpu_count() or 1
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self.settings = (backend, optimize, lexer, limits)
+        self._context = multiprocessing.get_context("forkserver")
+        self._context.set_forkserver_preload(["lox", "runner"])
+        self._idle = [self._spawn() for _ in range(self.size)]
+        self._busy = []
+        # Producer threads put (job, reply) pairs here and write a byte to _wake_writer
+        self._pending = queue.Queue()
+        self._wake_reader, self._wake_writer = socket.socketpair()
+
+    def _spawn(self) -> Worker:
+        parent, child = self._context.Pipe()
+        process = self._context.Process(target=_workerMain, args=(child, self.max_jobs, self.settings), daemon=True)
+        process.start()
+        child.close()
+        return Worker(process, parent)
+
+    def submit(self, job: dict, reply) -> None:
+        """
+        Queues job from any thread, reply(result) is later called on the thread running serve()
+        """
+        self._pending.put((job, reply))
+        self._wake_writer.send(b"\0")
+
+    def close(self) -> None:
+        """
+        Makes serve() return once every queued job has finished
+        """
+        self._pending.put(None)
+        self._wake_writer.send(b"\0")
+
+    def serve(self) -> None:
+        """
+        Dispatches queued jobs to idle workers and delivers results until close() is called
+        At most size jobs run at once, the rest wait in the queue
+        """
+        closed = False
+        while True:
+            while self._idle and not closed:
+                try:
+                    item = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    closed = True
+                else:
+                    self._dispatch(self._idle.pop(), *item)
+            if closed and not self._busy:
+                break
+
+            waiting = [worker.connection for worker in self._busy]
+            if self._idle and not closed:
+                waiting.append(self._wake_reader)
+            ready = multiprocessing.connection.wait(waiting, self._nextTimeout())
+
+            if self._wake_reader in ready:
+                self._wake_reader.recv(4096)
+            for worker in list(self._busy):
+                if worker.connection in ready:
+                    self._collect(worker)
+            self._expire()
+
+        for worker in self._idle:
+            worker.connection.close()
+            worker.process.join()
+        self._idle = []
+
+    def _dispatch(self, worker: Worker, job: dict, reply) -> None:
+        worker.job = job
+        worker.reply = reply
+        worker.deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        worker.connection.send(job)
+        self._busy.append(worker)
+
+    def _nextTimeout(self):
+        deadlines = [worker.deadline for worker in self._busy if worker.deadline is not None]
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - time.monotonic())
+
+    def _collect(self, worker: Worker) -> None:
+        try:
+            result = worker.connection.recv()
+        except EOFError:
+            self._finish(worker, self._failure(worker.job, "worker crashed"), replace=True)
+            return
+        worker.jobs += 1
+        self._finish(worker, result, replace=worker.jobs >= self.max_jobs)
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for worker in list(self._busy):
+            if worker.deadline is not None and worker.deadline <= now:
+                worker.process.kill()
+                self._finish(worker, self._failure(worker.job, "timeout"), replace=True)
+
+    def _finish(self, worker: Worker, result: dict, replace: bool) -> None:
+        self._busy.remove(worker)
+        reply = worker.reply
+        worker.job = worker.reply = worker.deadline = None
+        if replace:
+            worker.connection.close()
+            worker.process.join()
+            worker = self._spawn()
+        self._idle.append(worker)
+        reply(result)
+
+    def _failure(self, job: dict, error: str) -> dict:
+        return {"id": job.get("id"), "status": None, "stdout": "", "stderr": "", "seconds": None, "error": error}
+
+def parseJob(line: str, number: int) -> dict:
+    """
+    Reads a job line, either a JSON object with "path" or "source" and an optional "id", or a bare path
+    Jobs without an id are numbered in arrival order
+    """
+    line = line.strip()
+    job = json.loads(line) if line.startswith("{") else {"path": line}
+    job.setdefault("id", number)
+    return job
+
+def _submitLines(pool: WorkerPool, lines, reply, counted=None) -> None:
+    """
+    Submits every non-blank line as a job, calling counted() before each so a reply never precedes its count
+    Lines that are not valid jobs are answered straight away with an error result
+    """
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        if counted is not None:
+            counted()
+        try:
+            job = parseJob(line, number)
+        except json.JSONDecodeError as error:
+            reply({"id": number, "status": None, "stdout": "", "stderr": "", "seconds": None, "error": "bad job: " + str(error)})
+        else:
+            pool.submit(job, reply)
+        number += 1
+
+def serveStdin(pool: WorkerPool, input=sys.stdin, output=sys.stdout) -> None:
+    """
+    Reads jobs from input and writes one JSON result line per job to output as each finishes
+    """
+    lock = threading.Lock()
+
+    def reply(result: dict) -> None:
+        with lock:
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+    def feed() -> None:
+        _submitLines(pool, input, reply)
+        pool.close()
+
+    threading.Thread(target=feed, daemon=True).start()
+    pool.serve()
+
+class _Client:
+    """
+    One socket connection, closed once its input has ended and all its jobs have replied
+    """
+    def __init__(self, connection: socket.socket) -> None:
+        self.connection = connection
+        self.output = connection.makefile("w")
+        self.pending = 0
+        self.reading = True
+        self.lock = threading.Lock()
+
+    def run(self, pool: WorkerPool) -> None:
+        _submitLines(pool, self.connection.makefile("r"), self.reply, self.counted)
+        with self.lock:
+            self.reading = False
+            finished = self.pending == 0
+        if finished:
+            self.close()
+
+    def counted(self) -> None:
+        with self.lock:
+            self.pending += 1
+
+    def reply(self, result: dict) -> None:
+        with self.lock:
+            try:
+                self.output.write(json.dumps(result) + "\n")
+                self.output.flush()
+            except OSError:
+                pass
+            self.pending -= 1
+            finished = not self.reading and self.pending == 0
+        if finished:
+            self.close()
+
+    def close(self) -> None:
+        try:
+            self.output.close()
+        except OSError:
+            pass
+        self.connection.close()
+
+def serveSocket(pool: WorkerPool, path: str) -> None:
+    """
+    Accepts connections on a Unix socket at path, each sending job lines and reading result lines
+    Jobs from all connections share the pool, and a connection closes after its last result
+    """
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+
+    def accept() -> None:
+        while True:
+            connection, _ = server.accept()
+            threading.Thread(target=_Client(connection).run, args=(pool,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    try:
+        pool.serve()
+    finally:
+        server.close()
+        os.unlink(path)
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Run many Lox jobs on a pool of warm worker processes")
+    arg_parser.add_argument("--socket", help="listen on this Unix socket instead of reading jobs from stdin")
+    arg_parser.add_argument("--workers", "-j", type=int, help="worker processes, defaults to the CPU count")
+    arg_parser.add_argument("--max-jobs-per-worker", type=int, default=100, help="replace a worker after this many jobs")
+    arg_parser.add_argument("--timeout", type=float, help="kill a job after this many seconds")
+    arg_parser.add_argument("--backend", choices=lox.BACKENDS, default="tree")
+    arg_parser.add_argument("--lexer", choices=lox.SCANNERS, default="char")
+    arg_parser.add_argument("--optimize", action="store_true")
+    arg_parser.add_argument("--max-instructions", type=int, help="stop a job after this many statements and expression nodes")
+    arg_parser.add_argument("--max-seconds", type=float, help="stop a job's run after this much time, without killing its worker")
+    arg_parser.add_argument("--max-bytes", type=int, help="stop a job when its variables hold about this many bytes")
+    options = arg_parser.parse_args()
+
+    job_limits = None
+    if options.max_instructions is not None or options.max_seconds is not None or options.max_bytes is not None:
+        if options.backend != "tree":
+            arg_parser.error("--max-instructions, --max-seconds and --max-bytes need --backend tree")
+        job_limits = governor.Limits(options.max_instructions, options.max_seconds, options.max_bytes)
+
+    pool = WorkerPool(options.workers, options.max_jobs_per_worker, options.timeout,
+                      options.backend, options.optimize, options.lexer, job_limits)
+    if options.socket:
+        # Exit through serveSocket's cleanup so the socket file is removed
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        serveSocket(pool, options.socket)
+    else:
+        serveStdin(pool)
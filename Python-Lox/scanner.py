@@ -1,3 +1,5 @@
+import bisect
+import itertools
 from enum import Enum, auto
 
 # Potential to-dos
@@ -57,7 +59,31 @@ class TokenType(Enum):
     WHILE = auto()
     EOF = auto()
 
+# Dictionary of reserved words
+RESERVED_WORDS = {
+    "and": TokenType.AND,
+    "class": TokenType.CLASS,
+    "else": TokenType.ELSE,
+    "false": TokenType.FALSE,
+    "for": TokenType.FOR,
+    "fun": TokenType.FUN,
+    "if": TokenType.IF,
+    "nil": TokenType.NIL,
+    "or": TokenType.OR,
+    "print": TokenType.PRINT,
+    "return": TokenType.RETURN,
+    "super": TokenType.SUPER,
+    "this": TokenType.THIS,
+    "true": TokenType.TRUE,
+    "var": TokenType.VAR,
+    "while": TokenType.WHILE
+}
+
 class Token():
+    # Tokens are the most numerous objects in a run, so they carry no per-instance __dict__
+    # type refers to the shared TokenType member rather than holding its own copy
+    __slots__ = ("type", "lexeme", "literal", "line")
+
     def __init__(self, type: TokenType, lexeme: str, literal: str, line: int) -> None:
         self.type = type
         self.lexeme = lexeme
@@ -72,29 +98,13 @@ class Scanner():
         self.source = source    # Type of source is being listed as a tuple instead of a string
         self._interpreter = interpreter
         self.tokens = []
+        # Source offset of each token's first character, kept for incremental rescans
+        self.offsets = []
         self._start = 0
         self._current = 0
         self._line = 1
 
-        # Dictionary of reserved words
-        self._reserved_words = {
-            "and": TokenType.AND,
-            "class": TokenType.CLASS,
-            "else": TokenType.ELSE,
-            "false": TokenType.FALSE,
-            "for": TokenType.FOR,
-            "fun": TokenType.FUN,
-            "if": TokenType.IF,
-            "nil": TokenType.NIL,
-            "or": TokenType.OR,
-            "print": TokenType.PRINT,
-            "return": TokenType.RETURN,
-            "super": TokenType.SUPER,
-            "this": TokenType.THIS,
-            "true": TokenType.TRUE,
-            "var": TokenType.VAR,
-            "while": TokenType.WHILE
-        }
+        self._reserved_words = RESERVED_WORDS
 
     def scanTokens(self) -> list:
         """
@@ -108,8 +118,55 @@ class Scanner():
             self._scanToken()
 
         self.tokens.append(Token(TokenType.EOF, "", None, self._line))
+        self.offsets.append(len(self.source))
         return self.tokens
 
+    def rescan(self, tokens: list, offsets: list, start: int, removed: int, inserted: int) -> tuple:
+        """
+        Re-lexes self.source after an edit to the source that produced tokens and offsets
+        The edit replaced removed characters at start with inserted characters
+        Scanning restarts two tokens before the edit and stops at the first new token past the edit
+        that matches an old token at the same shifted offset, since everything after it must match too
+        Old tokens from there on are reused, with their lines shifted in place
+        Returns (first, old_stop, new_stop): tokens[first:old_stop] became self.tokens[first:new_stop]
+        """
+        delta = inserted - removed
+        edit_end = start + inserted
+        first = max(0, bisect.bisect_right(offsets, start) - 2)
+
+        self.tokens = tokens[:first]
+        self.offsets = offsets[:first]
+        # Comments and whitespace before the first token belong to no token, so restart from 0 there
+        self._current = offsets[first] if first else 0
+        self._line = self.source.count("\n", 0, self._current) + 1
+
+        eof = len(tokens) - 1
+        while not self._is_at_eof():
+            self._start = self._current
+            count = len(self.tokens)
+            self._scanToken()
+            if len(self.tokens) == count or self._start < edit_end:
+                continue
+
+            old_start = self._start - delta
+            old = bisect.bisect_left(offsets, old_start, first, eof)
+            new_token = self.tokens[-1]
+            if old < eof and offsets[old] == old_start and tokens[old].type == new_token.type and tokens[old].lexeme == new_token.lexeme:
+                self.tokens.pop()
+                self.offsets.pop()
+                new_stop = len(self.tokens)
+                line_delta = new_token.line - tokens[old].line
+                if line_delta:
+                    for token in itertools.islice(tokens, old, None):
+                        token.line += line_delta
+                self.tokens += tokens[old:]
+                self.offsets += [offset + delta for offset in itertools.islice(offsets, old, None)]
+                return first, old, new_stop
+
+        self.tokens.append(Token(TokenType.EOF, "", None, self._line))
+        self.offsets.append(len(self.source))
+        return first, len(tokens), len(self.tokens)
+
     def _scanToken(self) -> None:
         """
         Arguments are stored in Scanner class instance
@@ -194,9 +251,10 @@ class Scanner():
         Takes optional position argument (default 1)
         Checks that many characters ahead of current position
         """
-        if self._is_at_eof():
+        position = self._current + pos_ahead - 1
+        if position >= len(self.source):
             return '\0'
-        return self.source[self._current + pos_ahead - 1]
+        return self.source[position]
 
     def _addToken(self, tokenType: TokenType, literal:str = None) -> None:
         """
@@ -205,6 +263,7 @@ class Scanner():
         """
         text = self.source[self._start:self._current]
         self.tokens.append(Token(tokenType, text, literal, self._line))
+        self.offsets.append(self._start)
 
     def _string(self):
         """
@@ -245,7 +304,8 @@ class Scanner():
                 self._advance()
 
         number_string = self.source[self._start:self._current]
-        self._addToken(TokenType.NUMBER, float(number_string) if '.' in number_string else int(number_string))
+        # Lox has a single number type, so every literal is a float
+        self._addToken(TokenType.NUMBER, float(number_string))
         return number_string
 
     def _identifier(self):
@@ -0,0 +1,129 @@
+import abc
+import atexit
+import os
+import sys
+import weakref
+
+# Flush policies for buffered sinks
+# "size" writes once buffer_size characters are waiting, "line" after every line,
+# and "explicit" only when flush() is called
+SIZE = "size"
+LINE = "line"
+EXPLICIT = "explicit"
+POLICIES = (SIZE, LINE, EXPLICIT)
+
+DEFAULT_BUFFER_SIZE = 1 << 16
+
+# Buffered sinks still alive, flushed when the interpreter exits
+_live = weakref.WeakSet()
+
+@atexit.register
+def _flushLive() -> None:
+    for sink in list(_live):
+        sink.flush()
+
+class Sink(abc.ABC):
+    """
+    Destination of Print output shared by every backend
+    writeLine is called once per printed value with the text to print, without its newline
+    Subclasses must implement writeLine
+    """
+    policy = EXPLICIT
+
+    @abc.abstractmethod
+    def writeLine(self, text: str) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def checkpoint(self) -> None:
+        """
+        Called by Lox at the end of every run
+        Flushes unless the policy leaves flushing to the embedder
+        """
+        if self.policy != EXPLICIT:
+            self.flush()
+
+class BufferedSink(Sink):
+    """
+    Collects lines in a list and hands them to _write as one string
+    Subclasses must implement _write
+    """
+    def __init__(self, policy: str = SIZE, buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        if policy not in POLICIES:
+            raise ValueError("Unknown flush policy '" + policy + "'")
+        self.policy = policy
+        self.buffer_size = buffer_size
+        # Characters waiting before writeLine flushes, so the policy check is one comparison
+        self._limit = {SIZE: buffer_size, LINE: 0, EXPLICIT: float("inf")}[policy]
+        self._lines = []
+        self._size = 0
+        _live.add(self)
+
+    def writeLine(self, text: str) -> None:
+        self._lines.append(text)
+        self._size += len(text) + 1
+        if self._size >= self._limit:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._lines:
+            text = "\n".join(self._lines) + "\n"
+            self._lines = []
+            self._size = 0
+            self._write(text)
+
+    @abc.abstractmethod
+    def _write(self, text: str) -> None:
+        pass
+
+class StreamSink(BufferedSink):
+    """
+    Writes to a text stream, by default whatever sys.stdout is at the time of each flush,
+    so redirecting sys.stdout still captures the output
+    """
+    def __init__(self, stream=None, policy: str = SIZE, buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        super().__init__(policy, buffer_size)
+        self.stream = stream
+
+    def _write(self, text: str) -> None:
+        stream = self.stream or sys.stdout
+        stream.write(text)
+        stream.flush()
+
+class FdSink(BufferedSink):
+    """
+    Encodes buffered text in one go and writes the bytes straight to a file descriptor,
+    bypassing the text layer of sys.stdout
+    Anything already written through sys.stdout is flushed first so output stays in order
+    """
+    def __init__(self, fd: int = 1, policy: str = SIZE, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 encoding: str = "utf-8") -> None:
+        super().__init__(policy, buffer_size)
+        self.fd = fd
+        self.encoding = encoding
+
+    def _write(self, text: str) -> None:
+        if sys.stdout is not None:
+            sys.stdout.flush()
+        data = memoryview(text.encode(self.encoding, "replace"))
+        while data:
+            written = os.write(self.fd, data)
+            data = data[written:]
+
+class CaptureSink(Sink):
+    """
+    Keeps every printed line in memory, for embedding Lox and reading its output afterwards
+    """
+    def __init__(self) -> None:
+        self.lines = []
+
+    def writeLine(self, text: str) -> None:
+        self.lines.append(text)
+
+    def getvalue(self) -> str:
+        return "".join(line + "\n" for line in self.lines)
+
+    def clear(self) -> None:
+        self.lines = []
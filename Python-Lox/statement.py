@@ -1,26 +1,42 @@
 import scanner
 
 class Stmt:
-	pass
+	__slots__ = ()
 
 class Expression(Stmt):
+	__slots__ = ("expression", "line", "hits", "compiled")
+
 	def __init__(self, expression):
 		self.expression = expression
+		self.line = None
+		self.hits = 0
+		self.compiled = None
 
 	def accept(self, visitor):
 		return visitor.visitExpression(self)
 
 class Print(Stmt):
+	__slots__ = ("expression", "line", "hits", "compiled")
+
 	def __init__(self, expression):
 		self.expression = expression
+		self.line = None
+		self.hits = 0
+		self.compiled = None
 
 	def accept(self, visitor):
 		return visitor.visitPrint(self)
 
 class VariableStmt(Stmt):
+	__slots__ = ("name", "initializer", "slot", "line", "hits", "compiled")
+
 	def __init__(self, name, initializer):
 		self.name = name
 		self.initializer = initializer
+		self.slot = None
+		self.line = None
+		self.hits = 0
+		self.compiled = None
 
 	def accept(self, visitor):
 		return visitor.visitVariableStmt(self)
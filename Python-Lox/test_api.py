@@ -0,0 +1,405 @@
+import asyncio
+import contextlib
+import gc
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import cooperative
+import crosscheck
+import gcpause
+import governor
+import lox
+import lox_parser
+import node_table
+import program
+import program_cache
+import rope
+import scanner
+import sinks
+import vectorize
+
+def newLox(*args, **kwargs) -> lox.Lox:
+    """
+    Lox instance whose printed lines go to a sinks.CaptureSink
+    """
+    kwargs.setdefault("output", sinks.CaptureSink())
+    return lox.Lox(*args, **kwargs)
+
+def treeFields(statements: list) -> list:
+    return [crosscheck.nodeFields(stmt) for stmt in statements]
+
+class ProgramTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.program = newLox().compile("var y = x * 2;\nprint y + 1;")
+
+    def test_bindings_supply_undeclared_names(self):
+        result = self.program.run({"x": 3})
+        self.assertIsNone(result.error)
+        self.assertEqual(result.output, ["7"])
+        self.assertEqual(result.values, {"x": 3.0, "y": 6.0})
+
+    def test_runs_do_not_share_globals(self):
+        self.program.run({"x": 3})
+        result = self.program.run()
+        self.assertIsNotNone(result.error)
+        self.assertEqual(result.output, [])
+        self.assertEqual(result.values, {})
+
+    def test_run_many_matches_run(self):
+        records = [{"x": 1}, {}, {"x": 2.5}]
+        expected = [self.program.run(bindings) for bindings in records]
+        actual = list(self.program.run_many(records))
+        self.assertEqual([result.output for result in actual], [result.output for result in expected])
+        self.assertEqual([result.values for result in actual], [result.values for result in expected])
+        self.assertEqual([result.error is None for result in actual], [True, False, True])
+
+    def test_syntax_error_raises_compile_error(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(program.CompileError):
+                newLox().compile("print 1 +;")
+
+class CacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.script = os.path.join(self.directory.name, "script.lox")
+        self.writeScript("var a = \"cached\";\nprint a + \"!\";")
+
+    def writeScript(self, source: str) -> None:
+        with open(self.script, "w") as file:
+            file.write(source)
+
+    def runCached(self) -> tuple:
+        cache = program_cache.ProgramCache(os.path.join(self.directory.name, "cache"))
+        runner = newLox(cache=cache)
+        runner.runFile(self.script)
+        return runner.output.lines, cache
+
+    def test_second_run_loads_from_cache(self):
+        first, cache = self.runCached()
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        second, cache = self.runCached()
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        self.assertEqual(first, ["cached!"])
+        self.assertEqual(second, first)
+
+    def test_edited_script_misses(self):
+        self.runCached()
+        self.writeScript("print \"edited\";")
+        lines, cache = self.runCached()
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(lines, ["edited"])
+
+    def test_changed_parsing_code_misses(self):
+        self.runCached()
+        # Stands in for an edit to one of program_cache.TREE_MODULES
+        with mock.patch.object(program_cache, "grammarDigest", lambda: bytes(32)):
+            lines, cache = self.runCached()
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        self.assertEqual(lines, ["cached!"])
+
+    def test_corrupt_entry_is_replaced(self):
+        self.runCached()
+        cache_directory = os.path.join(self.directory.name, "cache")
+        for name in os.listdir(cache_directory):
+            with open(os.path.join(cache_directory, name), "wb") as file:
+                file.write(b"not a cache file")
+        lines, cache = self.runCached()
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(lines, ["cached!"])
+        self.assertEqual(self.runCached()[1].hits, 1)
+
+class GovernorTests(unittest.TestCase):
+    def runLimited(self, source: str, limits: governor.Limits) -> tuple:
+        """
+        Returns (printed lines, runtime errors) of source run under limits
+        """
+        runner = newLox(limits=limits)
+        errors = []
+        runner.runtime_error = errors.append
+        runner.run(source)
+        return runner.output.lines, errors
+
+    def assertTripped(self, errors: list, limit: str) -> None:
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], governor.LimitExceeded)
+        self.assertEqual(errors[0].limit, limit)
+
+    def test_instruction_limit(self):
+        lines, errors = self.runLimited("print 1;\n" * 100, governor.Limits(max_instructions=10))
+        self.assertTripped(errors, governor.INSTRUCTIONS)
+        self.assertLess(len(lines), 100)
+
+    def test_time_limit(self):
+        source = "var a = 0;\n" + "a = a + 1;\n" * (governor.CHECK_INTERVAL * 2)
+        self.assertTripped(self.runLimited(source, governor.Limits(timeout=0.0))[1], governor.TIME)
+
+    def test_memory_limit(self):
+        source = "var s = \"" + "x" * 100 + "\";\n" + "s = s + s;\n" * 20
+        self.assertTripped(self.runLimited(source, governor.Limits(max_bytes=10000))[1], governor.MEMORY)
+
+    def test_generous_limits_change_nothing(self):
+        source = "var a = 1;\nprint a + 2;\nprint \"x\" + \"y\";"
+        limits = governor.Limits(max_instructions=10 ** 9, timeout=3600.0, max_bytes=10 ** 9)
+        self.assertEqual(self.runLimited(source, limits), (["3", "xy"], []))
+
+    def test_other_backends_are_refused(self):
+        runner = newLox(limits=governor.Limits(max_instructions=100))
+        for backend in ("closure", "vm", "python", "table"):
+            with self.assertRaises(ValueError):
+                runner.run("print 1;", backend=backend)
+        with self.assertRaises(ValueError):
+            runner.interpreter.interpret([], "closure")
+
+class IncrementalTests(unittest.TestCase):
+    SOURCE = "var a = 1;\nprint a + 2;\nvar b = \"text\";\nprint b;\n"
+
+    def fullParse(self, source: str) -> list:
+        return newLox()._scanAndParse(source)
+
+    def test_edits_match_full_reparse(self):
+        document = newLox().openDocument(self.SOURCE)
+        edits = [
+            (self.SOURCE.index("2"), 1, "40"),
+            (0, 0, "print \"first\";\n"),
+            (len(document.source), 0, "var c = a * 3;\n"),
+            (document.source.index("var b"), len("var b = \"text\";\n"), ""),
+        ]
+        for offset, removed, inserted in edits:
+            statements = document.edit(offset, removed, inserted)
+            self.assertEqual(treeFields(statements), treeFields(self.fullParse(document.source)), document.source)
+
+    def test_run_after_edit(self):
+        runner = newLox()
+        document = runner.openDocument(self.SOURCE)
+        document.edit(self.SOURCE.index("2"), 1, "40")
+        document.run()
+        self.assertEqual(runner.output.lines, ["41", "text"])
+
+    def test_optimized_run_keeps_statements_unoptimized(self):
+        document = newLox(optimize=True).openDocument("var a = 1 + 2;\nprint a * 1;\n")
+        before = treeFields(document.statements)
+        document.run()
+        self.assertEqual(treeFields(document.statements), before)
+
+class SinkTests(unittest.TestCase):
+    SOURCE = "var a = 1;\nprint a;\nprint \"two\";\nprint a + 2;"
+
+    def test_every_backend_prints_to_the_sink(self):
+        for backend in lox.BACKENDS:
+            runner = newLox(backend)
+            runner.run(self.SOURCE)
+            self.assertEqual(runner.output.lines, ["1", "two", "3"], backend)
+
+    def test_stream_policies(self):
+        stream = io.StringIO()
+        sink = sinks.StreamSink(stream, sinks.LINE)
+        sink.writeLine("now")
+        self.assertEqual(stream.getvalue(), "now\n")
+
+        stream = io.StringIO()
+        sink = sinks.StreamSink(stream, sinks.SIZE, buffer_size=1000)
+        sink.writeLine("later")
+        self.assertEqual(stream.getvalue(), "")
+        sink.checkpoint()
+        self.assertEqual(stream.getvalue(), "later\n")
+
+        stream = io.StringIO()
+        sink = sinks.StreamSink(stream, sinks.EXPLICIT)
+        sink.writeLine("held")
+        sink.checkpoint()
+        self.assertEqual(stream.getvalue(), "")
+        sink.flush()
+        self.assertEqual(stream.getvalue(), "held\n")
+
+    def test_output_is_flushed_before_errors(self):
+        stream = io.StringIO()
+        runner = lox.Lox(output=sinks.StreamSink(stream, sinks.EXPLICIT))
+        with contextlib.redirect_stderr(stream):
+            runner.run("print \"before\";\nprint missing;")
+        self.assertTrue(stream.getvalue().startswith("before\n"), stream.getvalue())
+
+    def test_incomplete_sink_fails_on_creation(self):
+        with self.assertRaises(TypeError):
+            sinks.BufferedSink()
+
+class LoxTests(unittest.TestCase):
+    def test_run_keeps_globals_when_optimizing(self):
+        runner = newLox(optimize=True)
+        runner.run("var a = 1;")
+        runner.run("print a;")
+        self.assertEqual(runner.output.lines, ["1"])
+        self.assertFalse(runner.had_runtime_error)
+
+    def test_prompt_survives_bad_lines(self):
+        runner = newLox()
+        errors = io.StringIO()
+        with contextlib.redirect_stderr(errors):
+            runner.runPrompt(io.StringIO("var a = 2;\nprint 1 +;\nprint a / 0;\nprint a;\n"), io.StringIO())
+        self.assertEqual(runner.output.lines, ["2"])
+        self.assertIn("Expect expression.", errors.getvalue())
+
+    def test_missing_operand_is_a_syntax_error(self):
+        for parser in ("pratt", "descent"):
+            errors = io.StringIO()
+            with contextlib.redirect_stderr(errors):
+                runner = newLox(parser=parser)
+                runner._scanAndParse("print 1 +;\nprint -;")
+            self.assertTrue(runner.had_error, parser)
+            self.assertEqual(errors.getvalue().count("Expect expression."), 2, parser)
+
+class RopeTests(unittest.TestCase):
+    def test_appends_and_prepends_match_str(self):
+        piece = "x" * 100
+        expected = ""
+        value = ""
+        for index in range(20):
+            if index % 3 == 0:
+                value, expected = rope.concat(str(index), value), str(index) + expected
+            else:
+                value, expected = rope.concat(value, piece + str(index)), expected + piece + str(index)
+            self.assertEqual(str(value), expected)
+
+    def test_prepend_returns_a_plain_str(self):
+        long = rope.concat("a" * 200, "b" * 200)
+        self.assertIs(type(long), rope.Rope)
+        self.assertIs(type(rope.concat("c", long)), str)
+
+class SessionTests(unittest.TestCase):
+    def test_failed_chunk_keeps_the_session(self):
+        session = cooperative.Session()
+        async def chunks():
+            return [await session.runAsync(source) for source in ("var a = 1;", "print 1 / 0;", "print 1 +;", "print a;")]
+        self.assertEqual(asyncio.run(chunks()), [True, False, False, True])
+        self.assertEqual(session.output.lines[0], "Internal error: ZeroDivisionError: float division by zero")
+        self.assertEqual(session.output.lines[2], "1")
+
+    def test_sessions_share_the_loop(self):
+        output = sinks.CaptureSink()
+        first = cooperative.Session(output, budget=10)
+        second = cooperative.Session(output, budget=10)
+        async def both():
+            await asyncio.gather(first.runAsync("print \"a\";\n" * 50), second.runAsync("print \"b\";\n" * 50))
+        asyncio.run(both())
+        self.assertEqual(sorted(output.lines), ["a"] * 50 + ["b"] * 50)
+        self.assertNotEqual(output.lines[:50], ["a"] * 50)
+
+    def test_connection_survives_a_failed_line(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "lox.sock")
+        async def client():
+            server = await asyncio.start_unix_server(cooperative.handleConnection, path)
+            async with server:
+                reader, writer = await asyncio.open_unix_connection(path)
+                writer.write(b"var a = 2;\nprint 1 / 0;\nprint a;\n")
+                writer.write_eof()
+                lines = (await reader.read()).decode().splitlines()
+                writer.close()
+                return lines
+        self.assertEqual(asyncio.run(client()), ["Internal error: ZeroDivisionError: float division by zero", "2"])
+
+class TranspilerTests(unittest.TestCase):
+    def test_non_finite_literals(self):
+        source = "var big = 1" + "0" * 400 + ";\nprint big;\nprint -big;\nprint big - big;"
+        for optimize in (False, True):
+            runner = newLox("python", optimize=optimize)
+            runner.run(source)
+            self.assertEqual(runner.output.lines, ["inf", "-inf", "nan"], optimize)
+
+    def test_names_python_rejects_or_normalizes(self):
+        runner = newLox("python")
+        runner.run("var x² = 2;\nvar \ufb01 = \"ligature\";\nvar fi = \"plain\";\nprint x² + 1;\nprint \ufb01 + fi;")
+        self.assertEqual(runner.output.lines, ["3", "ligatureplain"])
+
+    def test_encoded_name_defined_on_another_backend_is_undefined(self):
+        runner = newLox()
+        errors = []
+        runner.runtime_error = errors.append
+        runner.run("var é = 1;")
+        runner.run("print é;", backend="python")
+        self.assertEqual([error._message for error in errors], ["Undefined variable 'é'."])
+
+class TieringTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.runner = newLox("tiered")
+        self.runner.interpreter.threshold = 2
+        self.runner.run("var a = 1;\nvar b = 2;")
+        self.body = self.runner.parse("print a + b;")
+
+    def test_hot_statement_is_promoted_then_deopted(self):
+        stats = self.runner.interpreter.stats
+        for _ in range(4):
+            self.runner._execute(self.body)
+        self.assertEqual((stats.promotions, stats.deopts, stats.compiled_runs), (1, 0, 2))
+        self.runner.run("a = \"x\";\nb = \"y\";")
+        self.runner._execute(self.body)
+        self.assertEqual((stats.promotions, stats.deopts), (1, 1))
+        self.assertEqual(self.runner.output.lines, ["3"] * 4 + ["xy"])
+
+    def test_closure_override_runs_closures(self):
+        self.runner._execute(self.body, "closure")
+        self.assertIsNotNone(self.body[0].compiled)
+        self.assertEqual(self.runner.interpreter.stats.promotions, 0)
+        self.assertEqual(self.runner.output.lines, ["3"])
+
+class NodeTableTests(unittest.TestCase):
+    SOURCE = "var a = 1;\nvar s = \"x\" + \"y\";\nprint a * 2 + 3;\nprint s;\na = -a;\nprint a == 1 != true;"
+
+    def test_shared_memory_round_trip(self):
+        runner = newLox()
+        statements = runner.parse(self.SOURCE)
+        runner.resolver.resolve(statements)
+        shared = node_table.encode(statements).toSharedMemory()
+        try:
+            table = node_table.attach(shared.name)
+            rebuilt = table.toTree()
+            table.close()
+        finally:
+            shared.close()
+            shared.unlink()
+        self.assertEqual(treeFields(rebuilt), treeFields(statements))
+
+    def test_table_backend_matches_tree(self):
+        expected = newLox()
+        expected.run(self.SOURCE)
+        actual = newLox("table")
+        actual.run(self.SOURCE)
+        self.assertEqual(actual.output.lines, expected.output.lines)
+
+    def test_paused_gc_restores_the_previous_state(self):
+        with gcpause.pausedGC():
+            self.assertFalse(gc.isenabled())
+        self.assertTrue(gc.isenabled())
+        gc.disable()
+        try:
+            with gcpause.pausedGC():
+                pass
+            self.assertFalse(gc.isenabled())
+        finally:
+            gc.enable()
+
+class VectorizeTests(unittest.TestCase):
+    def evaluate(self, source: str, columns: dict) -> tuple:
+        runner = lox.Lox()
+        expr = lox_parser.Parser(runner, scanner.Scanner(runner, source).scanTokens()).parseExpression()
+        result = vectorize.VectorEvaluator().evaluate(expr, columns)
+        return list(result.values), list(result.valid)
+
+    def test_mixed_list_column_matches_rows(self):
+        self.assertEqual(self.evaluate("a + \"!\"", {"a": [1, "x"]}), ([None, "x!"], [False, True]))
+
+    def test_division_by_zero_invalidates_the_row(self):
+        values, valid = self.evaluate("a / b", {"a": [1, 2], "b": [0, 4]})
+        self.assertEqual(valid, [False, True])
+        self.assertEqual(values[1], 0.5)
+
+    def test_random_expressions_match_rows(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(crosscheck.crosscheckVectorize(200, 0), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import sys
+
+import closures
+import grammar
+import rope
+import scanner
+import statement
+from interpreter import Interpreter, FLOAT_SPECIALIZATIONS, STRING_TYPES, _concatSpecialization
+
+# Visitor executions of a node before its next execution compiles it
+DEFAULT_THRESHOLD = 16
+
+# Plain float operations for compiled Binary nodes whose guard has already checked both operand types
+FLOAT_OPERATORS = {
+    **closures.NUMBER_OPERATORS,
+    scanner.TokenType.PLUS: lambda left, right: left + right,
+}
+
+class TierStats:
+    """
+    Counts of what TieredInterpreter did
+    promotions and deopts are also kept per node class name
+    """
+    __slots__ = ("promotions", "deopts", "compiled_runs", "promoted_types", "deopted_types")
+
+    def __init__(self) -> None:
+        self.promotions = 0
+        self.deopts = 0
+        # Executions that went through a compiled closure instead of the visitor
+        self.compiled_runs = 0
+        self.promoted_types = {}
+        self.deopted_types = {}
+
+    def report(self, output=sys.stderr) -> None:
+        output.write("promotions %d, deopts %d, compiled runs %d\n" % (self.promotions, self.deopts, self.compiled_runs))
+        for name, count in sorted(self.promoted_types.items()):
+            output.write("  promoted %-14s %8d\n" % (name, count))
+        for name, count in sorted(self.deopted_types.items()):
+            output.write("  deopted  %-14s %8d\n" % (name, count))
+
+class SpecializingCompiler(closures.ClosureCompiler):
+    """
+    ClosureCompiler for one hot node at a time that bakes in the operand types
+    a Binary node's quickened handler has seen in the visitor
+    A specialized closure checks its types on every run, and on a miss finishes the operation
+    on the generic path and calls deopt(root, binary) so the root drops back to the visitor
+    Binary nodes without a handler, including those past interpreter.MAX_DEOPTS, compile generically
+    """
+    def __init__(self, emit, deopt, generic) -> None:
+        super().__init__(emit)
+        self._deopt = deopt
+        self._generic = generic
+        self._root = None
+
+    def compileNode(self, node):
+        self._root = node
+        try:
+            return node.accept(self)
+        finally:
+            self._root = None
+
+    def visitBinary(self, expr: grammar.Binary):
+        handler = expr.handler
+        operator_type = expr.operator.type
+        if handler is _concatSpecialization:
+            guard = STRING_TYPES
+            function = rope.concat
+        elif handler is not None and handler is FLOAT_SPECIALIZATIONS.get(operator_type):
+            guard = (float,)
+            function = FLOAT_OPERATORS[operator_type]
+        else:
+            return super().visitBinary(expr)
+
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        root = self._root
+        deopt = self._deopt
+        generic = self._generic
+        def run(environment):
+            left_value = left(environment)
+            right_value = right(environment)
+            if type(left_value) in guard and type(right_value) in guard:
+                return function(left_value, right_value)
+            deopt(root, expr)
+            return generic(expr, left_value, right_value)
+        return run
+
+class TieredInterpreter(Interpreter):
+    """
+    Visitor interpreter that promotes hot nodes to closures
+    Each statement and expression counts its visitor executions in node.hits,
+    and once that passes threshold the node is compiled with SpecializingCompiler into node.compiled,
+    which _execute and _evaluate run from then on
+    A deopt clears the root's compiled closure and hit count, so it runs in the visitor again,
+    where quickening relearns the operand types before the next promotion
+    Nodes that run once, as most do, are never compiled
+    """
+    def __init__(self, interpreter, threshold: int = DEFAULT_THRESHOLD, output=None) -> None:
+        super().__init__(interpreter, "visitor", output)
+        self.threshold = threshold
+        self.stats = TierStats()
+        self._compiler = SpecializingCompiler(self.output.writeLine, self._deopt, self._binaryGeneric)
+
+    def interpret(self, stmts: list[statement.Stmt], mode: str = None):
+        """
+        Runs stmts in the tiering visitor, or with mode "closure" as a plain Interpreter would
+        """
+        super().interpret(stmts, mode or "visitor")
+
+    def _execute(self, stmt: statement.Stmt):
+        compiled = stmt.compiled
+        if compiled is None:
+            stmt.hits += 1
+            if stmt.hits <= self.threshold:
+                stmt.accept(self)
+                return
+            compiled = self._promote(stmt)
+        self.stats.compiled_runs += 1
+        compiled(self.environment)
+
+    def _evaluate(self, expr: grammar.Expression):
+        compiled = expr.compiled
+        if compiled is None:
+            expr.hits += 1
+            if expr.hits <= self.threshold:
+                return expr.accept(self)
+            compiled = self._promote(expr)
+        self.stats.compiled_runs += 1
+        return compiled(self.environment)
+
+    def _promote(self, node):
+        compiled = node.compiled = self._compiler.compileNode(node)
+        stats = self.stats
+        stats.promotions += 1
+        name = type(node).__name__
+        stats.promoted_types[name] = stats.promoted_types.get(name, 0) + 1
+        return compiled
+
+    def _deopt(self, root, binary: grammar.Binary) -> None:
+        """
+        Called by a specialized closure whose operand types changed
+        The Binary node's handler is dropped as in Interpreter.visitBinary, so its deopts count
+        toward interpreter.MAX_DEOPTS and a node that keeps changing types ends up compiled generically
+        """
+        if root.compiled is not None:
+            root.compiled = None
+            root.hits = 0
+        if binary.handler is not None:
+            binary.handler = None
+            binary.deopts += 1
+        stats = self.stats
+        stats.deopts += 1
+        name = type(root).__name__
+        stats.deopted_types[name] = stats.deopted_types.get(name, 0) + 1
@@ -0,0 +1,248 @@
+import ast
+import math
+import numbers
+
+import grammar
+import scanner
+import sinks
+import statement
+from environment import LoxRuntimeError
+from interpreter import stringify, concatOrAdd, isEqual, isTrue
+
+Number = numbers.Number
+
+# Generated code refers to Lox variables as v_<name> so they never collide with Python keywords or helpers
+VARIABLE_PREFIX = "v_"
+# Non-ASCII names are hex-encoded as u_<hex>, since Python rejects some letters Lox accepts
+# and NFKC-normalizes others so that two Lox names could become one Python name
+ENCODED_PREFIX = "u_"
+
+NUMBER_HELPERS = {
+    scanner.TokenType.MINUS: "_sub",
+    scanner.TokenType.STAR: "_mul",
+    scanner.TokenType.SLASH: "_div",
+    scanner.TokenType.GREATER: "_gt",
+    scanner.TokenType.GREATER_EQUAL: "_ge",
+    scanner.TokenType.LESS: "_lt",
+    scanner.TokenType.LESS_EQUAL: "_le",
+}
+
+def _numberHelper(function):
+    """
+    Wraps a float binary function with Lox number operand checks
+    Helpers take (left, operator, right) like interpreter.concatOrAdd
+    """
+    def helper(left, operator, right):
+        if isinstance(left, Number) and isinstance(right, Number):
+            return function(float(left), float(right))
+        raise LoxRuntimeError(operator, "Operands must both be numbers")
+    return helper
+
+def _negate(operator, right):
+    if isinstance(right, Number):
+        return -float(right)
+    raise LoxRuntimeError(operator, "Operand must be a number")
+
+def _undefined(name):
+    raise LoxRuntimeError(name, "Undefined variable '" + name.lexeme + "'.")
+
+# Names every compiled program can reference
+RUNTIME = {
+    "_stringify": stringify,
+    "_print": print,
+    "_add": concatOrAdd,
+    "_isEqual": isEqual,
+    "_isTrue": isTrue,
+    "_neg": _negate,
+    "_undefined": _undefined,
+    "_sub": _numberHelper(lambda left, right: left - right),
+    "_mul": _numberHelper(lambda left, right: left * right),
+    "_div": _numberHelper(lambda left, right: left / right),
+    "_gt": _numberHelper(lambda left, right: left > right),
+    "_ge": _numberHelper(lambda left, right: left >= right),
+    "_lt": _numberHelper(lambda left, right: left < right),
+    "_le": _numberHelper(lambda left, right: left <= right),
+}
+
+class TranspiledProgram:
+    """
+    Result of Transpiler.compile
+    code is a CPython code object whose line numbers are the Lox source lines
+    tokens are bound into the namespace as _t0, _t1, ... so errors can report the failing Token
+    """
+    def __init__(self, code, source: str, tokens: list, names: dict) -> None:
+        self.code = code
+        self.source = source
+        self.tokens = tokens
+        self.names = names
+
+    def bind(self, namespace: dict) -> dict:
+        """
+        Adds the runtime helpers and this program's tokens to namespace
+        The same namespace can be reused so globals persist across runs
+        """
+        namespace.update(RUNTIME)
+        for index, token in enumerate(self.tokens):
+            namespace["_t" + str(index)] = token
+        return namespace
+
+    def run(self, namespace: dict) -> None:
+        """
+        Executes the code object in namespace, which must already be bound
+        A NameError means a variable the resolver saw declared was defined by another backend,
+        so it is reported as an undefined Lox variable
+        names maps each generated Python name to a token for its Lox name
+        """
+        try:
+            exec(self.code, namespace)
+        except NameError as error:
+            name = self.names.get(error.name)
+            if name is None:
+                raise
+            _undefined(name)
+
+class Transpiler:
+    """
+    Lowers resolved statements into Python source, one Python statement per Lox statement
+    The source is parsed with ast, relocated to the Lox line numbers and compiled once
+    Keeps stringify formatting, isTrue truthiness and concatOrAdd typing by calling the interpreter helpers
+    """
+    def __init__(self) -> None:
+        self._tokens = []
+        self._token_index = {}
+        self._names = {}
+        self._lines = []
+
+    def transpile(self, stmts: list[statement.Stmt]) -> list:
+        """
+        Returns a list of (Python source, Lox line) pairs, one per statement
+        """
+        self._tokens = []
+        self._token_index = {}
+        self._names = {}
+        output = []
+        line = 1
+        for stmt in stmts:
+            self._lines = []
+            source = stmt.accept(self)
+            if self._lines:
+                line = min(self._lines)
+            output.append((source, line))
+        return output
+
+    def compile(self, stmts: list[statement.Stmt]) -> TranspiledProgram:
+        body = []
+        for source, line in self.transpile(stmts):
+            for node in ast.parse(source).body:
+                for child in ast.walk(node):
+                    if "lineno" in child._attributes:
+                        child.lineno = child.end_lineno = line
+                        child.col_offset = child.end_col_offset = 0
+                body.append(node)
+
+        module = ast.Module(body=body, type_ignores=[])
+        code = compile(module, "<lox>", "exec")
+        return TranspiledProgram(code, ast.unparse(module), self._tokens, self._names)
+
+    def _token(self, token: scanner.Token) -> str:
+        """
+        Returns the namespace name the generated code uses for token
+        """
+        self._lines.append(token.line)
+        index = self._token_index.get(id(token))
+        if index is None:
+            index = len(self._tokens)
+            self._tokens.append(token)
+            self._token_index[id(token)] = index
+        return "_t" + str(index)
+
+    def _variable(self, name: scanner.Token) -> str:
+        self._lines.append(name.line)
+        if name.lexeme.isascii():
+            identifier = VARIABLE_PREFIX + name.lexeme
+        else:
+            identifier = ENCODED_PREFIX + name.lexeme.encode().hex()
+        self._names.setdefault(identifier, name)
+        return identifier
+
+    def visitExpression(self, stmt: statement.Expression) -> str:
+        return stmt.expression.accept(self)
+
+    def visitPrint(self, stmt: statement.Print) -> str:
+        return "_print(_stringify(" + stmt.expression.accept(self) + "))"
+
+    def visitVariableStmt(self, stmt: statement.VariableStmt) -> str:
+        value = "None" if stmt.initializer is None else stmt.initializer.accept(self)
+        return self._variable(stmt.name) + " = " + value
+
+    def visitLiteral(self, expr: grammar.Literal) -> str:
+        if isinstance(expr.value, float) and not math.isfinite(expr.value):
+            # repr gives inf or nan, which are not Python literals
+            return "float('" + repr(expr.value) + "')"
+        return repr(expr.value)
+
+    def visitGrouping(self, expr: grammar.Grouping) -> str:
+        return "(" + expr.expression.accept(self) + ")"
+
+    def visitUnary(self, expr: grammar.Unary) -> str:
+        right = expr.right.accept(self)
+
+        match expr.operator.type:
+            case scanner.TokenType.MINUS:
+                return "_neg(" + self._token(expr.operator) + ", " + right + ")"
+            case scanner.TokenType.BANG:
+                return "(not _isTrue(" + right + "))"
+
+        return "None"
+
+    def visitBinary(self, expr: grammar.Binary) -> str:
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+
+        helper = NUMBER_HELPERS.get(expr.operator.type)
+        if helper is None and expr.operator.type == scanner.TokenType.PLUS:
+            helper = "_add"
+        if helper is not None:
+            return helper + "(" + left + ", " + self._token(expr.operator) + ", " + right + ")"
+
+        match expr.operator.type:
+            case scanner.TokenType.EQUAL_EQUAL:
+                return "_isEqual(" + left + ", " + right + ")"
+            case scanner.TokenType.BANG_EQUAL:
+                return "(" + left + " != " + right + ")"
+
+        return "None"
+
+    def visitVariableExpr(self, expr: grammar.VariableExpr) -> str:
+        if expr.slot is None:
+            return "_undefined(" + self._token(expr.name) + ")"
+        return self._variable(expr.name)
+
+    def visitAssign(self, expr: grammar.Assign) -> str:
+        value = expr.value.accept(self)
+        if expr.slot is None:
+            return "(" + value + ", _undefined(" + self._token(expr.name) + "))"
+        return "(" + self._variable(expr.name) + " := " + value + ")"
+
+class PythonBackend:
+    def __init__(self, interpreter, output: sinks.Sink = None) -> None:
+        """
+        Must pass Lox instance as interpreter argument
+        Lox instance is required for error handling
+        Lox globals live in self.namespace, which persists across programs
+        output receives every printed line in place of RUNTIME's print, as for interpreter.Interpreter
+        """
+        self._interpreter = interpreter
+        self.namespace = {}
+        self.output = output if output is not None else sinks.StreamSink()
+
+    def compile(self, stmts: list[statement.Stmt]) -> TranspiledProgram:
+        return Transpiler().compile(stmts)
+
+    def interpret(self, program: TranspiledProgram):
+        try:
+            namespace = program.bind(self.namespace)
+            namespace["_print"] = self.output.writeLine
+            program.run(namespace)
+        except LoxRuntimeError as error:
+            self._interpreter.runtime_error(error)
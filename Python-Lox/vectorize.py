@@ -0,0 +1,269 @@
+import grammar
+import scanner
+from environment import Environment, LoxRuntimeError
+from interpreter import Interpreter, isTrue
+
+# NumPy is optional, without it every expression takes the scalar path
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Kinds of column a vectorized node can produce
+# Bools count as numbers in arithmetic and comparisons, matching the scalar interpreter
+NUMBER = "number"
+BOOL = "bool"
+STRING = "string"
+NIL = "nil"
+
+class Unvectorizable(Exception):
+    """
+    Raised inside VectorEvaluator for nodes or columns it has no array form for
+    """
+
+class VectorResult:
+    """
+    Values of one expression for every row
+    valid[i] is False where evaluating row i would have raised a runtime error,
+    and values[i] is unspecified there
+    kind is the kind of every valid value, or None when rows were evaluated one at a time
+    """
+    __slots__ = ("values", "valid", "kind")
+
+    def __init__(self, values, valid, kind: str) -> None:
+        self.values = values
+        self.valid = valid
+        self.kind = kind
+
+    def truthy(self):
+        """
+        Returns a mask of rows whose value is Lox-true, invalid rows counting as false
+        """
+        if self.kind is None:
+            return [valid and isTrue(value) for value, valid in zip(self.values, self.valid)]
+        if self.kind == BOOL:
+            return self.values & self.valid
+        if self.kind == NIL:
+            return numpy.zeros(len(self.valid), dtype=bool)
+        return self.valid.copy()
+
+class RowInterpreter(Interpreter):
+    """
+    Scalar fallback that evaluates an expression against one row at a time
+    Variables are always looked up by name, so expressions need not be resolved
+    """
+    def __init__(self) -> None:
+        super().__init__(None)
+
+    def evaluateRow(self, expr: grammar.Expression, row: dict):
+        self.environment = Environment()
+        self.environment.values.update(row)
+        return self._evaluate(expr)
+
+    def visitVariableExpr(self, expr: grammar.VariableExpr):
+        return self.environment.get(expr.name)
+
+    def visitAssign(self, expr: grammar.Assign):
+        value = self._evaluate(expr.value)
+        self.environment.assign(expr.name, value)
+        return value
+
+class VectorEvaluator:
+    """
+    Evaluates a Binary, Unary, Grouping, Literal and VariableExpr tree over whole columns with NumPy
+    Every node yields (kind, data), where data is an array with one entry per row or a scalar that broadcasts
+    Rows that hit a Lox type error, or divide by zero, are cleared in a shared validity mask
+    rather than stopping the evaluation
+    Trees with other nodes, or columns mixing types, are evaluated row by row with RowInterpreter
+    """
+    def evaluate(self, expr: grammar.Expression, columns: dict) -> VectorResult:
+        """
+        columns maps variable names to equal-length sequences
+        """
+        rows = len(next(iter(columns.values()))) if columns else 1
+        if numpy is not None:
+            self._columns = columns
+            self._cache = {}
+            self._valid = numpy.ones(rows, dtype=bool)
+            try:
+                # Overflow, inf - inf and the like give inf or nan as in scalar float arithmetic
+                with numpy.errstate(all="ignore"):
+                    kind, data = expr.accept(self)
+            except Unvectorizable:
+                pass
+            else:
+                dtype = float if kind == NUMBER else bool if kind == BOOL else object
+                values = numpy.empty(rows, dtype=dtype)
+                values[:] = data
+                return VectorResult(values, self._valid, kind)
+            finally:
+                self._columns = self._cache = None
+
+        return self.evaluateRows(expr, columns, rows)
+
+    def evaluateRows(self, expr: grammar.Expression, columns: dict, rows: int) -> VectorResult:
+        names = list(columns)
+        lists = [_scalarList(columns[name]) for name in names]
+        interpreter = RowInterpreter()
+        values = []
+        valid = []
+        for row in range(rows):
+            try:
+                values.append(interpreter.evaluateRow(expr, {name: column[row] for name, column in zip(names, lists)}))
+                valid.append(True)
+            except (LoxRuntimeError, ZeroDivisionError):
+                values.append(None)
+                valid.append(False)
+        if numpy is not None:
+            values = numpy.array(values, dtype=object)
+            valid = numpy.array(valid, dtype=bool)
+        return VectorResult(values, valid, None)
+
+    def _invalid(self):
+        """
+        Marks every row invalid, for operands whose kinds always raise a runtime error
+        """
+        self._valid[:] = False
+        return NUMBER, numpy.nan
+
+    def visitLiteral(self, expr: grammar.Literal):
+        value = expr.value
+        if value is None:
+            return NIL, None
+        if isinstance(value, bool):
+            return BOOL, value
+        if isinstance(value, (int, float)):
+            return NUMBER, float(value)
+        if isinstance(value, str):
+            return STRING, _objectScalar(value)
+        raise Unvectorizable()
+
+    def visitGrouping(self, expr: grammar.Grouping):
+        return expr.expression.accept(self)
+
+    def visitVariableExpr(self, expr: grammar.VariableExpr):
+        name = expr.name.lexeme
+        if name not in self._cache:
+            if name not in self._columns:
+                # Every row would raise an undefined variable error
+                self._cache[name] = self._invalid()
+            else:
+                self._cache[name] = _classifyColumn(self._columns[name])
+        return self._cache[name]
+
+    def visitAssign(self, expr: grammar.Assign):
+        raise Unvectorizable()
+
+    def visitUnary(self, expr: grammar.Unary):
+        kind, data = expr.right.accept(self)
+        match expr.operator.type:
+            case scanner.TokenType.MINUS:
+                if kind in (NUMBER, BOOL):
+                    return NUMBER, -_asFloat(kind, data)
+                return self._invalid()
+            case scanner.TokenType.BANG:
+                if kind == BOOL:
+                    return BOOL, numpy.logical_not(data)
+                # Only nil and false are falsey, so ! is constant for every other kind
+                return BOOL, kind == NIL
+        raise Unvectorizable()
+
+    def visitBinary(self, expr: grammar.Binary):
+        left_kind, left = expr.left.accept(self)
+        right_kind, right = expr.right.accept(self)
+        numeric = left_kind in (NUMBER, BOOL) and right_kind in (NUMBER, BOOL)
+
+        match expr.operator.type:
+            case scanner.TokenType.PLUS:
+                if numeric:
+                    return NUMBER, _asFloat(left_kind, left) + _asFloat(right_kind, right)
+                if left_kind == STRING and right_kind == STRING:
+                    return STRING, numpy.add(left, right, dtype=object)
+                return self._invalid()
+            case scanner.TokenType.EQUAL_EQUAL:
+                return BOOL, self._equal(left_kind, left, right_kind, right)
+            case scanner.TokenType.BANG_EQUAL:
+                return BOOL, numpy.logical_not(self._equal(left_kind, left, right_kind, right))
+
+        function = NUMBER_FUNCTIONS.get(expr.operator.type)
+        if function is None:
+            raise Unvectorizable()
+        if not numeric:
+            return self._invalid()
+
+        left = _asFloat(left_kind, left)
+        right = _asFloat(right_kind, right)
+        if expr.operator.type == scanner.TokenType.SLASH:
+            # The scalar interpreter raises ZeroDivisionError here, so those rows are invalid
+            self._valid &= numpy.broadcast_to(right != 0, self._valid.shape)
+        return (NUMBER if function in ARITHMETIC else BOOL), function(left, right)
+
+    def _equal(self, left_kind: str, left, right_kind: str, right):
+        if left_kind in (NUMBER, BOOL) and right_kind in (NUMBER, BOOL):
+            return numpy.equal(left, right)
+        if left_kind == STRING and right_kind == STRING:
+            return numpy.asarray(numpy.equal(left, right, dtype=object), dtype=bool)
+        # nil only equals nil, and values of different kinds are never equal
+        return left_kind == right_kind == NIL
+
+if numpy is not None:
+    NUMBER_FUNCTIONS = {
+        scanner.TokenType.MINUS: numpy.subtract,
+        scanner.TokenType.STAR: numpy.multiply,
+        scanner.TokenType.SLASH: numpy.divide,
+        scanner.TokenType.GREATER: numpy.greater,
+        scanner.TokenType.GREATER_EQUAL: numpy.greater_equal,
+        scanner.TokenType.LESS: numpy.less,
+        scanner.TokenType.LESS_EQUAL: numpy.less_equal,
+    }
+    ARITHMETIC = (numpy.subtract, numpy.multiply, numpy.divide)
+
+def _asFloat(kind: str, data):
+    if kind == BOOL:
+        return numpy.asarray(data, dtype=float) if isinstance(data, numpy.ndarray) else float(data)
+    return data
+
+def _objectScalar(value):
+    """
+    Wraps a str as a 0-d object array so it broadcasts against object columns instead of becoming a fixed-width string
+    """
+    scalar = numpy.empty((), dtype=object)
+    scalar[()] = value
+    return scalar
+
+def _classifyColumn(column):
+    """
+    Returns (kind, array) for a column, raising Unvectorizable if its values mix kinds
+    Only typed ndarrays take the dtype fast paths, other sequences are checked value by value
+    since NumPy would coerce [1, "x"] to a string array
+    """
+    if isinstance(column, numpy.ndarray):
+        array = column
+    else:
+        array = numpy.empty(len(column), dtype=object)
+        array[:] = column
+    match array.dtype.kind:
+        case "f" | "i" | "u":
+            return NUMBER, array.astype(float, copy=False)
+        case "b":
+            return BOOL, array
+        case "U":
+            return STRING, array.astype(object)
+        case "O":
+            values = array.tolist()
+            if all(type(value) is str for value in values):
+                return STRING, array
+            if all(value is None for value in values):
+                return NIL, None
+            if all(type(value) is bool for value in values):
+                return BOOL, array.astype(bool)
+            if all(type(value) in (int, float) for value in values):
+                return NUMBER, array.astype(float)
+    raise Unvectorizable()
+
+def _scalarList(column) -> list:
+    """
+    Returns column as plain Python values with integers as floats, the way Lox numbers are stored
+    """
+    values = column.tolist() if numpy is not None and isinstance(column, numpy.ndarray) else list(column)
+    return [float(value) if type(value) is int else value for value in values]
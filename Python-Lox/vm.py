@@ -0,0 +1,116 @@
+import numbers
+
+import sinks
+from compiler import Chunk, OpCode
+from environment import Environment
+from interpreter import LoxRuntimeError, stringify, concatOrAdd, isEqual, isTrue
+
+# Plain int copies of the opcodes so the dispatch loop compares ints, not enum members
+CONSTANT = int(OpCode.CONSTANT)
+POP = int(OpCode.POP)
+DEFINE_GLOBAL = int(OpCode.DEFINE_GLOBAL)
+GET_GLOBAL = int(OpCode.GET_GLOBAL)
+SET_GLOBAL = int(OpCode.SET_GLOBAL)
+ADD = int(OpCode.ADD)
+SUBTRACT = int(OpCode.SUBTRACT)
+MULTIPLY = int(OpCode.MULTIPLY)
+DIVIDE = int(OpCode.DIVIDE)
+GREATER = int(OpCode.GREATER)
+GREATER_EQUAL = int(OpCode.GREATER_EQUAL)
+LESS = int(OpCode.LESS)
+LESS_EQUAL = int(OpCode.LESS_EQUAL)
+EQUAL = int(OpCode.EQUAL)
+NOT_EQUAL = int(OpCode.NOT_EQUAL)
+NEGATE = int(OpCode.NEGATE)
+NOT = int(OpCode.NOT)
+PRINT = int(OpCode.PRINT)
+RETURN = int(OpCode.RETURN)
+
+class VM:
+    def __init__(self, interpreter, output: sinks.Sink = None) -> None:
+        """
+        Must pass Lox instance as interpreter argument
+        Lox instance is required for error handling
+        Globals live in an Environment so they match the tree-walking backend
+        output receives every printed line, as for interpreter.Interpreter
+        """
+        self._interpreter = interpreter
+        self.environment = Environment()
+        self.output = output if output is not None else sinks.StreamSink()
+
+    def interpret(self, chunk: Chunk):
+        try:
+            self._run(chunk)
+        except LoxRuntimeError as error:
+            self._interpreter.runtime_error(error)
+
+    def _run(self, chunk: Chunk):
+        code = chunk.code
+        constants = chunk.constants
+        environment = self.environment
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        write_line = self.output.writeLine
+        ip = 0
+
+        while True:
+            op = code[ip]
+            ip += 1
+
+            if op == CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+            elif op == GET_GLOBAL:
+                push(environment.get(chunk.tokens[ip - 1]))
+                ip += 1
+            elif op == SET_GLOBAL:
+                environment.assign(chunk.tokens[ip - 1], stack[-1])
+                ip += 1
+            elif op == DEFINE_GLOBAL:
+                environment.define(constants[code[ip]], pop())
+                ip += 1
+            elif op == POP:
+                pop()
+            elif op == PRINT:
+                write_line(stringify(pop()))
+            elif op == ADD:
+                right = pop()
+                stack[-1] = concatOrAdd(stack[-1], chunk.tokens[ip - 1], right)
+            elif op == NEGATE:
+                right = stack[-1]
+                if not isinstance(right, numbers.Number):
+                    raise LoxRuntimeError(chunk.tokens[ip - 1], "Operand must be a number")
+                stack[-1] = -float(right)
+            elif op == NOT:
+                stack[-1] = not isTrue(stack[-1])
+            elif op == EQUAL:
+                right = pop()
+                stack[-1] = isEqual(stack[-1], right)
+            elif op == NOT_EQUAL:
+                right = pop()
+                stack[-1] = not isEqual(stack[-1], right)
+            elif op == RETURN:
+                return None
+            else:
+                right = pop()
+                left = stack[-1]
+                if not (isinstance(left, numbers.Number) and isinstance(right, numbers.Number)):
+                    raise LoxRuntimeError(chunk.tokens[ip - 1], "Operands must both be numbers")
+                left = float(left)
+                right = float(right)
+
+                if op == SUBTRACT:
+                    stack[-1] = left - right
+                elif op == MULTIPLY:
+                    stack[-1] = left * right
+                elif op == DIVIDE:
+                    stack[-1] = left / right
+                elif op == GREATER:
+                    stack[-1] = left > right
+                elif op == GREATER_EQUAL:
+                    stack[-1] = left >= right
+                elif op == LESS:
+                    stack[-1] = left < right
+                elif op == LESS_EQUAL:
+                    stack[-1] = left <= right